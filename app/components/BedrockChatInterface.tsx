@@ -59,11 +59,16 @@ export default function BedrockChatInterface({
   courseContext = 'bedrock-rag',
   className = '' 
 }: BedrockChatInterfaceProps) {
-  const { messages, loading, error, sendMessage, clearChat } = useBedrockChat()
+  const { messages, loading, error, sendMessage, prefetchStep, clearChat } = useBedrockChat()
   const [inputValue, setInputValue] = useState('')
   const messagesEndRef = useRef<HTMLDivElement>(null)
   const textareaRef = useRef<HTMLTextAreaElement>(null)
 
+  // The step's introduction is generated while the student reads it
+  useEffect(() => {
+    prefetchStep(courseContext, courseStep)
+  }, [courseContext, courseStep, prefetchStep])
+
   // Auto-scroll to bottom when new messages arrive
   useEffect(() => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' })
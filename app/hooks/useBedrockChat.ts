@@ -15,6 +15,7 @@ export interface BedrockChatResponse {
   user_id?: string
   course_id?: string
   step_id?: number
+  session_id?: string
 }
 
 export interface BedrockErrorResponse {
@@ -24,10 +25,49 @@ export interface BedrockErrorResponse {
   timestamp: string
 }
 
+const getAuthToken = async (): Promise<string> => {
+  // Get authentication token from localStorage
+  let token: string | null = null
+
+  console.log('Attempting to get authentication token...')
+
+  // First try to get from Amplify session
+  try {
+    console.log('Calling Auth.currentSession()...')
+    const session = await Auth.currentSession()
+    console.log('Session obtained:', session)
+    token = session.getIdToken().getJwtToken()
+    console.log('Token obtained successfully from Amplify session, length:', token?.length)
+  } catch (authError) {
+    console.error('Auth.currentSession() failed:', authError)
+
+    // Fallback: get from localStorage directly
+    console.log('Trying localStorage fallback...')
+    const clientId = '7ho22jco9j63c3hmsrsp4bj0ti'
+    const lastAuthUser = localStorage.getItem(`CognitoIdentityServiceProvider.${clientId}.LastAuthUser`)
+
+    if (lastAuthUser) {
+      const idTokenKey = `CognitoIdentityServiceProvider.${clientId}.${lastAuthUser}.idToken`
+      token = localStorage.getItem(idTokenKey)
+      console.log('Token obtained from localStorage, length:', token?.length)
+    } else {
+      console.error('No LastAuthUser found in localStorage')
+    }
+  }
+
+  if (!token) {
+    throw new Error('No authentication token found. Please log in.')
+  }
+
+  return token
+}
+
 export const useBedrockChat = () => {
   const [messages, setMessages] = useState<ChatMessage[]>([])
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState<string | null>(null)
+  // Server-side session, the backend keeps the conversation history
+  const [sessionId, setSessionId] = useState<string | null>(null)
 
   const addMessage = useCallback((content: string, role: 'user' | 'assistant') => {
     const newMessage: ChatMessage = {
@@ -50,38 +90,7 @@ export const useBedrockChat = () => {
     addMessage(content, 'user')
 
     try {
-      // Get authentication token from localStorage
-      let token: string | null = null
-      
-      console.log('Attempting to get authentication token...')
-      
-      // First try to get from Amplify session
-      try {
-        console.log('Calling Auth.currentSession()...')
-        const session = await Auth.currentSession()
-        console.log('Session obtained:', session)
-        token = session.getIdToken().getJwtToken()
-        console.log('Token obtained successfully from Amplify session, length:', token?.length)
-      } catch (authError) {
-        console.error('Auth.currentSession() failed:', authError)
-        
-        // Fallback: get from localStorage directly
-        console.log('Trying localStorage fallback...')
-        const clientId = '7ho22jco9j63c3hmsrsp4bj0ti'
-        const lastAuthUser = localStorage.getItem(`CognitoIdentityServiceProvider.${clientId}.LastAuthUser`)
-        
-        if (lastAuthUser) {
-          const idTokenKey = `CognitoIdentityServiceProvider.${clientId}.${lastAuthUser}.idToken`
-          token = localStorage.getItem(idTokenKey)
-          console.log('Token obtained from localStorage, length:', token?.length)
-        } else {
-          console.error('No LastAuthUser found in localStorage')
-        }
-      }
-      
-      if (!token) {
-        throw new Error('No authentication token found. Please log in.')
-      }
+      const token = await getAuthToken()
 
       // Call the FastAPI backend
       const response = await fetch('https://api.cloudacademy.ar/api/bedrock/chat', {
@@ -95,10 +104,14 @@ export const useBedrockChat = () => {
           courseId: courseContext || 'bedrock-rag',
           stepId: stepId || 0,
           context: courseContext || 'bedrock-rag',
-          history: messages.slice(-5).map(msg => ({
-            role: msg.role,
-            content: msg.content
-          }))
+          ...(sessionId
+            ? { sessionId }
+            : {
+                history: messages.slice(-5).map(msg => ({
+                  role: msg.role,
+                  content: msg.content
+                }))
+              })
         })
       })
 
@@ -117,7 +130,11 @@ export const useBedrockChat = () => {
       const data: BedrockChatResponse | BedrockErrorResponse = await response.json()
 
       if (data.success) {
-        addMessage((data as BedrockChatResponse).message, 'assistant')
+        const chatResponse = data as BedrockChatResponse
+        if (chatResponse.session_id) {
+          setSessionId(chatResponse.session_id)
+        }
+        addMessage(chatResponse.message, 'assistant')
       } else {
         throw new Error((data as BedrockErrorResponse).error || 'Unknown error occurred')
       }
@@ -141,11 +158,33 @@ export const useBedrockChat = () => {
     } finally {
       setLoading(false)
     }
-  }, [messages, addMessage])
+  }, [messages, sessionId, addMessage])
+
+  // Warm the backend cache with the step's introduction when a step opens.
+  // Best effort: failures only mean the first question is answered live.
+  const prefetchStep = useCallback(async (courseContext: string, stepId: number) => {
+    try {
+      const token = await getAuthToken()
+      await fetch('https://api.cloudacademy.ar/api/bedrock/chat/prefetch', {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          'Authorization': `Bearer ${token}`,
+        },
+        body: JSON.stringify({
+          courseId: courseContext || 'bedrock-rag',
+          stepId: stepId || 0
+        })
+      })
+    } catch (err) {
+      console.warn('Step prefetch failed:', err)
+    }
+  }, [])
 
   const clearChat = useCallback(() => {
     setMessages([])
     setError(null)
+    setSessionId(null)
   }, [])
 
   return {
@@ -153,6 +192,7 @@ export const useBedrockChat = () => {
     loading,
     error,
     sendMessage,
+    prefetchStep,
     clearChat
   }
 }
\ No newline at end of file
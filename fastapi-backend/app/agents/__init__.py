@@ -1,5 +1,8 @@
-from .base_agent import BaseAgent
+from .base_agent import AgentError, BaseAgent
 from .bedrock_agent import BedrockRAGAgent
+from .registry import AgentRegistry
+from .executor import BedrockExecutor, bedrock_executor
+from .concurrency_limiter import AdaptiveConcurrencyLimiter, bedrock_limiter
 
 # Agent registry for easy access
 AGENTS = {
@@ -11,14 +14,25 @@ AGENTS = {
     # "devops": DevOpsAgent,
 }
 
+# Process-wide registry, agents and Bedrock clients are shared across requests
+agent_registry = AgentRegistry(AGENTS)
+
 def get_agent(course_id: str) -> BaseAgent:
     """
     Factory function to get the appropriate agent for a course
     """
-    agent_class = AGENTS.get(course_id)
-    if not agent_class:
-        raise ValueError(f"No agent found for course: {course_id}")
-    
-    return agent_class()
+    return agent_registry.get_agent(course_id)
 
-__all__ = ["BaseAgent", "BedrockRAGAgent", "AGENTS", "get_agent"]
\ No newline at end of file
+__all__ = [
+    "AgentError",
+    "BaseAgent",
+    "BedrockRAGAgent",
+    "AgentRegistry",
+    "BedrockExecutor",
+    "AdaptiveConcurrencyLimiter",
+    "AGENTS",
+    "agent_registry",
+    "bedrock_executor",
+    "bedrock_limiter",
+    "get_agent"
+]
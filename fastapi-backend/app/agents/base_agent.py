@@ -1,7 +1,19 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator
+from .context_packer import ContextPacker, PackedContext, estimate_tokens
+from ..config import settings
 from ..models import ChatMessage, UserInfo
 
+class AgentError(Exception):
+    """
+    Model call failed, carries a message that can be shown to the user
+    """
+    
+    def __init__(self, message: str, error_code: Optional[str] = None):
+        super().__init__(message)
+        self.message = message
+        self.error_code = error_code
+
 class BaseAgent(ABC):
     """
     Base class for all course agents
@@ -11,7 +23,10 @@ class BaseAgent(ABC):
         self.course_id = course_id
         self.model_id = model_id
         self.system_prompt = self._get_system_prompt()
-    
+        self.context_packer = ContextPacker(token_budget=settings.context_token_budget)
+        # Course material index, attached by the agent registry when one is built
+        self.course_index = None
+
     @abstractmethod
     def _get_system_prompt(self) -> str:
         """
@@ -32,9 +47,30 @@ class BaseAgent(ABC):
         """
         Process a user message and return AI response
         Should be implemented by each course-specific agent
+        Raises AgentError when the model call fails
         """
         pass
     
+    async def stream_message(
+        self,
+        message: str,
+        user_info: UserInfo,
+        step_id: Optional[int] = None,
+        history: List[ChatMessage] = None,
+        context: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream the AI response in chunks
+        Default implementation yields the full answer at once
+        """
+        yield await self.process_message(
+            message=message,
+            user_info=user_info,
+            step_id=step_id,
+            history=history,
+            context=context
+        )
+    
     def _build_context_prompt(
         self,
         message: str,
@@ -43,10 +79,12 @@ class BaseAgent(ABC):
         context: Optional[str] = None
     ) -> str:
         """
-        Build context-aware prompt for the AI model
+        Build context-aware user turn for the AI model
+        The system prompt is sent separately, see _build_system_blocks
+        Answers are cached and shared between students, so the prompt
+        carries nothing about who is asking
         """
         context_parts = [
-            f"Usuario: {user_info.name} ({user_info.email})",
             f"Curso: {self.course_id}",
         ]
         
@@ -57,17 +95,56 @@ class BaseAgent(ABC):
             context_parts.append(f"Contexto adicional: {context}")
         
         context_string = " | ".join(context_parts)
-        
-        return f"""
-{self.system_prompt}
+        course_material = self._retrieve_course_material(message, step_id)
 
+        return f"""
 CONTEXTO ACTUAL: {context_string}
-
+{course_material}
 PREGUNTA DEL USUARIO: {message}
 
 Por favor, proporciona una respuesta útil, específica y educativa basada en el contexto del curso y el paso actual.
 """
     
+    def _retrieve_course_material(self, message: str, step_id: Optional[int] = None) -> str:
+        """
+        Top course snippets for the question, empty when there is no index
+        """
+        if self.course_index is None:
+            return ""
+
+        snippets = self.course_index.search(message, step_id=step_id)
+        if not snippets:
+            return ""
+
+        lines = ["", "MATERIAL DEL CURSO:"]
+        for snippet in snippets:
+            step = f"Step #{snippet.step_id} - " if snippet.step_id is not None else ""
+            lines.append(f"- [{step}{snippet.title}] {snippet.text}")
+        return "\n".join(lines) + "\n"
+
+    def _build_system_blocks(self, cache: bool = False) -> List[Dict[str, Any]]:
+        """
+        Build the Messages API `system` field
+        With cache=True the static system prompt is marked as a prompt cache prefix,
+        unless it is below the model's minimum cacheable length
+        """
+        block: Dict[str, Any] = {"type": "text", "text": self.system_prompt.strip()}
+        if cache and estimate_tokens(block["text"]) >= settings.bedrock_prompt_cache_min_tokens:
+            block["cache_control"] = {"type": "ephemeral"}
+        return [block]
+    
+    def _pack_history(self, history: List[ChatMessage], current_turn: str = "") -> PackedContext:
+        """
+        Select the history that fits the token budget, reserving room for
+        the system prompt, the current turn and the answer
+        """
+        reserved_tokens = (
+            estimate_tokens(self.system_prompt)
+            + estimate_tokens(current_turn)
+            + settings.bedrock_max_output_tokens
+        )
+        return self.context_packer.pack(history, reserved_tokens)
+    
     def _format_history_for_context(self, history: List[ChatMessage]) -> str:
         """
         Format chat history for context
@@ -76,16 +153,8 @@ Por favor, proporciona una respuesta útil, específica y educativa basada en el
             return ""
         
         formatted_history = []
-        for msg in history[-5:]:  # Last 5 messages only
+        for msg in self._pack_history(history).messages:
             role = "Usuario" if msg.role == "user" else "Asistente"
             formatted_history.append(f"{role}: {msg.content}")
         
         return "\n".join(formatted_history)
-    
-    def _validate_course_relevance(self, message: str) -> bool:
-        """
-        Basic validation to ensure message is course-relevant
-        Can be overridden by specific agents
-        """
-        # Basic implementation - can be enhanced
-        return len(message.strip()) > 0
\ No newline at end of file
@@ -1,20 +1,56 @@
+import asyncio
 import boto3
 import json
-from typing import List, Optional
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator, List, Optional
 from botocore.exceptions import ClientError
 
-from .base_agent import BaseAgent
+from .base_agent import AgentError, BaseAgent
+from .concurrency_limiter import THROTTLING_ERROR_CODES, LimiterSlot, bedrock_limiter
+from .context_packer import estimate_tokens
+from .executor import bedrock_executor
+from .hedging import HedgingPolicy
+from .model_router import ModelRouter
+from .usage import CancellationStats, TokenUsageStats
+from ..metrics import BEDROCK_CALL_DURATION, BEDROCK_TOKENS_SAVED, MODEL_CALLS_CANCELLED, record_token_usage
 from ..models import ChatMessage, UserInfo
 from ..config import settings
 
+@dataclass
+class CallProgress:
+    """
+    How far a model call got, to estimate what cancelling it saved
+    """
+    sent: bool = False
+    output_tokens: int = 0
+
 class BedrockRAGAgent(BaseAgent):
     """
     Specialized agent for RAG Bedrock course
     """
     
-    def __init__(self):
+    def __init__(self, bedrock_client=None, hedge_client=None):
         super().__init__(course_id="bedrock-rag", model_id=settings.bedrock_model_id)
-        self.bedrock_client = self._init_bedrock_client()
+        # Shared client from the agent registry, or a private one as fallback
+        self.bedrock_client = bedrock_client or self._init_bedrock_client()
+        # Client for hedged requests (secondary region), None disables hedging
+        self.hedge_client = hedge_client
+        self.usage = TokenUsageStats()
+        self.cancellations = CancellationStats()
+        self.model_router = ModelRouter(
+            fast_model_id=settings.bedrock_fast_model_id,
+            strong_model_id=self.model_id,
+            enabled=settings.bedrock_routing_enabled,
+            max_fast_tokens=settings.bedrock_routing_max_fast_tokens
+        )
+        self.hedging = HedgingPolicy(
+            enabled=settings.bedrock_hedging_enabled and hedge_client is not None,
+            percentile=settings.bedrock_hedge_percentile,
+            min_delay=settings.bedrock_hedge_min_delay_seconds,
+            min_samples=settings.bedrock_hedge_min_samples,
+            max_hedge_rate=settings.bedrock_hedge_max_rate
+        )
     
     def _init_bedrock_client(self):
         """Initialize Bedrock client"""
@@ -63,6 +99,269 @@ ESTILO DE RESPUESTA:
 Siempre contextualiza tu respuesta al paso actual del curso y al nivel de conocimiento esperado del estudiante.
 """
     
+    def _build_request_body(
+        self,
+        message: str,
+        user_info: UserInfo,
+        step_id: Optional[int] = None,
+        history: List[ChatMessage] = None,
+        context: Optional[str] = None
+    ) -> dict:
+        """
+        Build the Claude Messages API request body
+        """
+        # Build the prompt with context
+        prompt = self._build_context_prompt(message, user_info, step_id, context)
+        
+        # Prepare the request for Claude
+        request_body = {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": settings.bedrock_max_output_tokens,
+            # Static system prompt, cacheable as a prefix across requests
+            "system": self._build_system_blocks(cache=settings.bedrock_prompt_caching_enabled),
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ]
+        }
+        
+        # Add history if available
+        if history:
+            # Convert history to Claude format
+            claude_messages = []
+            for msg in self._pack_history(history, prompt).messages:
+                claude_messages.append({
+                    "role": msg.role,
+                    "content": msg.content
+                })
+            
+            # Add current message
+            claude_messages.append({
+                "role": "user",
+                "content": prompt
+            })
+            
+            request_body["messages"] = claude_messages
+        
+        return request_body
+    
+    def _client_error(self, error: ClientError) -> AgentError:
+        """
+        Map a Bedrock ClientError to an AgentError with a user-facing message
+        """
+        error_code = error.response['Error']['Code']
+        if error_code == 'AccessDeniedException':
+            message = "Error de permisos. Verifica que tienes acceso a Amazon Bedrock."
+        elif error_code == 'ResourceNotFoundException':
+            message = "Modelo no encontrado. Verifica la configuración del modelo."
+        else:
+            message = f"Error de AWS: {error_code}. Por favor, intenta nuevamente."
+        return AgentError(message, error_code)
+    
+    def _invoke_model(self, request_body: dict, model_id: str, client=None) -> dict:
+        """
+        Blocking Bedrock call, runs in the Bedrock executor
+        """
+        response = (client or self.bedrock_client).invoke_model(
+            modelId=model_id,
+            body=json.dumps(request_body),
+            contentType='application/json'
+        )
+        return json.loads(response['body'].read())
+    
+    def _invoke_model_stream(self, request_body: dict, usage: dict, model_id: str, client=None) -> Iterator[str]:
+        """
+        Blocking streaming Bedrock call, yields text deltas as they arrive
+        Token usage from the stream events is collected into `usage`
+        """
+        response = (client or self.bedrock_client).invoke_model_with_response_stream(
+            modelId=model_id,
+            body=json.dumps(request_body),
+            contentType='application/json'
+        )
+        stream = response['body']
+        try:
+            for event in stream:
+                chunk = event.get('chunk')
+                if not chunk:
+                    continue
+                payload = json.loads(chunk['bytes'])
+                if payload.get('type') == 'message_start':
+                    usage.update(payload.get('message', {}).get('usage', {}))
+                elif payload.get('type') == 'message_delta':
+                    usage.update(payload.get('usage', {}))
+                elif payload.get('type') == 'content_block_delta':
+                    delta = payload.get('delta', {})
+                    if delta.get('type') == 'text_delta':
+                        yield delta.get('text', '')
+        finally:
+            # Release the HTTP connection if the consumer stops early
+            close = getattr(stream, 'close', None)
+            if close:
+                close()
+    
+    async def _collect_stream(
+        self,
+        slot: LimiterSlot,
+        request_body: dict,
+        model_id: str,
+        progress: Optional[CallProgress] = None,
+        client=None
+    ) -> dict:
+        """
+        Non-streaming call made over the streaming API, so that cancelling
+        it closes the stream and Bedrock stops generating
+        """
+        usage = {}
+        chunks = []
+        async for text in bedrock_executor.stream(
+            self._invoke_model_stream, request_body, usage, model_id, client, worker_started=slot.hold_until
+        ):
+            chunks.append(text)
+            if progress is not None:
+                progress.output_tokens += estimate_tokens(text)
+        content = [{"type": "text", "text": "".join(chunks)}] if chunks else []
+        return {"content": content, "usage": usage}
+    
+    async def _call_model(self, request_body: dict, model_id: str, progress: Optional[CallProgress] = None) -> dict:
+        """
+        Call Bedrock, hedging to the secondary region when the primary is slow
+        """
+        if not self.hedging.enabled:
+            return await self._call_primary(request_body, model_id, progress)
+        
+        self.hedging.start_request()
+        primary = asyncio.ensure_future(self._call_primary(request_body, model_id, progress))
+        delay = self.hedging.delay(self.model_router.latency(model_id))
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+        if done:
+            return await primary
+        # A hedge is extra load, it is only sent when a limiter slot is free
+        if not bedrock_limiter.has_free_slot:
+            self.hedging.record_no_capacity()
+            return await primary
+        if not self.hedging.try_hedge():
+            return await primary
+        
+        hedge_model_id = settings.bedrock_hedge_model_ids.get(model_id, model_id)
+        hedge = asyncio.ensure_future(self._call_hedge(request_body, hedge_model_id))
+        pending = {primary, hedge}
+        try:
+            # First successful answer wins, a failure waits for the other call
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self.hedging.record_win(task is hedge)
+                        return task.result()
+            return primary.result()
+        finally:
+            # Cancel the loser, a blocking call already in a worker thread runs to completion
+            for task in (primary, hedge):
+                if not task.done():
+                    task.cancel()
+            if hedge.done() and not hedge.cancelled():
+                hedge.exception()
+    
+    async def _call_primary(self, request_body: dict, model_id: str, progress: Optional[CallProgress] = None) -> dict:
+        """
+        Call Bedrock off the event loop, within the adaptive concurrency limit
+        """
+        async with bedrock_limiter.slot() as slot:
+            if progress is not None:
+                progress.sent = True
+            return await self._invoke_in_slot(slot, request_body, model_id, progress)
+    
+    async def _call_hedge(self, request_body: dict, model_id: str) -> dict:
+        """
+        Duplicate call to the secondary region, it never waits for a limiter slot
+        """
+        if not bedrock_limiter.try_acquire():
+            self.hedging.record_no_capacity()
+            raise AgentError("No free Bedrock slot for the hedge", "ConcurrencyLimitExceeded")
+        async with bedrock_limiter.slot(acquired=True) as slot:
+            return await self._invoke_in_slot(slot, request_body, model_id, hedge=True)
+    
+    async def _invoke_in_slot(
+        self,
+        slot: LimiterSlot,
+        request_body: dict,
+        model_id: str,
+        progress: Optional[CallProgress] = None,
+        hedge: bool = False
+    ) -> dict:
+        """
+        Make the call and record its latency; only primary calls feed the
+        router's latency, which sets the hedge delay
+        """
+        client = self.hedge_client if hedge else self.bedrock_client
+        mode = "hedge" if hedge else "invoke"
+        started = time.perf_counter()
+        try:
+            if settings.bedrock_cancellable_calls:
+                response_body = await self._collect_stream(slot, request_body, model_id, progress, client)
+            else:
+                response_body = await bedrock_executor.run(
+                    self._invoke_model, request_body, model_id, client, worker_started=slot.hold_until
+                )
+        except ClientError as e:
+            BEDROCK_CALL_DURATION.labels(model=model_id, mode=mode, outcome="error").observe(
+                time.perf_counter() - started
+            )
+            if not hedge:
+                self.model_router.record_error(model_id)
+            if e.response['Error']['Code'] in THROTTLING_ERROR_CODES:
+                slot.mark_throttled()
+            raise
+        elapsed = time.perf_counter() - started
+        BEDROCK_CALL_DURATION.labels(model=model_id, mode=mode, outcome="success").observe(elapsed)
+        if not hedge:
+            self.model_router.record(model_id, elapsed)
+        return response_body
+    
+    def _record_cancellation(
+        self,
+        model_id: str,
+        request_body: dict,
+        progress: CallProgress,
+        cancellable: bool
+    ) -> None:
+        """
+        Count a call abandoned by the client and estimate the tokens saved.
+        A queued call saves its whole prompt and answer, a stream saves the
+        rest of the average answer; a plain invoke_model runs to completion.
+        """
+        if self.usage.requests:
+            expected_output = self.usage.output_tokens // self.usage.requests
+        else:
+            expected_output = settings.bedrock_max_output_tokens
+        
+        saved_input = saved_output = 0
+        if not progress.sent:
+            stage = "queued"
+            saved_input = estimate_tokens(self.system_prompt) + sum(
+                estimate_tokens(msg["content"]) for msg in request_body["messages"]
+            )
+            saved_output = expected_output
+        elif cancellable:
+            stage = "generating"
+            saved_output = max(0, expected_output - progress.output_tokens)
+        else:
+            stage = "in_flight"
+        
+        self.cancellations.record(stage, saved_input, saved_output)
+        MODEL_CALLS_CANCELLED.labels(model=model_id, stage=stage).inc()
+        if saved_input:
+            BEDROCK_TOKENS_SAVED.labels(model=model_id, type="input").inc(saved_input)
+        if saved_output:
+            BEDROCK_TOKENS_SAVED.labels(model=model_id, type="output").inc(saved_output)
+    
     async def process_message(
         self,
         message: str,
@@ -79,63 +378,104 @@ Siempre contextualiza tu respuesta al paso actual del curso y al nivel de conoci
             if not self.bedrock_client:
                 raise Exception("Bedrock client not initialized. Check AWS credentials and permissions.")
             
-            # Build the prompt with context
-            prompt = self._build_context_prompt(message, user_info, step_id, context)
-            
-            # Prepare the request for Claude
-            request_body = {
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 1000,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
-            }
-            
-            # Add history if available
-            if history:
-                # Convert history to Claude format
-                claude_messages = []
-                for msg in history[-4:]:  # Last 4 messages for context
-                    claude_messages.append({
-                        "role": msg.role,
-                        "content": msg.content
-                    })
-                
-                # Add current message
-                claude_messages.append({
-                    "role": "user",
-                    "content": prompt
-                })
-                
-                request_body["messages"] = claude_messages
-            
-            # Call Bedrock
-            response = self.bedrock_client.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps(request_body),
-                contentType='application/json'
-            )
+            request_body = self._build_request_body(message, user_info, step_id, history, context)
             
-            # Parse response
-            response_body = json.loads(response['body'].read())
+            # Short lookups go to the fast model, the rest to the strong one
+            model_id = self.model_router.route(message, history)
+            progress = CallProgress()
+            try:
+                response_body = await self._call_model(request_body, model_id, progress)
+            except ClientError:
+                fallback_model_id = self.model_router.fallback_for(model_id)
+                if not fallback_model_id:
+                    raise
+                self.model_router.record_fallback(model_id)
+                model_id = fallback_model_id
+                response_body = await self._call_model(request_body, model_id, progress)
             
-            if 'content' in response_body and len(response_body['content']) > 0:
-                return response_body['content'][0]['text']
-            else:
-                return "Lo siento, no pude generar una respuesta. Por favor, intenta reformular tu pregunta."
-                
+        except asyncio.CancelledError:
+            self._record_cancellation(model_id, request_body, progress, cancellable=settings.bedrock_cancellable_calls)
+            raise
+        
         except ClientError as e:
-            error_code = e.response['Error']['Code']
-            if error_code == 'AccessDeniedException':
-                return "Error de permisos. Verifica que tienes acceso a Amazon Bedrock."
-            elif error_code == 'ResourceNotFoundException':
-                return "Modelo no encontrado. Verifica la configuración del modelo."
-            else:
-                return f"Error de AWS: {error_code}. Por favor, intenta nuevamente."
+            raise self._client_error(e)
+                
+        except AgentError:
+            raise
                 
         except Exception as e:
             print(f"Error processing message with Bedrock: {e}")
             raise e
+        
+        self.usage.record(response_body.get('usage', {}))
+        record_token_usage(model_id, response_body.get('usage', {}))
+        
+        if 'content' in response_body and len(response_body['content']) > 0:
+            return response_body['content'][0]['text']
+        
+        raise AgentError(
+            "Lo siento, no pude generar una respuesta. Por favor, intenta reformular tu pregunta.",
+            "EmptyResponse"
+        )
+    
+    async def stream_message(
+        self,
+        message: str,
+        user_info: UserInfo,
+        step_id: Optional[int] = None,
+        history: List[ChatMessage] = None,
+        context: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream the Claude answer token by token
+        """
+        if not self.bedrock_client:
+            raise Exception("Bedrock client not initialized. Check AWS credentials and permissions.")
+        
+        request_body = self._build_request_body(message, user_info, step_id, history, context)
+        model_id = self.model_router.route(message, history)
+        usage = {}
+        progress = CallProgress()
+        
+        try:
+            while True:
+                yielded = False
+                # Streams are long-lived, only throttling adapts the limit
+                async with bedrock_limiter.slot(measure_latency=False) as slot:
+                    progress.sent = True
+                    started = time.perf_counter()
+                    try:
+                        async for text in bedrock_executor.stream(
+                            self._invoke_model_stream, request_body, usage, model_id, worker_started=slot.hold_until
+                        ):
+                            yielded = True
+                            progress.output_tokens += estimate_tokens(text)
+                            yield text
+                    except ClientError as e:
+                        BEDROCK_CALL_DURATION.labels(model=model_id, mode="stream", outcome="error").observe(
+                            time.perf_counter() - started
+                        )
+                        self.model_router.record_error(model_id)
+                        if e.response['Error']['Code'] in THROTTLING_ERROR_CODES:
+                            slot.mark_throttled()
+                        # Retry with the fallback model only if nothing was sent yet
+                        fallback_model_id = self.model_router.fallback_for(model_id)
+                        if yielded or not fallback_model_id:
+                            raise
+                        self.model_router.record_fallback(model_id)
+                        model_id = fallback_model_id
+                        continue
+                    elapsed = time.perf_counter() - started
+                    BEDROCK_CALL_DURATION.labels(model=model_id, mode="stream", outcome="success").observe(elapsed)
+                    self.model_router.record_stream(model_id, elapsed)
+                    break
+        except ClientError as e:
+            raise self._client_error(e)
+        except (asyncio.CancelledError, GeneratorExit):
+            # Client went away, closing the executor stream closes the Bedrock stream
+            self._record_cancellation(model_id, request_body, progress, cancellable=True)
+            raise
+        finally:
+            if usage:
+                self.usage.record(usage)
+                record_token_usage(model_id, usage)
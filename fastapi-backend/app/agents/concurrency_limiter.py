@@ -0,0 +1,210 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from .base_agent import AgentError
+from ..config import settings
+from ..metrics import BEDROCK_QUEUE_WAIT
+
+# Bedrock error codes that mean "slow down"
+THROTTLING_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceQuotaExceededException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException"
+}
+
+class LimiterSlot:
+    """Handle for one admitted call, used to report its outcome"""
+
+    def __init__(self):
+        self.throttled = False
+        self.worker: Optional[asyncio.Future] = None
+
+    def mark_throttled(self) -> None:
+        self.throttled = True
+
+    def hold_until(self, worker: asyncio.Future) -> None:
+        """
+        Keep the slot until the worker thread making the call finishes,
+        even if the caller gives up on it first
+        """
+        self.worker = worker
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limiter for model calls.
+
+    The in-flight limit grows by about one per limit's worth of successful
+    calls and is cut multiplicatively on throttling or when a call is
+    slower than the latency threshold. Calls over the limit wait in a FIFO
+    queue until a slot frees up or their deadline passes. A call whose
+    worker thread outlives its caller holds the slot until the thread ends.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        decrease_factor: float,
+        latency_threshold: float,
+        queue_timeout: float,
+        max_queue: int
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_threshold = latency_threshold
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self._limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.throttles = 0
+        self.latency_spikes = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def has_free_slot(self) -> bool:
+        return self._in_flight < self.limit and not self._waiters
+
+    def _wake_next(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
+
+    async def acquire(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait for a slot, raising AgentError if the queue is full or the deadline passes
+        """
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            BEDROCK_QUEUE_WAIT.observe(0)
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise AgentError(
+                "El asistente está recibiendo muchas consultas. Por favor, intenta nuevamente en unos segundos.",
+                "ConcurrencyLimitExceeded"
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, timeout if timeout is not None else self.queue_timeout)
+            BEDROCK_QUEUE_WAIT.observe(time.perf_counter() - started)
+        except asyncio.TimeoutError:
+            BEDROCK_QUEUE_WAIT.observe(time.perf_counter() - started)
+            self.timeouts += 1
+            raise AgentError(
+                "El asistente está recibiendo muchas consultas. Por favor, intenta nuevamente en unos segundos.",
+                "ConcurrencyQueueTimeout"
+            )
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was granted just as we were cancelled, hand it on
+                self._in_flight -= 1
+                self._wake_next()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def try_acquire(self) -> bool:
+        """
+        Take a slot only if one is free right away, for optional work that should not queue
+        """
+        if self.has_free_slot:
+            self._in_flight += 1
+            return True
+        return False
+
+    def release(self, throttled: bool = False, latency: Optional[float] = None) -> None:
+        """
+        Free a slot and adapt the limit to the call's outcome
+        """
+        self._in_flight -= 1
+
+        if throttled:
+            self.throttles += 1
+            self._decrease()
+        elif latency is not None and latency > self.latency_threshold:
+            self.latency_spikes += 1
+            self._decrease()
+        else:
+            self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+
+        self._wake_next()
+
+    def _decrease(self) -> None:
+        self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+
+    @asynccontextmanager
+    async def slot(self, measure_latency: bool = True, acquired: bool = False) -> AsyncIterator[LimiterSlot]:
+        """
+        Hold a slot for the duration of a model call.
+        acquired=True when the caller already took it with try_acquire()
+        """
+        if not acquired:
+            await self.acquire()
+        slot = LimiterSlot()
+        started = time.perf_counter()
+
+        def release(*_: Any) -> None:
+            latency = time.perf_counter() - started if measure_latency else None
+            self.release(throttled=slot.throttled, latency=latency)
+
+        try:
+            yield slot
+        finally:
+            if slot.worker is not None and not slot.worker.done():
+                # Cancelled while the blocking call still runs in its thread,
+                # it keeps counting against the limit until it ends
+                slot.worker.add_done_callback(release)
+            else:
+                release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._waiters),
+            "throttles": self.throttles,
+            "latency_spikes": self.latency_spikes,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts
+        }
+
+# Global limiter in front of every Bedrock invocation
+bedrock_limiter = AdaptiveConcurrencyLimiter(
+    initial_limit=settings.bedrock_limiter_initial_limit,
+    min_limit=settings.bedrock_limiter_min_limit,
+    max_limit=settings.bedrock_max_concurrency,
+    decrease_factor=settings.bedrock_limiter_decrease_factor,
+    latency_threshold=settings.bedrock_limiter_latency_threshold_seconds,
+    queue_timeout=settings.bedrock_limiter_queue_timeout_seconds,
+    max_queue=settings.bedrock_limiter_max_queue
+)
@@ -0,0 +1,87 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from ..models import ChatMessage
+
+# Role markers and separators each message adds on top of its text
+MESSAGE_OVERHEAD_TOKENS = 4
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token estimate (~4 characters per token for Claude)
+    """
+    return (len(text) + 3) // 4 if text else 0
+
+@dataclass
+class PackedContext:
+    """History selected for a request and what was left out"""
+    messages: List[ChatMessage] = field(default_factory=list)
+    packed_tokens: int = 0
+    dropped_tokens: int = 0
+    dropped_messages: int = 0
+
+class ContextPacker:
+    """
+    Selects conversation history by estimated tokens instead of message count.
+
+    History is packed newest first into whatever is left of the input token
+    budget once the reserved tokens (system prompt, current turn and the
+    answer) are taken out. Packing stops at the first message that does
+    not fit, so the packed history is always a contiguous suffix.
+    """
+
+    def __init__(self, token_budget: int):
+        self.token_budget = token_budget
+        self.requests = 0
+        self.packed_tokens = 0
+        self.dropped_tokens = 0
+        self.dropped_messages = 0
+
+    @staticmethod
+    def message_tokens(message: ChatMessage) -> int:
+        return estimate_tokens(message.content) + MESSAGE_OVERHEAD_TOKENS
+
+    def pack(self, history: List[ChatMessage], reserved_tokens: int) -> PackedContext:
+        """
+        Pack as much recent history as fits next to the reserved tokens
+        """
+        packed = PackedContext()
+        available = self.token_budget - reserved_tokens
+        history = history or []
+
+        kept = 0
+        for message in reversed(history):
+            tokens = self.message_tokens(message)
+            if tokens > available:
+                break
+            available -= tokens
+            packed.packed_tokens += tokens
+            kept += 1
+
+        packed.messages = list(history[len(history) - kept:])
+
+        # The Messages API requires the conversation to start with a user turn
+        while packed.messages and packed.messages[0].role != "user":
+            packed.packed_tokens -= self.message_tokens(packed.messages.pop(0))
+
+        dropped = history[:len(history) - len(packed.messages)]
+        packed.dropped_messages = len(dropped)
+        packed.dropped_tokens = sum(self.message_tokens(m) for m in dropped)
+
+        self.requests += 1
+        self.packed_tokens += packed.packed_tokens
+        self.dropped_tokens += packed.dropped_tokens
+        self.dropped_messages += packed.dropped_messages
+        return packed
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self.requests or 1
+        return {
+            "token_budget": self.token_budget,
+            "requests": self.requests,
+            "packed_tokens": self.packed_tokens,
+            "dropped_tokens": self.dropped_tokens,
+            "dropped_messages": self.dropped_messages,
+            "avg_packed_tokens": round(self.packed_tokens / requests, 1),
+            "avg_dropped_tokens": round(self.dropped_tokens / requests, 1)
+        }
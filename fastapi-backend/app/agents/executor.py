@@ -0,0 +1,131 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional
+
+from ..config import settings
+
+class BedrockExecutor:
+    """
+    Bounded thread pool for blocking boto3 calls.
+
+    boto3 is synchronous, so model invocations run here instead of on the
+    event loop. The pool size caps in-flight Bedrock calls per pod.
+
+    A worker thread cannot be interrupted: when its caller is cancelled the
+    call runs on, and it counts as in flight until the thread finishes.
+    Callers that hold a resource for the call get the worker's future
+    through `worker_started` and release it when that future is done.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="bedrock"
+        )
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _start(self, fn: Callable[[], Any], worker_started: Optional[Callable[[asyncio.Future], None]]) -> asyncio.Future:
+        worker = asyncio.get_running_loop().run_in_executor(self._executor, fn)
+        self._in_flight += 1
+        worker.add_done_callback(self._worker_done)
+        if worker_started is not None:
+            worker_started(worker)
+        return worker
+
+    def _worker_done(self, worker: asyncio.Future) -> None:
+        self._in_flight -= 1
+        if worker.cancelled() or worker.exception() is not None:
+            self._failed += 1
+        else:
+            self._completed += 1
+
+    async def run(
+        self,
+        fn: Callable[..., Any],
+        *args,
+        worker_started: Optional[Callable[[asyncio.Future], None]] = None,
+        **kwargs
+    ) -> Any:
+        """
+        Run a blocking function in the pool without blocking the event loop
+        """
+        worker = self._start(functools.partial(fn, *args, **kwargs), worker_started)
+        # Cancelling the caller must not mark a still running thread as done
+        return await asyncio.shield(worker)
+
+    async def stream(
+        self,
+        fn: Callable[..., Iterable[Any]],
+        *args,
+        worker_started: Optional[Callable[[asyncio.Future], None]] = None,
+        **kwargs
+    ) -> AsyncIterator[Any]:
+        """
+        Iterate a blocking iterator in the pool, yielding its items on the event loop.
+        Closing the async generator stops the worker after its current item.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        end = object()
+
+        def publish(item: Any, error: Any = None) -> None:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, (item, error))
+            except RuntimeError:
+                # Event loop already closed
+                stop.set()
+
+        def produce() -> None:
+            iterator = fn(*args, **kwargs)
+            try:
+                for item in iterator:
+                    if stop.is_set():
+                        break
+                    publish(item)
+            except BaseException as e:
+                publish(end, e)
+                raise
+            finally:
+                close = getattr(iterator, "close", None)
+                if close:
+                    close()
+            publish(end)
+
+        worker = self._start(produce, worker_started)
+        try:
+            while True:
+                item, error = await queue.get()
+                if item is end:
+                    if error is not None:
+                        raise error
+                    break
+                yield item
+            # The thread is returning, let it finish so its slot is free when we are done
+            await asyncio.shield(worker)
+        finally:
+            stop.set()
+
+    def shutdown(self) -> None:
+        """Stop accepting work and release the worker threads"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "in_flight": self._in_flight,
+            "completed": self._completed,
+            "failed": self._failed
+        }
+
+# Global executor shared by every agent
+bedrock_executor = BedrockExecutor(max_workers=settings.bedrock_max_concurrency)
@@ -0,0 +1,72 @@
+from typing import Any, Dict
+
+from .latency import LatencyTracker
+
+class HedgingPolicy:
+    """
+    Decides when to send a duplicate (hedge) request for a slow model call.
+
+    The hedge delay is a percentile of the primary's recent latency, so
+    only the slowest calls get hedged. The share of hedged calls is capped
+    by `max_hedge_rate` to keep the extra Bedrock cost bounded.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        percentile: float,
+        min_delay: float,
+        min_samples: int,
+        max_hedge_rate: float
+    ):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.max_hedge_rate = max_hedge_rate
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.budget_exhausted = 0
+        self.no_capacity = 0
+
+    def delay(self, latency: LatencyTracker) -> float:
+        """
+        Seconds to wait for the primary before hedging
+        """
+        if latency.count < self.min_samples:
+            return self.min_delay
+        return max(self.min_delay, latency.percentile(self.percentile) or self.min_delay)
+
+    def start_request(self) -> None:
+        self.requests += 1
+
+    def try_hedge(self) -> bool:
+        """
+        Reserve a hedge if the hedge rate stays within budget
+        """
+        if self.hedges + 1 > self.max_hedge_rate * self.requests:
+            self.budget_exhausted += 1
+            return False
+        self.hedges += 1
+        return True
+
+    def record_no_capacity(self) -> None:
+        self.no_capacity += 1
+
+    def record_win(self, hedge_won: bool) -> None:
+        if hedge_won:
+            self.hedge_wins += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "percentile": self.percentile,
+            "max_hedge_rate": self.max_hedge_rate,
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_rate": round(self.hedges / self.requests, 4) if self.requests else 0.0,
+            "hedge_wins": self.hedge_wins,
+            "budget_exhausted": self.budget_exhausted,
+            "no_capacity": self.no_capacity
+        }
@@ -0,0 +1,39 @@
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+class LatencyTracker:
+    """
+    Rolling window of call latencies (seconds) with percentile lookups
+    """
+
+    def __init__(self, window: int = 500):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        p-th percentile (0-100) of the window, None if there are no samples
+        """
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))
+        return ordered[index]
+
+    def stats(self) -> Dict[str, Any]:
+        def rounded(value: Optional[float]) -> Optional[float]:
+            return round(value, 3) if value is not None else None
+
+        return {
+            "count": self.count,
+            "avg_seconds": rounded(self.total / self.count) if self.count else None,
+            "p50_seconds": rounded(self.percentile(50)),
+            "p95_seconds": rounded(self.percentile(95)),
+            "p99_seconds": rounded(self.percentile(99))
+        }
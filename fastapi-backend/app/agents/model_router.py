@@ -0,0 +1,118 @@
+import re
+from typing import Any, Dict, List, Optional
+
+from .context_packer import estimate_tokens
+from .latency import LatencyTracker
+from ..models import ChatMessage
+
+# Phrasings that ask for reasoning, debugging or design rather than a lookup
+_COMPLEX_PATTERNS = re.compile(
+    r"por qu[eé]|c[oó]mo funciona|diferencia|compar|ventajas|desventajas|arquitectura|"
+    r"dise[nñ]|optimi|debug|depur|traceback|exception|excepci[oó]n|error|falla|no funciona|"
+    r"paso a paso|en detalle|ejemplo de c[oó]digo|c[oó]digo|script|terraform|cloudformation|"
+    r"\bwhy\b|\bhow does\b|\bcompare\b|\bdesign\b",
+    re.IGNORECASE
+)
+
+# Markers of pasted code, logs or stack traces
+_CODE_MARKERS = re.compile(r"```|\bdef |\bimport |\{\s*\"|Traceback|at [\w.]+\(|\w+Exception\b")
+
+class ModelRouter:
+    """
+    Routes each question to a fast or a strong model with a local heuristic.
+
+    Short, self-contained lookups ("¿qué es un embedding?") go to the fast
+    model. Long questions, pasted code or logs, multi-part questions,
+    reasoning/debugging phrasings and deep conversations go to the strong
+    model. Per-model latency, error and fallback counts are tracked so the
+    split can be tuned. Whole-stream durations include generation and client
+    read time, so they are kept apart from the unary latency that sets the
+    hedge delay.
+    """
+
+    def __init__(
+        self,
+        fast_model_id: str,
+        strong_model_id: str,
+        enabled: bool,
+        max_fast_tokens: int
+    ):
+        self.fast_model_id = fast_model_id
+        self.strong_model_id = strong_model_id
+        self.enabled = enabled and fast_model_id != strong_model_id
+        self.max_fast_tokens = max_fast_tokens
+        self._latency: Dict[str, LatencyTracker] = {}
+        self._stream_latency: Dict[str, LatencyTracker] = {}
+        self._routed: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+        self._fallbacks: Dict[str, int] = {}
+
+    def is_simple(self, message: str, history: Optional[List[ChatMessage]] = None) -> bool:
+        """
+        Cheap classification of a question as a short factual lookup
+        """
+        if estimate_tokens(message) > self.max_fast_tokens:
+            return False
+        if message.count("?") > 1:
+            return False
+        if _CODE_MARKERS.search(message) or _COMPLEX_PATTERNS.search(message):
+            return False
+        # Deep conversations tend to be follow-ups on harder problems
+        if history and len(history) > 4:
+            return False
+        return True
+
+    def route(self, message: str, history: Optional[List[ChatMessage]] = None) -> str:
+        """
+        Model ID to use for the question
+        """
+        if self.enabled and self.is_simple(message, history):
+            model_id = self.fast_model_id
+        else:
+            model_id = self.strong_model_id
+        self._routed[model_id] = self._routed.get(model_id, 0) + 1
+        return model_id
+
+    def fallback_for(self, model_id: str) -> Optional[str]:
+        """
+        Model to retry with when `model_id` fails, None if there is none
+        """
+        if self.enabled and model_id == self.fast_model_id:
+            return self.strong_model_id
+        return None
+
+    def record(self, model_id: str, seconds: float) -> None:
+        self._latency.setdefault(model_id, LatencyTracker()).record(seconds)
+
+    def record_stream(self, model_id: str, seconds: float) -> None:
+        self._stream_latency.setdefault(model_id, LatencyTracker()).record(seconds)
+
+    def record_error(self, model_id: str) -> None:
+        self._errors[model_id] = self._errors.get(model_id, 0) + 1
+
+    def record_fallback(self, model_id: str) -> None:
+        self._fallbacks[model_id] = self._fallbacks.get(model_id, 0) + 1
+
+    def latency(self, model_id: str) -> LatencyTracker:
+        return self._latency.setdefault(model_id, LatencyTracker())
+
+    def stats(self) -> Dict[str, Any]:
+        models = {}
+        for model_id in {self.fast_model_id, self.strong_model_id} | set(self._routed):
+            routed = self._routed.get(model_id, 0)
+            fallbacks = self._fallbacks.get(model_id, 0)
+            models[model_id] = {
+                "routed": routed,
+                "errors": self._errors.get(model_id, 0),
+                "fallbacks": fallbacks,
+                "fallback_rate": round(fallbacks / routed, 4) if routed else 0.0,
+                "latency": self.latency(model_id).stats(),
+                "stream_latency": self._stream_latency.setdefault(model_id, LatencyTracker()).stats()
+            }
+        return {
+            "enabled": self.enabled,
+            "fast_model_id": self.fast_model_id,
+            "strong_model_id": self.strong_model_id,
+            "max_fast_tokens": self.max_fast_tokens,
+            "models": models
+        }
@@ -0,0 +1,143 @@
+import threading
+import time
+from typing import Dict, Any, Optional, Type
+
+import boto3
+from botocore.config import Config
+
+from .base_agent import BaseAgent
+from ..config import settings
+from ..services.course_index import course_indexes
+
+class AgentRegistry:
+    """
+    Process-wide registry of agent instances and their Bedrock clients.
+
+    Agents and boto3 clients are built once and shared by every request,
+    so the chat path never pays for client construction, endpoint
+    resolution or a fresh TLS handshake.
+    """
+
+    def __init__(self, agent_classes: Dict[str, Type[BaseAgent]]):
+        self._agent_classes = agent_classes
+        self._agents: Dict[str, BaseAgent] = {}
+        self._clients: Dict[str, Any] = {}
+        self._session: Optional[boto3.session.Session] = None
+        self._lock = threading.Lock()
+        self._created_at: Dict[str, float] = {}
+        self._lookups: Dict[str, int] = {}
+
+    def _client_config(self) -> Config:
+        """Tuned botocore config shared by every Bedrock client"""
+        return Config(
+            max_pool_connections=settings.bedrock_max_pool_connections,
+            connect_timeout=settings.bedrock_connect_timeout,
+            read_timeout=settings.bedrock_read_timeout,
+            retries={
+                "max_attempts": settings.bedrock_max_retries,
+                "mode": "standard"
+            },
+            tcp_keepalive=True
+        )
+
+    def _get_session(self) -> boto3.session.Session:
+        # boto3 sessions are not thread-safe, callers must hold the lock
+        if self._session is None:
+            self._session = boto3.session.Session(
+                aws_access_key_id=settings.aws_access_key_id or None,
+                aws_secret_access_key=settings.aws_secret_access_key or None
+            )
+        return self._session
+
+    def get_bedrock_client(self, region: Optional[str] = None):
+        """
+        Get the shared bedrock-runtime client for a region.
+        Returns None if the client cannot be created.
+        """
+        region = region or settings.bedrock_region
+        client = self._clients.get(region)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._clients.get(region)
+            if client is None:
+                try:
+                    client = self._get_session().client(
+                        'bedrock-runtime',
+                        region_name=region,
+                        config=self._client_config()
+                    )
+                except Exception as e:
+                    print(f"Warning: Could not initialize Bedrock client for {region}: {e}")
+                    return None
+                self._clients[region] = client
+            return client
+
+    def _get_or_create_agent(self, course_id: str) -> BaseAgent:
+        agent = self._agents.get(course_id)
+        if agent is None:
+            agent_class = self._agent_classes.get(course_id)
+            if not agent_class:
+                raise ValueError(f"No agent found for course: {course_id}")
+
+            client = self.get_bedrock_client()
+            hedge_client = None
+            if settings.bedrock_hedging_enabled:
+                hedge_client = self.get_bedrock_client(settings.bedrock_hedge_region)
+            with self._lock:
+                agent = self._agents.get(course_id)
+                if agent is None:
+                    agent = agent_class(bedrock_client=client, hedge_client=hedge_client)
+                    agent.course_index = course_indexes.get(course_id)
+                    self._agents[course_id] = agent
+                    self._created_at[course_id] = time.time()
+        return agent
+
+    def get_agent(self, course_id: str) -> BaseAgent:
+        """
+        Get the shared agent instance for a course, building it on first use
+        """
+        agent = self._get_or_create_agent(course_id)
+        self._lookups[course_id] = self._lookups.get(course_id, 0) + 1
+        return agent
+
+    def warm_up(self) -> None:
+        """
+        Build every registered agent and its client ahead of the first request
+        """
+        for course_id in self._agent_classes:
+            try:
+                self._get_or_create_agent(course_id)
+            except Exception as e:
+                print(f"Warning: Could not warm up agent '{course_id}': {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Connection pool and agent statistics
+        """
+        return {
+            "pool": {
+                "max_pool_connections": settings.bedrock_max_pool_connections,
+                "connect_timeout": settings.bedrock_connect_timeout,
+                "read_timeout": settings.bedrock_read_timeout,
+                "max_retries": settings.bedrock_max_retries,
+                "clients": sorted(self._clients.keys())
+            },
+            "agents": {
+                course_id: {
+                    "class": type(agent).__name__,
+                    "model_id": agent.model_id,
+                    "client_ready": getattr(agent, "bedrock_client", None) is not None,
+                    "created_at": self._created_at.get(course_id),
+                    "lookups": self._lookups.get(course_id, 0),
+                    "usage": agent.usage.stats() if hasattr(agent, "usage") else None,
+                    "context": agent.context_packer.stats(),
+                    "routing": agent.model_router.stats() if hasattr(agent, "model_router") else None,
+                    "hedging": agent.hedging.stats() if hasattr(agent, "hedging") else None,
+                    "cancellations": agent.cancellations.stats() if hasattr(agent, "cancellations") else None,
+                    "retrieval": agent.course_index.stats() if agent.course_index is not None else None
+                }
+                for course_id, agent in self._agents.items()
+            }
+        }
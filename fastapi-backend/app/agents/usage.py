@@ -0,0 +1,73 @@
+from typing import Any, Dict, Optional
+
+class TokenUsageStats:
+    """
+    Aggregated Bedrock token usage for one agent, including prompt caching
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cache_read_input_tokens = 0
+        self.cache_write_input_tokens = 0
+        self.last_request: Optional[Dict[str, int]] = None
+
+    def record(self, usage: Dict[str, Any]) -> Dict[str, int]:
+        """
+        Record the `usage` block of a Bedrock response and return the per-request summary
+        """
+        summary = {
+            "input_tokens": int(usage.get("input_tokens", 0) or 0),
+            "output_tokens": int(usage.get("output_tokens", 0) or 0),
+            "cache_read_input_tokens": int(usage.get("cache_read_input_tokens", 0) or 0),
+            "cache_write_input_tokens": int(usage.get("cache_creation_input_tokens", 0) or 0)
+        }
+        # Tokens read from the prompt cache skip prefill and are billed at a discount
+        summary["saved_input_tokens"] = summary["cache_read_input_tokens"]
+
+        self.requests += 1
+        self.input_tokens += summary["input_tokens"]
+        self.output_tokens += summary["output_tokens"]
+        self.cache_read_input_tokens += summary["cache_read_input_tokens"]
+        self.cache_write_input_tokens += summary["cache_write_input_tokens"]
+        self.last_request = summary
+        return summary
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self.requests or 1
+        total_input = self.input_tokens + self.cache_read_input_tokens + self.cache_write_input_tokens
+        return {
+            "requests": self.requests,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cache_read_input_tokens": self.cache_read_input_tokens,
+            "cache_write_input_tokens": self.cache_write_input_tokens,
+            "avg_saved_input_tokens_per_request": round(self.cache_read_input_tokens / requests, 1),
+            "cached_input_ratio": round(self.cache_read_input_tokens / total_input, 4) if total_input else 0.0,
+            "last_request": self.last_request
+        }
+
+class CancellationStats:
+    """
+    Model calls abandoned because the client went away, and the tokens
+    that were not generated as a result (an estimate)
+    """
+
+    def __init__(self):
+        self.cancelled: Dict[str, int] = {}
+        self.saved_input_tokens = 0
+        self.saved_output_tokens = 0
+
+    def record(self, stage: str, saved_input_tokens: int, saved_output_tokens: int) -> None:
+        self.cancelled[stage] = self.cancelled.get(stage, 0) + 1
+        self.saved_input_tokens += saved_input_tokens
+        self.saved_output_tokens += saved_output_tokens
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cancelled": dict(self.cancelled),
+            "total": sum(self.cancelled.values()),
+            "saved_input_tokens": self.saved_input_tokens,
+            "saved_output_tokens": self.saved_output_tokens
+        }
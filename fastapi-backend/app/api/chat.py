@@ -1,46 +1,113 @@
+import asyncio
+import json
+import time
 from datetime import datetime
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import AsyncIterator, Awaitable, List, TypeVar
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import Response, StreamingResponse
 
-from ..auth import get_current_user
-from ..models import ChatRequest, ChatResponse, ErrorResponse, UserInfo
-from ..agents import get_agent
+from ..auth import get_current_user, jwks_manager, token_cache
+from ..models import (
+    BatchChatItemResult,
+    BatchChatRequest,
+    BatchChatResponse,
+    ChatJob,
+    ChatRequest,
+    ChatResponse,
+    ErrorResponse,
+    StepPrefetchRequest,
+    UserInfo
+)
+from ..agents import AgentError, BaseAgent, get_agent, agent_registry, bedrock_executor, bedrock_limiter
 from ..config import settings
+from ..metrics import CLIENT_DISCONNECTS
+from ..services import CachedBody, chat_jobs, chat_service, course_catalog, course_indexes, intro_prefetcher
 
 router = APIRouter(prefix="/api/bedrock", tags=["chat"])
 
+T = TypeVar("T")
+
+def _get_course_agent(course_id: str) -> BaseAgent:
+    """
+    Validate the course ID and get its agent
+    """
+    if course_id not in settings.supported_courses:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Course '{course_id}' is not supported. Supported courses: {settings.supported_courses}"
+        )
+    
+    try:
+        return get_agent(course_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+async def _wait_for_disconnect(http_request: Request) -> None:
+    """
+    Return once the client has closed the connection
+    """
+    # The body was already read, so the next ASGI message is the disconnect
+    while True:
+        message = await http_request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+async def _cancel_on_disconnect(http_request: Request, route: str, work: Awaitable[T]) -> T:
+    """
+    Await work, cancelling it (and the model call behind it) if the client
+    disconnects first. Raises a 499 HTTPException nobody will read.
+    """
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(_wait_for_disconnect(http_request))
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    finally:
+        watcher.cancel()
+
+    if task.done():
+        return task.result()
+
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    CLIENT_DISCONNECTS.labels(route=route).inc()
+    raise HTTPException(status_code=499, detail="Client closed request")
+
+def _sse_event(data: dict) -> str:
+    """
+    Format a Server-Sent Events message
+    """
+    return f"data: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(
     request: ChatRequest,
+    http_request: Request,
     current_user: UserInfo = Depends(get_current_user)
 ):
     """
     Main chat endpoint for course-specific AI assistance
     """
     try:
-        # Validate course ID
-        if request.courseId not in settings.supported_courses:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Course '{request.courseId}' is not supported. Supported courses: {settings.supported_courses}"
-            )
+        # Validate course and get the appropriate agent
+        agent = _get_course_agent(request.courseId)
         
-        # Get the appropriate agent for the course
-        try:
-            agent = get_agent(request.courseId)
-        except ValueError as e:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=str(e)
-            )
+        # Load the server-side session, if any
+        request = await chat_service.resolve_session(request, current_user)
         
-        # Process the message with the agent
-        response_message = await agent.process_message(
-            message=request.message,
-            user_info=current_user,
-            step_id=request.stepId,
-            history=request.history,
-            context=request.context
+        # Process the message with the agent, giving up if the client leaves
+        response_message = await _cancel_on_disconnect(
+            http_request,
+            "/chat",
+            chat_service.answer(agent, request, current_user)
         )
         
         return ChatResponse(
@@ -49,7 +116,8 @@ async def chat_endpoint(
             timestamp=datetime.utcnow(),
             user_id=current_user.user_id,
             course_id=request.courseId,
-            step_id=request.stepId
+            step_id=request.stepId,
+            session_id=request.sessionId
         )
         
     except HTTPException:
@@ -64,6 +132,270 @@ async def chat_endpoint(
             detail="An unexpected error occurred while processing your request"
         )
 
+@router.post("/chat/stream")
+async def chat_stream_endpoint(
+    request: ChatRequest,
+    current_user: UserInfo = Depends(get_current_user)
+):
+    """
+    Streaming chat endpoint, sends the answer as Server-Sent Events
+    """
+    agent = _get_course_agent(request.courseId)
+    request = await chat_service.resolve_session(request, current_user)
+    
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            async for text in chat_service.stream(agent, request, current_user):
+                yield _sse_event({"type": "token", "text": text})
+            
+            yield _sse_event({
+                "type": "done",
+                "timestamp": datetime.utcnow().isoformat(),
+                "user_id": current_user.user_id,
+                "course_id": request.courseId,
+                "step_id": request.stepId,
+                "session_id": request.sessionId
+            })
+        except (asyncio.CancelledError, GeneratorExit):
+            # Client went away, unwinding closes the model stream
+            CLIENT_DISCONNECTS.labels(route="/chat/stream").inc()
+            raise
+        except Exception as e:
+            print(f"Unexpected error in chat stream: {e}")
+            yield _sse_event({
+                "type": "error",
+                "detail": "An unexpected error occurred while processing your request"
+            })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+async def _run_batch_item(
+    index: int,
+    item: ChatRequest,
+    current_user: UserInfo,
+    semaphore: asyncio.Semaphore
+) -> BatchChatItemResult:
+    """
+    Answer one batch item, turning failures into a per-item error
+    """
+    result = BatchChatItemResult(index=index, success=False, course_id=item.courseId, step_id=item.stepId)
+    
+    async with semaphore:
+        try:
+            agent = _get_course_agent(item.courseId)
+            result.message = await chat_service.run(agent, item, current_user, request_class="batch")
+            result.success = True
+        except HTTPException as e:
+            result.error = str(e.detail)
+        except AgentError as e:
+            result.error = e.message
+        except Exception as e:
+            print(f"Unexpected error in batch item {index}: {e}")
+            result.error = "An unexpected error occurred while processing this item"
+    
+    return result
+
+@router.post("/chat/batch")
+async def chat_batch_endpoint(
+    request: BatchChatRequest,
+    http_request: Request,
+    ndjson: bool = Query(default=False, description="Stream results as NDJSON in completion order"),
+    current_user: UserInfo = Depends(get_current_user)
+):
+    """
+    Answer a batch of chat requests concurrently, under a per-batch concurrency cap.
+    Items are independent questions, so they cannot take part in a session
+    """
+    with_session = [index for index, item in enumerate(request.items) if item.sessionId]
+    if with_session:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch items cannot use sessionId (items {with_session}), send the conversation as history"
+        )
+    
+    concurrency = min(request.concurrency or settings.batch_default_concurrency, settings.batch_max_concurrency)
+    if settings.fair_scheduler_enabled:
+        # Every item runs as the same user, more would only queue behind the user's own cap
+        concurrency = min(concurrency, settings.fair_scheduler_max_in_flight_per_user)
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    tasks = [
+        asyncio.create_task(_run_batch_item(index, item, current_user, semaphore))
+        for index, item in enumerate(request.items)
+    ]
+    
+    if not ndjson:
+        try:
+            results = await _cancel_on_disconnect(http_request, "/chat/batch", asyncio.gather(*tasks))
+        except HTTPException:
+            for task in tasks:
+                task.cancel()
+            raise
+        succeeded = sum(1 for result in results if result.success)
+        return BatchChatResponse(
+            success=succeeded == len(results),
+            total=len(results),
+            succeeded=succeeded,
+            failed=len(results) - succeeded,
+            results=results,
+            timestamp=datetime.utcnow()
+        )
+    
+    async def result_stream() -> AsyncIterator[str]:
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                result = await next_result
+                yield result.model_dump_json() + "\n"
+        except (asyncio.CancelledError, GeneratorExit):
+            CLIENT_DISCONNECTS.labels(route="/chat/batch").inc()
+            raise
+        finally:
+            # Client went away, stop the remaining items
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+
+async def _get_job(job_id: str, current_user: UserInfo) -> ChatJob:
+    job = await chat_jobs.get(job_id, current_user)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Chat job '{job_id}' not found or expired"
+        )
+    return job
+
+@router.post("/chat/jobs", response_model=ChatJob, status_code=status.HTTP_202_ACCEPTED)
+async def create_chat_job(
+    request: ChatRequest,
+    response: Response,
+    current_user: UserInfo = Depends(get_current_user)
+):
+    """
+    Queue a chat request and return its job right away, the answer is
+    fetched with GET /chat/jobs/{job_id} or its /events stream
+    """
+    if not settings.chat_jobs_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat jobs are disabled")
+    
+    agent = _get_course_agent(request.courseId)
+    request = await chat_service.resolve_session(request, current_user)
+    
+    try:
+        job = await chat_jobs.submit(agent, request, current_user)
+    except AgentError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=e.message,
+            headers={"Retry-After": "5"}
+        )
+    
+    response.headers["Location"] = f"{router.prefix}/chat/jobs/{job.job_id}"
+    return job
+
+@router.get("/chat/jobs/{job_id}", response_model=ChatJob)
+async def get_chat_job(
+    job_id: str,
+    response: Response,
+    wait: float = Query(default=0, ge=0, le=25, description="Seconds to wait for the job to finish (long polling)"),
+    current_user: UserInfo = Depends(get_current_user)
+):
+    """
+    Current state of a chat job, with the answer once it succeeded
+    """
+    job = await _get_job(job_id, current_user)
+    if wait and not job.finished:
+        job = await chat_jobs.wait(job_id, current_user, wait) or job
+    
+    if not job.finished:
+        response.headers["Retry-After"] = str(max(1, round(settings.chat_jobs_poll_interval_seconds)))
+    return job
+
+@router.get("/chat/jobs/{job_id}/events")
+async def chat_job_events(
+    job_id: str,
+    current_user: UserInfo = Depends(get_current_user)
+):
+    """
+    Server-Sent Events for a chat job: its status changes, then a final
+    "done" event with the answer or the error
+    """
+    job = await _get_job(job_id, current_user)
+    
+    async def event_stream() -> AsyncIterator[str]:
+        current = job
+        deadline = time.monotonic() + settings.chat_jobs_stream_timeout_seconds
+        yield _sse_event({"type": "status", "status": current.status, "job_id": job_id})
+        
+        while not current.finished:
+            if time.monotonic() >= deadline:
+                yield _sse_event({"type": "timeout", "status": current.status, "job_id": job_id})
+                return
+            previous = current.status
+            current = await chat_jobs.wait(job_id, current_user, settings.chat_jobs_poll_interval_seconds)
+            if current is None:
+                yield _sse_event({"type": "error", "error": "Chat job expired", "job_id": job_id})
+                return
+            if current.status != previous:
+                yield _sse_event({"type": "status", "status": current.status, "job_id": job_id})
+            else:
+                # Keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+        
+        yield _sse_event({"type": "done", **current.model_dump(mode="json")})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+@router.post("/chat/prefetch", status_code=status.HTTP_202_ACCEPTED)
+async def prefetch_step_intro(
+    request: StepPrefetchRequest,
+    current_user: UserInfo = Depends(get_current_user)
+):
+    """
+    Called by the frontend when a step opens: the step's introduction is
+    generated in the background so the first question about it is cached.
+    Only steps of the course's material index can be prefetched, so no one
+    can start a generation per made-up step
+    """
+    agent = _get_course_agent(request.courseId)
+    if not settings.step_intro_enabled:
+        return {"success": True, "status": "disabled"}
+    
+    index = course_indexes.get(request.courseId)
+    if index is None or request.stepId not in index.step_ids:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Step {request.stepId} not found in course '{request.courseId}'"
+        )
+    
+    outcome = intro_prefetcher.prefetch(agent, request.courseId, request.stepId)
+    return {"success": True, "status": outcome, "course_id": request.courseId, "step_id": request.stepId}
+
+@router.delete("/chat/sessions/{session_id}")
+async def delete_chat_session(
+    session_id: str,
+    current_user: UserInfo = Depends(get_current_user)
+):
+    """
+    Forget a server-side chat session
+    """
+    await chat_service.end_session(session_id, current_user)
+    return {"success": True, "session_id": session_id}
+
 @router.get("/health")
 async def health_check():
     """
@@ -73,42 +405,72 @@ async def health_check():
         "status": "healthy",
         "timestamp": datetime.utcnow(),
         "service": "bedrock-chat-api",
-        "version": settings.app_version
+        "version": settings.app_version,
+        "circuit_breaker": chat_service.breaker.stats()
     }
 
-@router.get("/courses")
-async def get_supported_courses():
+@router.get("/stats")
+async def get_stats(current_user: UserInfo = Depends(get_current_user)):
     """
-    Get list of supported courses
+    Agent registry and Bedrock connection pool statistics, for signed-in users only
     """
     return {
-        "courses": settings.supported_courses,
-        "total": len(settings.supported_courses)
+        "timestamp": datetime.utcnow(),
+        **agent_registry.stats(),
+        "executor": bedrock_executor.stats(),
+        "limiter": bedrock_limiter.stats(),
+        **chat_service.stats(),
+        "jobs": chat_jobs.stats(),
+        "step_intro_prefetch": intro_prefetcher.stats(),
+        "auth": {
+            "token_cache": token_cache.stats(),
+            "jwks": jwks_manager.stats()
+        },
+        "catalog": course_catalog.stats()
     }
 
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    If-None-Match uses the weak comparison, so W/ prefixes are ignored
+    """
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+
+def _cached_json_response(request: Request, cached: CachedBody) -> Response:
+    """
+    Serve a pre-serialized body with its ETag, or 304 if the client has it
+    """
+    headers = {
+        "ETag": cached.etag,
+        "Cache-Control": (
+            f"public, max-age={settings.catalog_cache_max_age_seconds}, "
+            f"stale-while-revalidate={settings.catalog_stale_while_revalidate_seconds}"
+        )
+    }
+    if _etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+@router.get("/courses")
+async def get_supported_courses(request: Request):
+    """
+    Get list of supported courses
+    """
+    return _cached_json_response(request, course_catalog.snapshot.listing)
+
 @router.get("/courses/{course_id}/info")
-async def get_course_info(course_id: str):
+async def get_course_info(course_id: str, request: Request):
     """
     Get information about a specific course
     """
-    if course_id not in settings.supported_courses:
+    cached = course_catalog.snapshot.get_info(course_id)
+    if cached is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Course '{course_id}' not found"
         )
-    
-    # Course metadata - this could be moved to a database later
-    course_info = {
-        "bedrock-rag": {
-            "name": "RAG con Amazon Bedrock",
-            "description": "Aprende a construir chatbots inteligentes con RAG y Amazon Bedrock",
-            "steps": 7,
-            "duration": "4-6 horas",
-            "difficulty": "Intermedio"
-        }
-        # Add other courses here
-    }
-    
-    return course_info.get(course_id, {"name": course_id, "description": "Curso disponible"})
+    return _cached_json_response(request, cached)
 
 # Error handlers moved to main.py
\ No newline at end of file
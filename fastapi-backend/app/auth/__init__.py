@@ -1,3 +1,13 @@
-from .cognito_auth import get_current_user, get_current_user_optional, verify_cognito_jwt
+from .cognito_auth import get_current_user, get_current_user_optional, verify_cognito_jwt, token_cache
+from .jwks import JWKSManager, jwks_manager
+from .token_cache import VerifiedTokenCache
 
-__all__ = ["get_current_user", "get_current_user_optional", "verify_cognito_jwt"]
\ No newline at end of file
+__all__ = [
+    "get_current_user",
+    "get_current_user_optional",
+    "verify_cognito_jwt",
+    "token_cache",
+    "JWKSManager",
+    "jwks_manager",
+    "VerifiedTokenCache"
+]
\ No newline at end of file
@@ -1,36 +1,28 @@
+import time
 import jwt
-import json
-import requests
-from functools import lru_cache
 from typing import Dict, Any
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer
 
+from .jwks import jwks_manager
+from .token_cache import VerifiedTokenCache
 from ..config import settings
+from ..metrics import AUTH_DURATION
 from ..models import UserInfo
 
 security = HTTPBearer()
 
-@lru_cache()
-def get_cognito_public_keys() -> Dict[str, Any]:
-    """
-    Fetch and cache Cognito public keys for JWT verification
-    """
-    try:
-        url = f'https://cognito-idp.{settings.cognito_region}.amazonaws.com/{settings.cognito_user_pool_id}/.well-known/jwks.json'
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=f"Unable to fetch Cognito public keys: {str(e)}"
-        )
+# Verified claims of recently seen tokens
+token_cache = VerifiedTokenCache(max_entries=settings.auth_token_cache_max_entries)
 
 def verify_cognito_jwt(token: str) -> Dict[str, Any]:
     """
     Verify and decode Cognito JWT token
     """
+    cached_payload = token_cache.get(token)
+    if cached_payload is not None:
+        return cached_payload
+    
     try:
         # Get token header without verification
         unverified_header = jwt.get_unverified_header(token)
@@ -42,14 +34,14 @@ def verify_cognito_jwt(token: str) -> Dict[str, Any]:
                 detail="Token missing key ID"
             )
         
-        # Find the correct public key
-        keys = get_cognito_public_keys()['keys']
-        public_key = None
+        if not jwks_manager.has_keys:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Unable to fetch Cognito public keys"
+            )
         
-        for key in keys:
-            if key['kid'] == kid:
-                public_key = jwt.algorithms.RSAAlgorithm.from_jwk(json.dumps(key))
-                break
+        # Find the correct public key
+        public_key = jwks_manager.get_key(kid)
         
         if not public_key:
             raise HTTPException(
@@ -72,6 +64,7 @@ def verify_cognito_jwt(token: str) -> Dict[str, Any]:
             }
         )
         
+        token_cache.put(token, payload)
         return payload
         
     except jwt.ExpiredSignatureError:
@@ -89,6 +82,8 @@ def verify_cognito_jwt(token: str) -> Dict[str, Any]:
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token issuer"
         )
+    except HTTPException:
+        raise
     except jwt.InvalidTokenError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -100,11 +95,32 @@ def verify_cognito_jwt(token: str) -> Dict[str, Any]:
             detail=f"Token verification error: {str(e)}"
         )
 
+async def ensure_signing_key(token: str) -> None:
+    """
+    Refetch the JWKS when the token is signed with a key we do not know yet,
+    e.g. after a Cognito key rotation
+    """
+    try:
+        kid = jwt.get_unverified_header(token).get('kid')
+    except jwt.InvalidTokenError:
+        # Malformed token, verify_cognito_jwt reports the error
+        return
+    
+    if kid and not jwks_manager.get_key(kid):
+        await jwks_manager.refetch_for_kid(kid)
+
 async def get_current_user(token: str = Depends(security)) -> UserInfo:
     """
     FastAPI dependency to get current authenticated user
     """
-    payload = verify_cognito_jwt(token.credentials)
+    started = time.perf_counter()
+    try:
+        await ensure_signing_key(token.credentials)
+        payload = verify_cognito_jwt(token.credentials)
+    except HTTPException:
+        AUTH_DURATION.labels(result="rejected").observe(time.perf_counter() - started)
+        raise
+    AUTH_DURATION.labels(result="ok").observe(time.perf_counter() - started)
     
     return UserInfo(
         user_id=payload['sub'],
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+
+import jwt
+import requests
+
+from ..config import settings
+
+class JWKSManager:
+    """
+    Keeps the Cognito signing keys in memory, indexed by key ID.
+
+    Keys are loaded from the on-disk copy at startup when one survived the
+    previous process (a new pod starts without it), fetched without
+    blocking the event loop, refreshed periodically in the background and
+    refetched (rate-limited) when a token arrives with an unknown kid.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        cache_path: str,
+        refresh_interval: int,
+        min_refetch_interval: int,
+        timeout: int
+    ):
+        self.url = url
+        self.cache_path = cache_path
+        self.refresh_interval = refresh_interval
+        self.min_refetch_interval = min_refetch_interval
+        self.timeout = timeout
+        self._keys: Dict[str, Any] = {}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.last_refresh: Optional[float] = None
+        self.last_refetch_attempt = 0.0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.kid_miss_refetches = 0
+
+    @property
+    def has_keys(self) -> bool:
+        return bool(self._keys)
+
+    def get_key(self, kid: str) -> Optional[Any]:
+        return self._keys.get(kid)
+
+    def _load_jwks(self, jwks: Dict[str, Any]) -> None:
+        # Build the new index first so readers never see a partial set
+        self._keys = {
+            key['kid']: jwt.algorithms.RSAAlgorithm.from_jwk(json.dumps(key))
+            for key in jwks['keys']
+        }
+
+    def load_from_disk(self) -> bool:
+        """
+        Load the last known keys persisted by a previous process
+        """
+        try:
+            with open(self.cache_path) as f:
+                self._load_jwks(json.load(f))
+            return True
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            print(f"Warning: Could not load cached JWKS from {self.cache_path}: {e}")
+            return False
+
+    def _persist(self, jwks: Dict[str, Any]) -> None:
+        try:
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(jwks, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"Warning: Could not persist JWKS to {self.cache_path}: {e}")
+
+    def _fetch(self) -> Dict[str, Any]:
+        response = requests.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    async def refresh(self) -> bool:
+        """
+        Fetch the JWKS off the event loop and swap in the new keys
+        """
+        async with self._lock:
+            try:
+                jwks = await asyncio.to_thread(self._fetch)
+                self._load_jwks(jwks)
+            except Exception as e:
+                self.refresh_failures += 1
+                print(f"Warning: Unable to fetch Cognito public keys: {e}")
+                return False
+
+            self.refreshes += 1
+            self.last_refresh = time.time()
+            await asyncio.to_thread(self._persist, jwks)
+            return True
+
+    async def refetch_for_kid(self, kid: str) -> Optional[Any]:
+        """
+        Refetch the JWKS for an unknown kid, at most once per min_refetch_interval
+        """
+        if kid in self._keys:
+            return self._keys[kid]
+
+        if self._lock.locked():
+            # A refresh is already running, wait for it instead of starting another
+            async with self._lock:
+                return self._keys.get(kid)
+
+        now = time.time()
+        if now - self.last_refetch_attempt < self.min_refetch_interval:
+            return None
+        self.last_refetch_attempt = now
+        self.kid_miss_refetches += 1
+
+        await self.refresh()
+        return self._keys.get(kid)
+
+    async def _refresh_loop(self, refresh_now: bool) -> None:
+        if refresh_now:
+            await self.refresh()
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh()
+
+    async def start(self) -> None:
+        """
+        Load keys at startup and start the background refresh task
+        """
+        # With persisted keys we can serve right away and refresh in the background
+        loaded = self.load_from_disk()
+        if not loaded:
+            await self.refresh()
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop(refresh_now=loaded))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "keys": sorted(self._keys.keys()),
+            "last_refresh": self.last_refresh,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "kid_miss_refetches": self.kid_miss_refetches
+        }
+
+# Global JWKS manager for the configured user pool
+jwks_manager = JWKSManager(
+    url=f'https://cognito-idp.{settings.cognito_region}.amazonaws.com/{settings.cognito_user_pool_id}/.well-known/jwks.json',
+    cache_path=settings.cognito_jwks_cache_path,
+    refresh_interval=settings.cognito_jwks_refresh_interval_seconds,
+    min_refetch_interval=settings.cognito_jwks_min_refetch_seconds,
+    timeout=settings.cognito_jwks_timeout
+)
@@ -1,5 +1,5 @@
 import os
-from typing import List
+from typing import Dict, List
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -22,10 +22,194 @@ class Settings(BaseSettings):
     cognito_client_id: str = "7ho22jco9j63c3hmsrsp4bj0ti"
     cognito_issuer: str = f"https://cognito-idp.us-east-1.amazonaws.com/us-east-1_kbBZ0w9sf"
     
+    # Cognito JWKS refresh. The last keys are copied to disk, which only skips the
+    # startup fetch when the file outlives the process (the k8s emptyDir survives
+    # container restarts within a pod); a new pod always fetches from Cognito
+    cognito_jwks_cache_path: str = "/tmp/cognito-jwks.json"
+    cognito_jwks_refresh_interval_seconds: int = 3600
+    cognito_jwks_min_refetch_seconds: int = 30
+    cognito_jwks_timeout: int = 10
+    
+    # Verified JWT claims cache (entries expire at the token's exp)
+    auth_token_cache_max_entries: int = 10000
+    
     # AWS Bedrock settings
     bedrock_region: str = "us-east-1"
     bedrock_model_id: str = "anthropic.claude-3-sonnet-20240229-v1:0"
     
+    bedrock_max_output_tokens: int = 1000
+    # Make non-streaming calls over the streaming API so a client disconnect stops generation
+    bedrock_cancellable_calls: bool = True
+    
+    # Route short factual questions to a fast model, the rest to bedrock_model_id
+    bedrock_routing_enabled: bool = True
+    bedrock_fast_model_id: str = "anthropic.claude-3-haiku-20240307-v1:0"
+    bedrock_routing_max_fast_tokens: int = 40
+    
+    # Input token budget per request: system prompt + history + current turn + answer
+    context_token_budget: int = 6000
+    
+    # Hedged requests: duplicate slow calls to a secondary region or inference profile
+    bedrock_hedging_enabled: bool = False
+    bedrock_hedge_region: str = "us-west-2"
+    # Per-model hedge target (e.g. a cross-region inference profile), the routed model otherwise
+    bedrock_hedge_model_ids: Dict[str, str] = {}
+    bedrock_hedge_percentile: float = 95.0
+    bedrock_hedge_min_delay_seconds: float = 2.0
+    bedrock_hedge_min_samples: int = 20
+    bedrock_hedge_max_rate: float = 0.1
+    
+    # Mark the system prompt as a prompt cache prefix (needs a model with prompt caching support).
+    # Claude only caches prefixes of at least 1024 tokens (2048 for Haiku); shorter
+    # prompts are sent unmarked. The current course prompts are ~350 tokens, so
+    # this has no effect until a large stable prefix moves into the system prompt
+    bedrock_prompt_caching_enabled: bool = False
+    bedrock_prompt_cache_min_tokens: int = 1024
+    
+    # Bedrock HTTP connection pool (shared by all agents)
+    bedrock_max_pool_connections: int = 50
+    bedrock_connect_timeout: int = 5
+    bedrock_read_timeout: int = 60
+    bedrock_max_retries: int = 3
+    
+    # Max concurrent blocking Bedrock calls per pod (worker threads)
+    bedrock_max_concurrency: int = 16
+    
+    # Adaptive (AIMD) concurrency limit in front of Bedrock, capped by bedrock_max_concurrency
+    bedrock_limiter_initial_limit: int = 8
+    bedrock_limiter_min_limit: int = 1
+    bedrock_limiter_decrease_factor: float = 0.5
+    bedrock_limiter_latency_threshold_seconds: float = 20.0
+    bedrock_limiter_queue_timeout_seconds: float = 10.0
+    bedrock_limiter_max_queue: int = 100
+    
+    # Weighted fair queuing of model work across users and courses, in front of
+    # the limiter. Capacity follows the adaptive limit; weights default to 1.0
+    fair_scheduler_enabled: bool = True
+    fair_scheduler_max_in_flight_per_user: int = 3
+    fair_scheduler_max_in_flight_per_course: int = 12
+    fair_scheduler_max_queue_per_user: int = 10
+    fair_scheduler_queue_timeout_seconds: float = 20.0
+    fair_scheduler_course_weights: Dict[str, float] = {}
+    # Interactive chat gets four times the share of batch items
+    fair_scheduler_class_weights: Dict[str, float] = {"interactive": 4.0, "batch": 1.0, "prefetch": 0.5}
+    # Per-class queue deadline, fair_scheduler_queue_timeout_seconds otherwise. The
+    # low-weight classes are served after interactive traffic, so they may wait longer
+    fair_scheduler_class_queue_timeouts: Dict[str, float] = {"batch": 60.0, "prefetch": 60.0}
+    
+    # Semantic answer cache
+    semantic_cache_enabled: bool = True
+    semantic_cache_max_entries: int = 2000
+    semantic_cache_ttl_seconds: int = 3600
+    semantic_cache_similarity_threshold: float = 0.85
+    embedding_dimensions: int = 256
+    
+    # Course material retrieval (index built offline by scripts/build_course_index.py)
+    course_index_enabled: bool = True
+    course_data_dir: str = "data/courses"
+    course_index_dir: str = "data/index"
+    course_index_dimensions: int = 1024
+    course_index_top_k: int = 3
+    course_index_min_score: float = 0.25
+    course_index_step_boost: float = 0.1
+    
+    # Canonical per-step answers (generated by scripts/build_faq_answers.py),
+    # served without calling the model when the question matches closely
+    faq_enabled: bool = True
+    faq_dir: str = "data/faq"
+    faq_match_threshold: float = 0.75
+    faq_min_margin: float = 0.05
+    
+    # Step introductions: when a step opens the frontend asks for a prefetch and
+    # the answer to step_intro_question is generated into the answer cache.
+    # Questions close to any of the phrasings are answered from it.
+    step_intro_enabled: bool = True
+    step_intro_question: str = "Explícame este paso del curso"
+    step_intro_phrasings: List[str] = [
+        "Explícame este paso",
+        "Explica este paso del curso",
+        "¿De qué trata este paso?",
+        "¿Qué tengo que hacer en este paso?",
+        "¿Qué se hace en este paso?",
+        "Resume este paso"
+    ]
+    step_intro_match_threshold: float = 0.8
+    step_intro_max_pending: int = 20
+    
+    # Local relevance pre-filter (models built at startup from data/relevance):
+    # clearly off-topic first questions (follow-ups are not checked) get
+    # relevance_reject_message instead of a model call in "enforce" mode, and are
+    # only counted in "shadow" mode. Enforce once /stats shows the held-out
+    # precision and the shadow counts on real traffic are good enough
+    relevance_filter_enabled: bool = True
+    relevance_filter_mode: str = "shadow"
+    relevance_dir: str = "data/relevance"
+    relevance_threshold: float = 0.3
+    relevance_min_terms: int = 2
+    relevance_reject_message: str = (
+        "Solo puedo ayudarte con preguntas sobre este curso. "
+        "Si tienes una duda sobre el paso en el que estás, pregúntame y te ayudo."
+    )
+    
+    # Share one model call between identical concurrent chat requests
+    chat_coalescing_enabled: bool = True
+    
+    # Batch chat: default and maximum concurrent items per batch. Items run as one
+    # user, so with the fair scheduler both are capped at its per-user in-flight limit
+    batch_default_concurrency: int = 3
+    batch_max_concurrency: int = 3
+    
+    # Circuit breaker around the model call
+    circuit_window_size: int = 20
+    circuit_min_calls: int = 10
+    circuit_failure_rate_threshold: float = 0.5
+    circuit_slow_call_seconds: float = 30.0
+    circuit_slow_call_rate_threshold: float = 0.5
+    circuit_open_seconds: float = 30.0
+    circuit_half_open_max_calls: int = 3
+    # Looser similarity for cached answers served while the circuit is open
+    circuit_fallback_similarity_threshold: float = 0.6
+    
+    # Server-side chat sessions ("memory" or "redis"). Memory sessions live in one
+    # pod, so deployments with more than one replica need redis
+    chat_sessions_enabled: bool = True
+    session_store_backend: str = "memory"
+    session_redis_url: str = "redis://localhost:6379/0"
+    session_max_sessions: int = 10000
+    session_max_messages: int = 20
+    session_ttl_seconds: int = 7200
+    
+    # Asynchronous chat jobs (POST /chat/jobs): a bounded worker pool answers
+    # them and results are kept for polling ("memory" or "redis" store). Memory jobs
+    # live in the pod that accepted them, so deployments with more than one replica need redis
+    chat_jobs_enabled: bool = True
+    chat_jobs_workers: int = 8
+    chat_jobs_max_queue: int = 200
+    chat_jobs_store_backend: str = "memory"
+    chat_jobs_redis_url: str = "redis://localhost:6379/0"
+    chat_jobs_max_jobs: int = 5000
+    chat_jobs_ttl_seconds: int = 900
+    # Waits on jobs running in another pod (long polls, SSE) check the store at this
+    # interval; SSE subscriptions give up after the timeout
+    chat_jobs_poll_interval_seconds: float = 1.0
+    chat_jobs_stream_timeout_seconds: float = 300.0
+    
+    # Application database (courses table), the catalog uses built-in defaults when db_host is empty
+    db_host: str = ""
+    db_port: int = 5432
+    db_name: str = "cloudacademy"
+    db_user: str = "postgres"
+    db_password: str = ""
+    db_pool_max_size: int = 2
+    db_command_timeout: int = 10
+    
+    # Course catalog snapshot and HTTP caching of /courses
+    catalog_refresh_interval_seconds: int = 60
+    catalog_cache_max_age_seconds: int = 60
+    catalog_stale_while_revalidate_seconds: int = 300
+    # Database course id -> chat course id
+    catalog_course_aliases: Dict[str, str] = {"rag-amazon-bedrock": "bedrock-rag"}
+    
     # AWS Credentials (preferiblemente desde IAM roles en K8s)
     aws_access_key_id: str = ""
     aws_secret_access_key: str = ""
@@ -0,0 +1,6 @@
+from .connection import DatabaseConnection, db
+
+__all__ = [
+    "DatabaseConnection",
+    "db"
+]
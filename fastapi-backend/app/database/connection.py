@@ -0,0 +1,55 @@
+import asyncpg
+from typing import Optional, Dict, Any, List
+
+from ..config import settings
+
+class DatabaseConnection:
+    """
+    Read-only access to the application database (courses)
+    """
+    
+    def __init__(self):
+        self.pool: Optional[asyncpg.Pool] = None
+    
+    @property
+    def configured(self) -> bool:
+        return bool(settings.db_host)
+    
+    async def connect(self) -> bool:
+        """Establish database connection pool"""
+        try:
+            self.pool = await asyncpg.create_pool(
+                host=settings.db_host,
+                port=settings.db_port,
+                user=settings.db_user,
+                password=settings.db_password,
+                database=settings.db_name,
+                min_size=1,
+                max_size=settings.db_pool_max_size,
+                timeout=settings.db_command_timeout,
+                command_timeout=settings.db_command_timeout
+            )
+            print("✅ Database connection pool created")
+            return True
+        except Exception as e:
+            print(f"❌ Failed to create database pool: {e}")
+            return False
+    
+    async def disconnect(self):
+        """Close database connection pool"""
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+            print("🔌 Database connection pool closed")
+    
+    async def execute_query(self, query: str, *args) -> List[Dict[str, Any]]:
+        """Execute a SELECT query and return results"""
+        if not self.pool and not await self.connect():
+            raise ConnectionError("Database is not available")
+        
+        async with self.pool.acquire() as connection:
+            rows = await connection.fetch(query, *args)
+            return [dict(row) for row in rows]
+
+# Global database instance
+db = DatabaseConnection()
@@ -6,6 +6,26 @@ import uvicorn
 
 from .config import settings
 from .api import chat_router
+from .agents import agent_registry, bedrock_executor, bedrock_limiter
+from .auth import jwks_manager
+from .services import (
+    chat_jobs,
+    chat_service,
+    course_catalog,
+    course_indexes,
+    faq_index,
+    intro_prefetcher,
+    relevance_filter
+)
+from .database import db
+from .metrics import (
+    BEDROCK_CONCURRENCY_LIMIT,
+    BEDROCK_IN_FLIGHT,
+    BEDROCK_QUEUE_DEPTH,
+    CHAT_JOBS_QUEUE_DEPTH,
+    PrometheusMiddleware,
+    metrics_response
+)
 from .models import ErrorResponse
 
 # Create FastAPI app
@@ -22,10 +42,19 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
     allow_credentials=True,
-    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_methods=["GET", "POST", "DELETE", "OPTIONS"],
     allow_headers=["Authorization", "Content-Type"],
 )
 
+# Request latency histograms for /metrics
+app.add_middleware(PrometheusMiddleware)
+
+# Limiter state is read when Prometheus scrapes
+BEDROCK_IN_FLIGHT.set_function(lambda: bedrock_limiter.in_flight)
+BEDROCK_CONCURRENCY_LIMIT.set_function(lambda: bedrock_limiter.limit)
+BEDROCK_QUEUE_DEPTH.set_function(lambda: bedrock_limiter.queue_depth)
+CHAT_JOBS_QUEUE_DEPTH.set_function(lambda: chat_jobs.queue_depth)
+
 # Include routers
 app.include_router(chat_router)
 
@@ -70,9 +99,18 @@ async def health():
     return {
         "status": "healthy",
         "timestamp": datetime.utcnow(),
-        "version": settings.app_version
+        "version": settings.app_version,
+        "circuit_breaker": chat_service.breaker.state
     }
 
+# Prometheus metrics endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus scrape endpoint
+    """
+    return metrics_response()
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
@@ -83,6 +121,35 @@ async def startup_event():
     print(f"📚 Supported courses: {', '.join(settings.supported_courses)}")
     print(f"🔐 CORS origins: {', '.join(settings.cors_origins)}")
     print(f"🌐 Debug mode: {settings.debug}")
+    
+    # Load Cognito signing keys and keep them fresh in the background
+    await jwks_manager.start()
+    print(f"🔑 Cognito keys loaded: {len(jwks_manager.stats()['keys'])}")
+    
+    # Course catalog snapshot, refreshed from the database in the background
+    await course_catalog.start()
+    print(f"🗂️ Course catalog: {course_catalog.stats()['courses']} courses from {course_catalog.snapshot.source}")
+    
+    # Memory-map the prebuilt course indexes, agents pick them up when built
+    loaded_indexes = course_indexes.load_all()
+    print(f"📖 Course indexes: {', '.join(loaded_indexes) or 'none'}")
+    
+    # Precomputed answers to the most common questions of each step
+    loaded_faqs = faq_index.load_all()
+    print(f"❓ FAQ answers: {', '.join(loaded_faqs) or 'none'}")
+    
+    # Off-topic classifiers built from each course's material
+    loaded_relevance = relevance_filter.load_all()
+    print(f"🎯 Relevance filters: {', '.join(loaded_relevance) or 'none'} ({settings.relevance_filter_mode})")
+    
+    # Build agents and Bedrock clients before the first request
+    agent_registry.warm_up()
+    print(f"🤖 Agents ready: {', '.join(agent_registry.stats()['agents'].keys())}")
+    
+    # Workers answering asynchronous chat jobs
+    if settings.chat_jobs_enabled:
+        await chat_jobs.start()
+        print(f"📬 Chat job workers: {settings.chat_jobs_workers}")
 
 # Shutdown event
 @app.on_event("shutdown")
@@ -91,6 +158,12 @@ async def shutdown_event():
     Application shutdown tasks
     """
     print(f"🛑 Shutting down {settings.app_name}")
+    await jwks_manager.stop()
+    await chat_jobs.stop()
+    await intro_prefetcher.stop()
+    await course_catalog.stop()
+    await db.disconnect()
+    bedrock_executor.shutdown()
 
 if __name__ == "__main__":
     uvicorn.run(
@@ -0,0 +1,47 @@
+from .prometheus import (
+    HTTP_REQUEST_DURATION,
+    BEDROCK_CALL_DURATION,
+    BEDROCK_TOKENS,
+    BEDROCK_IN_FLIGHT,
+    BEDROCK_CONCURRENCY_LIMIT,
+    BEDROCK_QUEUE_DEPTH,
+    BEDROCK_QUEUE_WAIT,
+    SCHEDULER_QUEUE_DEPTH,
+    SCHEDULER_QUEUE_WAIT,
+    SEMANTIC_CACHE_LOOKUPS,
+    CHAT_ANSWERS,
+    RELEVANCE_DECISIONS,
+    CHAT_JOBS,
+    CHAT_JOBS_QUEUE_DEPTH,
+    MODEL_CALLS_CANCELLED,
+    BEDROCK_TOKENS_SAVED,
+    CLIENT_DISCONNECTS,
+    AUTH_DURATION,
+    PrometheusMiddleware,
+    metrics_response,
+    record_token_usage
+)
+
+__all__ = [
+    "HTTP_REQUEST_DURATION",
+    "BEDROCK_CALL_DURATION",
+    "BEDROCK_TOKENS",
+    "BEDROCK_IN_FLIGHT",
+    "BEDROCK_CONCURRENCY_LIMIT",
+    "BEDROCK_QUEUE_DEPTH",
+    "BEDROCK_QUEUE_WAIT",
+    "SCHEDULER_QUEUE_DEPTH",
+    "SCHEDULER_QUEUE_WAIT",
+    "SEMANTIC_CACHE_LOOKUPS",
+    "CHAT_ANSWERS",
+    "RELEVANCE_DECISIONS",
+    "CHAT_JOBS",
+    "CHAT_JOBS_QUEUE_DEPTH",
+    "MODEL_CALLS_CANCELLED",
+    "BEDROCK_TOKENS_SAVED",
+    "CLIENT_DISCONNECTS",
+    "AUTH_DURATION",
+    "PrometheusMiddleware",
+    "metrics_response",
+    "record_token_usage"
+]
@@ -0,0 +1,168 @@
+import time
+from typing import Any, Dict
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from starlette.responses import Response
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template, streamed responses until the last chunk",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+)
+
+BEDROCK_CALL_DURATION = Histogram(
+    "bedrock_call_duration_seconds",
+    "Bedrock model call latency",
+    ["model", "mode", "outcome"],
+    buckets=(0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 45, 60, 90)
+)
+
+BEDROCK_TOKENS = Counter(
+    "bedrock_tokens_total",
+    "Tokens billed by Bedrock",
+    ["model", "type"]
+)
+
+BEDROCK_IN_FLIGHT = Gauge(
+    "bedrock_in_flight_calls",
+    "Bedrock calls currently holding a concurrency slot"
+)
+
+BEDROCK_CONCURRENCY_LIMIT = Gauge(
+    "bedrock_concurrency_limit",
+    "Current adaptive concurrency limit in front of Bedrock"
+)
+
+BEDROCK_QUEUE_DEPTH = Gauge(
+    "bedrock_limiter_queue_depth",
+    "Requests waiting for a Bedrock concurrency slot"
+)
+
+BEDROCK_QUEUE_WAIT = Histogram(
+    "bedrock_limiter_queue_wait_seconds",
+    "Time spent waiting for a Bedrock concurrency slot, zero when one was free",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10)
+)
+
+SCHEDULER_QUEUE_DEPTH = Gauge(
+    "fair_scheduler_queue_depth",
+    "Chat requests waiting in the fair scheduler for model capacity"
+)
+
+SCHEDULER_QUEUE_WAIT = Histogram(
+    "fair_scheduler_queue_wait_seconds",
+    "Time a chat request waited in the fair scheduler, zero when capacity was free",
+    ["request_class"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20)
+)
+
+SEMANTIC_CACHE_LOOKUPS = Counter(
+    "semantic_cache_lookups_total",
+    "Semantic answer cache lookups",
+    ["result"]
+)
+
+CHAT_ANSWERS = Counter(
+    "chat_answers_total",
+    "Chat answers by where they came from (model, faq, cache, circuit_fallback)",
+    ["source"]
+)
+
+RELEVANCE_DECISIONS = Counter(
+    "relevance_filter_decisions_total",
+    "Questions checked by the local relevance pre-filter, by decision",
+    ["course", "decision"]
+)
+
+CHAT_JOBS = Counter(
+    "chat_jobs_total",
+    "Asynchronous chat jobs by status (queued, succeeded, failed, rejected)",
+    ["status"]
+)
+
+CHAT_JOBS_QUEUE_DEPTH = Gauge(
+    "chat_jobs_queue_depth",
+    "Chat jobs waiting for a worker"
+)
+
+MODEL_CALLS_CANCELLED = Counter(
+    "bedrock_calls_cancelled_total",
+    "Model calls abandoned after the client disconnected, by how far they got",
+    ["model", "stage"]
+)
+
+BEDROCK_TOKENS_SAVED = Counter(
+    "bedrock_tokens_saved_total",
+    "Estimated tokens not generated thanks to cancelled model calls",
+    ["model", "type"]
+)
+
+CLIENT_DISCONNECTS = Counter(
+    "client_disconnects_total",
+    "Requests whose client disconnected before the answer was ready",
+    ["route"]
+)
+
+AUTH_DURATION = Histogram(
+    "auth_duration_seconds",
+    "Time to authenticate a request (JWT verification, key refetch)",
+    ["result"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+)
+
+# Usage fields of a Bedrock response -> bedrock_tokens_total type label
+TOKEN_TYPES = {
+    "input_tokens": "input",
+    "output_tokens": "output",
+    "cache_read_input_tokens": "cache_read",
+    "cache_creation_input_tokens": "cache_write"
+}
+
+def record_token_usage(model_id: str, usage: Dict[str, Any]) -> None:
+    for field, token_type in TOKEN_TYPES.items():
+        count = usage.get(field)
+        if count:
+            BEDROCK_TOKENS.labels(model=model_id, type=token_type).inc(count)
+
+class PrometheusMiddleware:
+    """
+    ASGI middleware timing every HTTP request by its route template.
+    Plain ASGI rather than BaseHTTPMiddleware so streamed responses are
+    timed to the end and not buffered.
+    """
+
+    def __init__(self, app, exclude_paths=("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # FastAPI stores the matched route in the scope, unmatched paths share one label
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status_code)
+            ).observe(time.perf_counter() - started)
+
+def metrics_response() -> Response:
+    """
+    Current metrics in the Prometheus text format
+    """
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -1,15 +1,25 @@
 from .chat_models import (
+    BatchChatItemResult,
+    BatchChatRequest,
+    BatchChatResponse,
+    ChatJob,
     ChatMessage,
     ChatRequest,
     ChatResponse,
     ErrorResponse,
+    StepPrefetchRequest,
     UserInfo
 )
 
 __all__ = [
+    "BatchChatItemResult",
+    "BatchChatRequest",
+    "BatchChatResponse",
+    "ChatJob",
     "ChatMessage",
     "ChatRequest", 
     "ChatResponse",
     "ErrorResponse",
+    "StepPrefetchRequest",
     "UserInfo"
 ]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
 from datetime import datetime
 
@@ -15,6 +15,14 @@ class ChatRequest(BaseModel):
     stepId: Optional[int] = Field(default=0, alias="stepId")
     context: Optional[str] = None
     history: List[ChatMessage] = Field(default_factory=list, max_items=10)
+    # Server-side session, when set the stored turns replace `history`
+    sessionId: Optional[str] = Field(default=None, alias="sessionId", max_length=64)
+
+class StepPrefetchRequest(BaseModel):
+    """Step the student just opened, its introduction is generated ahead of time"""
+    courseId: str = Field(..., alias="courseId")
+    # Must be a step of the course's material index
+    stepId: int = Field(default=0, alias="stepId", ge=0)
 
 class ChatResponse(BaseModel):
     """Chat response payload"""
@@ -24,6 +32,48 @@ class ChatResponse(BaseModel):
     user_id: Optional[str] = None
     course_id: Optional[str] = None
     step_id: Optional[int] = None
+    session_id: Optional[str] = None
+
+class BatchChatRequest(BaseModel):
+    """Batch of chat requests answered concurrently"""
+    items: List[ChatRequest] = Field(..., min_length=1, max_length=200)
+    concurrency: Optional[int] = Field(default=None, ge=1)
+
+class BatchChatItemResult(BaseModel):
+    """Result of one item of a batch, in request order by `index`"""
+    index: int
+    success: bool
+    message: Optional[str] = None
+    error: Optional[str] = None
+    course_id: Optional[str] = None
+    step_id: Optional[int] = None
+
+class BatchChatResponse(BaseModel):
+    """Batch chat response payload"""
+    success: bool
+    total: int
+    succeeded: int
+    failed: int
+    results: List[BatchChatItemResult]
+    timestamp: datetime
+
+class ChatJob(BaseModel):
+    """Chat request answered in the background, polled until it finishes"""
+    job_id: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    user_id: str
+    course_id: str
+    step_id: Optional[int] = None
+    session_id: Optional[str] = None
+    message: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("succeeded", "failed")
 
 class ErrorResponse(BaseModel):
     """Error response payload"""
@@ -0,0 +1,61 @@
+from .semantic_cache import SemanticAnswerCache, answer_cache
+from .single_flight import SingleFlight, chat_fingerprint
+from .circuit_breaker import CircuitBreaker
+from .session_store import (
+    SessionStore,
+    InMemorySessionStore,
+    RedisSessionStore,
+    create_session_store,
+    session_store
+)
+from .course_index import CourseIndex, CourseIndexRegistry, CourseSnippet, course_indexes
+from .faq_index import CourseFAQ, FAQIndex, FAQMatch, faq_index
+from .course_catalog import CachedBody, CatalogSnapshot, CourseCatalog, course_catalog
+from .relevance import CourseRelevanceModel, RelevanceFilter, relevance_filter
+from .fair_scheduler import FairScheduler, fair_scheduler
+from .chat_service import ChatService, chat_service
+from .step_intros import StepIntroMatcher, step_intro_matcher
+from .intro_prefetch import StepIntroPrefetcher, intro_prefetcher
+from .chat_jobs import ChatJobRunner, InMemoryJobStore, JobStore, RedisJobStore, chat_jobs, create_job_store
+
+__all__ = [
+    "SemanticAnswerCache",
+    "answer_cache",
+    "SingleFlight",
+    "chat_fingerprint",
+    "CircuitBreaker",
+    "SessionStore",
+    "InMemorySessionStore",
+    "RedisSessionStore",
+    "create_session_store",
+    "session_store",
+    "CourseIndex",
+    "CourseIndexRegistry",
+    "CourseSnippet",
+    "course_indexes",
+    "CourseFAQ",
+    "FAQIndex",
+    "FAQMatch",
+    "faq_index",
+    "CachedBody",
+    "CatalogSnapshot",
+    "CourseCatalog",
+    "course_catalog",
+    "CourseRelevanceModel",
+    "RelevanceFilter",
+    "relevance_filter",
+    "FairScheduler",
+    "fair_scheduler",
+    "ChatService",
+    "chat_service",
+    "JobStore",
+    "InMemoryJobStore",
+    "RedisJobStore",
+    "create_job_store",
+    "ChatJobRunner",
+    "chat_jobs",
+    "StepIntroMatcher",
+    "step_intro_matcher",
+    "StepIntroPrefetcher",
+    "intro_prefetcher"
+]
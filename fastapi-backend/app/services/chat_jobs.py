@@ -0,0 +1,276 @@
+import asyncio
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from .chat_service import ChatService, chat_service
+from ..agents import AgentError, BaseAgent
+from ..config import settings
+from ..metrics import CHAT_JOBS
+from ..models import ChatJob, ChatRequest, UserInfo
+
+class JobStore(ABC):
+    """
+    Storage for chat job state and results, kept for a limited time
+    """
+
+    @abstractmethod
+    async def put(self, job: ChatJob) -> None:
+        """Store the job's current state, restarting its TTL"""
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[ChatJob]:
+        """The job, or None if it does not exist or expired"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__}
+
+class InMemoryJobStore(JobStore):
+    """
+    Per-pod job store with TTL, oldest jobs are evicted first.
+    Clients must reach the pod that accepted the job, so it only fits a
+    single replica; the k8s deployment uses RedisJobStore.
+    """
+
+    def __init__(self, max_jobs: int, ttl_seconds: int):
+        self.max_jobs = max_jobs
+        self.ttl_seconds = ttl_seconds
+        self._jobs: "OrderedDict[str, Tuple[ChatJob, float]]" = OrderedDict()
+        self.evictions = 0
+
+    async def put(self, job: ChatJob) -> None:
+        self._jobs[job.job_id] = (job, time.time() + self.ttl_seconds)
+        self._jobs.move_to_end(job.job_id)
+
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+            self.evictions += 1
+
+    async def get(self, job_id: str) -> Optional[ChatJob]:
+        entry = self._jobs.get(job_id)
+        if entry is None:
+            return None
+
+        job, expires_at = entry
+        if expires_at <= time.time():
+            del self._jobs[job_id]
+            return None
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "jobs": len(self._jobs),
+            "max_jobs": self.max_jobs,
+            "evictions": self.evictions
+        }
+
+class RedisJobStore(JobStore):
+    """
+    Job store shared by all pods, so any pod can answer a poll.
+    Requires the optional `redis` package.
+    """
+
+    KEY_PREFIX = "chat-job:"
+
+    def __init__(self, url: str, ttl_seconds: int):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url, decode_responses=True)
+        self.ttl_seconds = ttl_seconds
+
+    async def put(self, job: ChatJob) -> None:
+        await self._redis.set(self.KEY_PREFIX + job.job_id, job.model_dump_json(), ex=self.ttl_seconds)
+
+    async def get(self, job_id: str) -> Optional[ChatJob]:
+        data = await self._redis.get(self.KEY_PREFIX + job_id)
+        if data is None:
+            return None
+        return ChatJob.model_validate_json(data)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis"}
+
+def create_job_store() -> JobStore:
+    """
+    Build the configured job store, falling back to memory if Redis is unavailable
+    """
+    if settings.chat_jobs_store_backend == "redis":
+        try:
+            return RedisJobStore(url=settings.chat_jobs_redis_url, ttl_seconds=settings.chat_jobs_ttl_seconds)
+        except ImportError:
+            print("Warning: redis package not installed, using in-memory chat jobs")
+
+    return InMemoryJobStore(max_jobs=settings.chat_jobs_max_jobs, ttl_seconds=settings.chat_jobs_ttl_seconds)
+
+class ChatJobRunner:
+    """
+    Answers chat jobs in the background with a fixed pool of worker tasks,
+    so the HTTP request that submits a job returns right away and long
+    answers never run into ingress or proxy timeouts. Jobs beyond the
+    queue size are rejected rather than piling up.
+    """
+
+    def __init__(self, service: ChatService, store: JobStore, workers: int, max_queue: int, poll_interval: float):
+        self.service = service
+        self.store = store
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._queue: "asyncio.Queue[Tuple[ChatJob, BaseAgent, ChatRequest, UserInfo]]" = asyncio.Queue(max_queue)
+        self._tasks: List[asyncio.Task] = []
+        # Jobs running in this pod, set when they finish so waiters wake up at once
+        self._finished: Dict[str, asyncio.Event] = {}
+        self._busy = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.succeeded = 0
+        self.failed = 0
+        self._total_seconds = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    async def submit(self, agent: BaseAgent, request: ChatRequest, user_info: UserInfo) -> ChatJob:
+        """
+        Queue a chat request, raising AgentError if the queue is full
+        """
+        if self._queue.full():
+            self.rejected += 1
+            CHAT_JOBS.labels(status="rejected").inc()
+            raise AgentError(
+                "El asistente está recibiendo muchas consultas. Por favor, intenta nuevamente en unos segundos.",
+                "JobQueueFull"
+            )
+
+        job = ChatJob(
+            job_id=uuid.uuid4().hex,
+            status="queued",
+            user_id=user_info.user_id,
+            course_id=request.courseId,
+            step_id=request.stepId,
+            session_id=request.sessionId,
+            created_at=datetime.utcnow()
+        )
+        await self.store.put(job)
+        self._finished[job.job_id] = asyncio.Event()
+        self._queue.put_nowait((job, agent, request, user_info))
+        self.submitted += 1
+        CHAT_JOBS.labels(status="queued").inc()
+        return job
+
+    async def get(self, job_id: str, user_info: UserInfo) -> Optional[ChatJob]:
+        """
+        The job, None if it does not exist, expired or belongs to someone else
+        """
+        job = await self.store.get(job_id)
+        if job is None or job.user_id != user_info.user_id:
+            return None
+        return job
+
+    async def wait(self, job_id: str, user_info: UserInfo, timeout: float) -> Optional[ChatJob]:
+        """
+        The job once it finishes, or its current state after the timeout
+        """
+        finished = self._finished.get(job_id)
+        if finished is not None:
+            try:
+                await asyncio.wait_for(finished.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            return await self.get(job_id, user_info)
+
+        # Running in another pod (or already done), poll the store until it finishes
+        deadline = time.monotonic() + timeout
+        while True:
+            job = await self.get(job_id, user_info)
+            remaining = deadline - time.monotonic()
+            if job is None or job.finished or remaining <= 0:
+                return job
+            await asyncio.sleep(min(self.poll_interval, remaining))
+
+    async def _finish(self, job: ChatJob, started: float, **update: Any) -> None:
+        job = job.model_copy(update={**update, "finished_at": datetime.utcnow()})
+        await self.store.put(job)
+        if job.status == "succeeded":
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        self._total_seconds += time.perf_counter() - started
+        CHAT_JOBS.labels(status=job.status).inc()
+
+        finished = self._finished.pop(job.job_id, None)
+        if finished is not None:
+            finished.set()
+
+    async def _run(self, job: ChatJob, agent: BaseAgent, request: ChatRequest, user_info: UserInfo) -> None:
+        started = time.perf_counter()
+        job = job.model_copy(update={"status": "running", "started_at": datetime.utcnow()})
+        await self.store.put(job)
+
+        try:
+            answer = await self.service.run(agent, request, user_info)
+        except AgentError as e:
+            await self._finish(job, started, status="failed", error=e.message)
+        except asyncio.CancelledError:
+            await self._finish(job, started, status="failed", error="El servidor se reinició. Por favor, envía la consulta nuevamente.")
+            raise
+        except Exception as e:
+            print(f"Unexpected error in chat job {job.job_id}: {e}")
+            await self._finish(job, started, status="failed", error="An unexpected error occurred while processing your request")
+        else:
+            await self._finish(job, started, status="succeeded", message=answer)
+
+    async def _worker(self) -> None:
+        while True:
+            job, agent, request, user_info = await self._queue.get()
+            self._busy += 1
+            try:
+                await self._run(job, agent, request, user_info)
+            finally:
+                self._busy -= 1
+                self._queue.task_done()
+
+    async def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """
+        Stop the workers, jobs that did not finish are marked as failed
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        while not self._queue.empty():
+            job, *_ = self._queue.get_nowait()
+            await self._finish(job, time.perf_counter(), status="failed", error="El servidor se reinició. Por favor, envía la consulta nuevamente.")
+
+    def stats(self) -> Dict[str, Any]:
+        finished = self.succeeded + self.failed
+        return {
+            "workers": len(self._tasks),
+            "busy_workers": self._busy,
+            "queue_depth": self.queue_depth,
+            "max_queue": self._queue.maxsize,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "avg_job_seconds": round(self._total_seconds / finished, 3) if finished else None,
+            "store": self.store.stats()
+        }
+
+# Global job runner, workers are started with the app
+chat_jobs = ChatJobRunner(
+    service=chat_service,
+    store=create_job_store(),
+    workers=settings.chat_jobs_workers,
+    max_queue=settings.chat_jobs_max_queue,
+    poll_interval=settings.chat_jobs_poll_interval_seconds
+)
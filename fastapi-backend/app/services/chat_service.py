@@ -0,0 +1,462 @@
+import asyncio
+import time
+import uuid
+from contextlib import AsyncExitStack, aclosing, nullcontext
+from datetime import datetime
+from typing import Any, AsyncContextManager, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from .circuit_breaker import OPEN, CircuitBreaker
+from .fair_scheduler import FairScheduler, fair_scheduler
+from .faq_index import FAQIndex, faq_index
+from .semantic_cache import SemanticAnswerCache, answer_cache
+from .session_store import SessionStore, session_store
+from .relevance import RelevanceFilter, relevance_filter
+from .single_flight import SingleFlight, chat_fingerprint
+from .step_intros import StepIntroMatcher, step_intro_matcher
+from ..agents import AgentError, BaseAgent
+from ..config import settings
+from ..metrics import CHAT_ANSWERS, SEMANTIC_CACHE_LOOKUPS
+from ..models import ChatMessage, ChatRequest, UserInfo
+
+class ChatService:
+    """
+    Runs a chat turn against a course agent, with the answer cache in front
+    and a student's identical in-flight requests coalesced into one model call.
+    Conversation turns are kept in a server-side session store.
+    A circuit breaker answers from the fallback store while the model is degraded.
+    Questions matching a precomputed FAQ answer never reach the model.
+    Requests that do need the model wait their turn in the fair scheduler.
+    "Explain this step" questions share one cached answer per step, which
+    can be generated ahead of time with prefetch(). Clearly off-topic
+    first questions are turned away by a local relevance filter.
+    """
+
+    # Agent errors that say nothing about the model's health
+    NON_FAILURE_ERROR_CODES = {"EmptyResponse"}
+
+    def __init__(
+        self,
+        cache: SemanticAnswerCache,
+        sessions: SessionStore,
+        breaker: CircuitBreaker,
+        faq: FAQIndex,
+        scheduler: FairScheduler,
+        intros: StepIntroMatcher,
+        relevance: RelevanceFilter
+    ):
+        self.cache = cache
+        self.sessions = sessions
+        self.breaker = breaker
+        self.faq = faq
+        self.scheduler = scheduler
+        self.intros = intros
+        self.relevance = relevance
+        self.single_flight = SingleFlight()
+        self.fallbacks = 0
+        self.fallback_hits = 0
+        self.requests = 0
+        # Requests answered without any model call, by source
+        self.model_skips = {"faq": 0, "cache": 0, "circuit_fallback": 0, "off_topic": 0}
+
+    def _is_cacheable(self, request: ChatRequest) -> bool:
+        # Answers that depend on the conversation so far are never shared
+        return settings.semantic_cache_enabled and not request.history
+
+    def _is_step_intro(self, request: ChatRequest) -> bool:
+        return settings.step_intro_enabled and self.intros.matches(request.message, request.stepId)
+
+    @staticmethod
+    def _intro_request(request: ChatRequest) -> ChatRequest:
+        # Introductions are shared by every student and prefetched without the
+        # free-form context, so it is left out of their prompt and cache key
+        return request.model_copy(update={"context": None})
+
+    def _cache_message(self, request: ChatRequest, intro: bool) -> str:
+        # Every phrasing of "explain this step" is cached under one question
+        return self.intros.question if intro else request.message
+
+    @staticmethod
+    def _session_key(user_info: UserInfo, session_id: str) -> str:
+        # Sessions are scoped to their owner
+        return f"{user_info.user_id}:{session_id}"
+
+    async def resolve_session(self, request: ChatRequest, user_info: UserInfo) -> ChatRequest:
+        """
+        Load the stored turns of the request's session as its history,
+        or start a new session, seeded with the client's history, when
+        there are none stored
+        """
+        if not settings.chat_sessions_enabled:
+            return request
+
+        if not request.sessionId:
+            request = request.model_copy(update={"sessionId": uuid.uuid4().hex})
+            stored = None
+        else:
+            stored = await self.sessions.get_messages(self._session_key(user_info, request.sessionId))
+
+        if not stored:
+            # New, unknown or expired session: start it from whatever history the client sent
+            if request.history:
+                await self.sessions.append_messages(self._session_key(user_info, request.sessionId), request.history)
+            return request
+        return request.model_copy(update={"history": stored})
+
+    async def _save_turn(self, request: ChatRequest, user_info: UserInfo, answer: str) -> None:
+        if not settings.chat_sessions_enabled or not request.sessionId:
+            return
+
+        now = datetime.utcnow()
+        await self.sessions.append_messages(
+            self._session_key(user_info, request.sessionId),
+            [
+                ChatMessage(role="user", content=request.message, timestamp=now),
+                ChatMessage(role="assistant", content=answer, timestamp=now)
+            ]
+        )
+
+    async def end_session(self, session_id: str, user_info: UserInfo) -> None:
+        await self.sessions.delete(self._session_key(user_info, session_id))
+
+    def _local_answer(self, request: ChatRequest, cacheable: bool, intro: bool) -> Optional[str]:
+        """
+        Precomputed FAQ answer, cached answer or off-topic notice for the request, if any
+        """
+        self.requests += 1
+        if request.history and not intro:
+            return None
+
+        if settings.faq_enabled and not request.history:
+            match = self.faq.match(request.courseId, request.stepId, request.message)
+            if match is not None:
+                self.model_skips["faq"] += 1
+                CHAT_ANSWERS.labels(source="faq").inc()
+                return match.answer
+
+        # A step introduction does not depend on the conversation so far
+        if cacheable or (intro and settings.semantic_cache_enabled):
+            message = self._cache_message(request, intro)
+            cached = self.cache.get(request.courseId, request.stepId, message, request.context)
+            SEMANTIC_CACHE_LOOKUPS.labels(result="miss" if cached is None else "hit").inc()
+            if cached is not None:
+                self.model_skips["cache"] += 1
+                CHAT_ANSWERS.labels(source="cache").inc()
+                return cached
+        return self._off_topic_answer(request)
+
+    def _off_topic_answer(self, request: ChatRequest) -> Optional[str]:
+        # Checked last, so every rejection is a model call avoided. Follow-ups
+        # ("¿y eso cuánto cuesta?") lean on the conversation rather than on
+        # course terms, so only first questions are checked
+        if not settings.relevance_filter_enabled or request.history:
+            return None
+        if self.relevance.check(request.courseId, request.message):
+            return None
+        self.model_skips["off_topic"] += 1
+        CHAT_ANSWERS.labels(source="off_topic").inc()
+        return settings.relevance_reject_message
+
+    def _model_slot(self, request: ChatRequest, user_info: UserInfo, request_class: str) -> AsyncContextManager:
+        if not settings.fair_scheduler_enabled:
+            return nullcontext()
+        return self.scheduler.slot(user_info.user_id, request.courseId, request_class)
+
+    async def _enter_model_slot(
+        self,
+        stack: AsyncExitStack,
+        request: ChatRequest,
+        user_info: UserInfo,
+        request_class: str,
+        permit: int
+    ) -> bool:
+        """
+        Hold a scheduler slot on stack for a call the breaker allowed, False
+        if the circuit opened while the request was queued
+        """
+        try:
+            await stack.enter_async_context(self._model_slot(request, user_info, request_class))
+        except BaseException:
+            # Rejected or cancelled in the queue, the call never reached the model
+            self.breaker.record_cancelled(permit)
+            raise
+        return self.breaker.state != OPEN
+
+    def _fallback_answer(self, request: ChatRequest) -> str:
+        """
+        Best stored answer while the circuit is open, AgentError if there is none
+        """
+        self.fallbacks += 1
+        cached = self.cache.get(
+            request.courseId,
+            request.stepId,
+            request.message,
+            request.context,
+            similarity_threshold=settings.circuit_fallback_similarity_threshold
+        )
+        if cached is not None:
+            self.fallback_hits += 1
+            self.model_skips["circuit_fallback"] += 1
+            CHAT_ANSWERS.labels(source="circuit_fallback").inc()
+            return cached
+
+        raise AgentError(
+            "El asistente no está disponible en este momento. Por favor, intenta nuevamente en unos minutos.",
+            "CircuitOpen"
+        )
+
+    def _fallback_message(self, request: ChatRequest) -> str:
+        try:
+            return self._fallback_answer(request)
+        except AgentError as e:
+            return e.message
+
+    def _record_outcome(self, permit: int, started: float, error: Exception = None) -> None:
+        failed = error is not None and not (
+            isinstance(error, AgentError) and error.error_code in self.NON_FAILURE_ERROR_CODES
+        )
+        self.breaker.record(permit, failed=failed, seconds=time.perf_counter() - started)
+
+    async def _model_answer(
+        self,
+        agent: BaseAgent,
+        request: ChatRequest,
+        user_info: UserInfo,
+        request_class: str,
+        cache_message: Optional[str]
+    ) -> str:
+        """
+        Ask the model, storing the answer under cache_message unless it is None
+        """
+        # Checked before queueing: during an outage the scheduler's capacity
+        # collapses with the limiter's, and the fallback must not wait for it
+        permit = self.breaker.allow_request()
+        if permit is None:
+            return self._fallback_answer(request)
+
+        async with AsyncExitStack() as stack:
+            if not await self._enter_model_slot(stack, request, user_info, request_class, permit):
+                return self._fallback_answer(request)
+
+            started = time.perf_counter()
+            try:
+                answer = await agent.process_message(
+                    message=request.message,
+                    user_info=user_info,
+                    step_id=request.stepId,
+                    history=request.history,
+                    context=request.context
+                )
+            except asyncio.CancelledError:
+                self.breaker.record_cancelled(permit)
+                raise
+            except Exception as e:
+                self._record_outcome(permit, started, e)
+                raise
+            self._record_outcome(permit, started)
+        CHAT_ANSWERS.labels(source="model").inc()
+
+        if cache_message is not None:
+            self.cache.put(request.courseId, request.stepId, cache_message, answer, request.context)
+        return answer
+
+    async def _coalesced(
+        self,
+        agent: BaseAgent,
+        request: ChatRequest,
+        owner: Optional[str],
+        generate: Callable[[], Awaitable[str]]
+    ) -> str:
+        """
+        Run generate once for identical concurrent requests of the same
+        owner, None for answers shared by every student
+        """
+        if not settings.chat_coalescing_enabled:
+            return await generate()
+        return await self.single_flight.do(chat_fingerprint(request, agent.model_id, owner), generate)
+
+    async def _generate(
+        self,
+        agent: BaseAgent,
+        request: ChatRequest,
+        user_info: UserInfo,
+        request_class: str
+    ) -> str:
+        cacheable = self._is_cacheable(request)
+        intro = self._is_step_intro(request)
+        if intro:
+            request = self._intro_request(request)
+        local = self._local_answer(request, cacheable, intro)
+        if local is not None:
+            return local
+
+        cache_message = self._cache_message(request, intro) if cacheable else None
+        if intro and not request.history:
+            # Shares the call with a prefetch of the same step already in flight
+            key, owner = request.model_copy(update={"message": self.intros.question}), None
+        else:
+            key, owner = request, user_info.user_id
+        return await self._coalesced(
+            agent,
+            key,
+            owner,
+            lambda: self._model_answer(agent, request, user_info, request_class, cache_message)
+        )
+
+    def can_prefetch(self, request: ChatRequest) -> bool:
+        """
+        Whether speculative work for the request is worth starting now: its
+        answer is not cached yet and the model is healthy and not busy
+        """
+        if not settings.semantic_cache_enabled or self.breaker.state != "closed":
+            return False
+        if settings.fair_scheduler_enabled and self.scheduler.queue_depth:
+            return False
+        return not self.cache.contains(request.courseId, request.stepId, request.message, request.context)
+
+    async def prefetch(self, agent: BaseAgent, request: ChatRequest, user_info: UserInfo) -> str:
+        """
+        Generate and cache the answer to a question before anyone asks it,
+        with the lowest scheduler weight
+        """
+        return await self._coalesced(
+            agent,
+            request,
+            None,
+            lambda: self._model_answer(agent, request, user_info, "prefetch", request.message)
+        )
+
+    async def run(
+        self,
+        agent: BaseAgent,
+        request: ChatRequest,
+        user_info: UserInfo,
+        request_class: str = "interactive"
+    ) -> str:
+        """
+        Answer a chat request, raising AgentError if the model call fails.
+        request_class picks the scheduler weight ("interactive" or "batch").
+        """
+        answer = await self._generate(agent, request, user_info, request_class)
+        await self._save_turn(request, user_info, answer)
+        return answer
+
+    async def answer(self, agent: BaseAgent, request: ChatRequest, user_info: UserInfo) -> str:
+        """
+        Answer a chat request, from the cache when possible.
+        Model failures are returned as a user-facing message.
+        """
+        try:
+            return await self.run(agent, request, user_info)
+        except AgentError as e:
+            return e.message
+
+    async def stream(self, agent: BaseAgent, request: ChatRequest, user_info: UserInfo) -> AsyncIterator[str]:
+        """
+        Stream the answer for a chat request, an FAQ or cache hit is sent as one chunk
+        """
+        cacheable = self._is_cacheable(request)
+        intro = self._is_step_intro(request)
+        if intro:
+            request = self._intro_request(request)
+        local = self._local_answer(request, cacheable, intro)
+        if local is not None:
+            yield local
+            await self._save_turn(request, user_info, local)
+            return
+
+        permit = self.breaker.allow_request()
+        if permit is None:
+            yield self._fallback_message(request)
+            return
+
+        async with AsyncExitStack() as stack:
+            try:
+                # Held until the stream ends or our consumer goes away
+                circuit_closed = await self._enter_model_slot(stack, request, user_info, "interactive", permit)
+            except AgentError as e:
+                yield e.message
+                return
+            if not circuit_closed:
+                yield self._fallback_message(request)
+                return
+
+            chunks = []
+            started = time.perf_counter()
+            try:
+                # Closed right away if our consumer goes away, which stops the model stream
+                async with aclosing(agent.stream_message(
+                    message=request.message,
+                    user_info=user_info,
+                    step_id=request.stepId,
+                    history=request.history,
+                    context=request.context
+                )) as answer_stream:
+                    async for text in answer_stream:
+                        chunks.append(text)
+                        yield text
+            except (asyncio.CancelledError, GeneratorExit):
+                # Our consumer went away, the call has no outcome
+                self.breaker.record_cancelled(permit)
+                raise
+            except AgentError as e:
+                self._record_outcome(permit, started, e)
+                yield e.message
+                return
+            except Exception as e:
+                self._record_outcome(permit, started, e)
+                raise
+            self._record_outcome(permit, started)
+            CHAT_ANSWERS.labels(source="model").inc()
+
+            if chunks:
+                answer = "".join(chunks)
+                if cacheable:
+                    self.cache.put(
+                        request.courseId,
+                        request.stepId,
+                        self._cache_message(request, intro),
+                        answer,
+                        request.context
+                    )
+                await self._save_turn(request, user_info, answer)
+
+    def stats(self) -> Dict[str, Any]:
+        skipped = sum(self.model_skips.values())
+        return {
+            "requests": self.requests,
+            "bedrock_skipped": {
+                **self.model_skips,
+                "total": skipped,
+                "rate": round(skipped / self.requests, 4) if self.requests else 0.0
+            },
+            "faq": self.faq.stats(),
+            "relevance": self.relevance.stats(),
+            "scheduler": self.scheduler.stats(),
+            "cache": self.cache.stats(),
+            "coalescing": self.single_flight.stats(),
+            "sessions": self.sessions.stats(),
+            "circuit_breaker": {
+                **self.breaker.stats(),
+                "fallbacks": self.fallbacks,
+                "fallback_hits": self.fallback_hits
+            }
+        }
+
+# Global chat service
+chat_service = ChatService(
+    cache=answer_cache,
+    sessions=session_store,
+    faq=faq_index,
+    scheduler=fair_scheduler,
+    intros=step_intro_matcher,
+    relevance=relevance_filter,
+    breaker=CircuitBreaker(
+        window_size=settings.circuit_window_size,
+        min_calls=settings.circuit_min_calls,
+        failure_rate_threshold=settings.circuit_failure_rate_threshold,
+        slow_call_seconds=settings.circuit_slow_call_seconds,
+        slow_call_rate_threshold=settings.circuit_slow_call_rate_threshold,
+        open_seconds=settings.circuit_open_seconds,
+        half_open_max_calls=settings.circuit_half_open_max_calls
+    )
+)
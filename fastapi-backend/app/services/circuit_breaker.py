@@ -0,0 +1,139 @@
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """
+    Circuit breaker for the model call.
+
+    Trips open when the failure rate or the slow-call rate over the last
+    `window_size` calls crosses its threshold. While open, calls are
+    rejected immediately. After `open_seconds` it lets a few probe calls
+    through (half-open): if they all succeed it closes again, any failure
+    re-opens it. A cancelled probe frees its slot, and probes with no result
+    after another `open_seconds` re-open it.
+
+    Every allowed call gets a permit, the breaker's generation, which changes
+    on each state transition. Outcomes are reported with the permit, and those
+    of calls admitted before the last transition are ignored, so a call that
+    started while closed cannot close a half-open circuit or free a probe slot.
+    """
+
+    def __init__(
+        self,
+        window_size: int,
+        min_calls: int,
+        failure_rate_threshold: float,
+        slow_call_seconds: float,
+        slow_call_rate_threshold: float,
+        open_seconds: float,
+        half_open_max_calls: int
+    ):
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self._state = CLOSED
+        self._generation = 1
+        # (failed, slow) outcome of recent calls
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=window_size)
+        self._opened_at = 0.0
+        self._last_probe_at = 0.0
+        self._half_open_calls = 0
+        self._half_open_successes = 0
+        self.trips = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        now = time.time()
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+            self._half_open_calls = 0
+            self._half_open_successes = 0
+        elif (
+            self._state == HALF_OPEN
+            and self._half_open_calls > self._half_open_successes
+            and now - self._last_probe_at >= self.open_seconds
+        ):
+            # Probes that never reported back must not hold the circuit half-open forever
+            self._trip()
+        return self._state
+
+    def allow_request(self) -> Optional[int]:
+        """
+        A permit for a call to the model now, None if it must not be made
+        """
+        state = self.state
+        if state == CLOSED:
+            return self._generation
+        if state == HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+            self._half_open_calls += 1
+            self._last_probe_at = time.time()
+            return self._generation
+        self.rejected += 1
+        return None
+
+    def record_cancelled(self, permit: int) -> None:
+        """
+        Release an allowed call that was cancelled before it had an outcome
+        """
+        if permit != self._generation:
+            return
+        if self._state == HALF_OPEN and self._half_open_calls > self._half_open_successes:
+            self._half_open_calls -= 1
+
+    def record(self, permit: int, failed: bool, seconds: float) -> None:
+        """
+        Record the outcome of an allowed call
+        """
+        if permit != self._generation:
+            # Admitted before the last transition, says nothing about the current state
+            return
+        slow = seconds > self.slow_call_seconds
+
+        if self._state == HALF_OPEN:
+            if failed or slow:
+                self._trip()
+            else:
+                self._half_open_successes += 1
+                if self._half_open_successes >= self.half_open_max_calls:
+                    self._transition(CLOSED)
+                    self._outcomes.clear()
+            return
+
+        self._outcomes.append((failed, slow))
+        if len(self._outcomes) < self.min_calls:
+            return
+
+        calls = len(self._outcomes)
+        failure_rate = sum(1 for f, _ in self._outcomes if f) / calls
+        slow_rate = sum(1 for _, s in self._outcomes if s) / calls
+        if failure_rate >= self.failure_rate_threshold or slow_rate >= self.slow_call_rate_threshold:
+            self._trip()
+
+    def _transition(self, state: str) -> None:
+        self._state = state
+        self._generation += 1
+
+    def _trip(self) -> None:
+        self._transition(OPEN)
+        self._opened_at = time.time()
+        self._outcomes.clear()
+        self.trips += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "window_calls": len(self._outcomes),
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "opened_at": self._opened_at or None
+        }
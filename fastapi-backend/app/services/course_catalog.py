@@ -0,0 +1,190 @@
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional
+
+from ..config import settings
+from ..database import DatabaseConnection, db
+
+COURSES_QUERY = """
+    SELECT c.id, c.title, c.description, c.duration, c.difficulty
+    FROM courses c
+    ORDER BY c.id
+"""
+
+# Course info served when no database is configured or it has never been
+# reachable, also the source of the fields the courses table does not have
+DEFAULT_COURSE_INFO = {
+    "bedrock-rag": {
+        "name": "RAG con Amazon Bedrock",
+        "description": "Aprende a construir chatbots inteligentes con RAG y Amazon Bedrock",
+        "steps": 7,
+        "duration": "4-6 horas",
+        "difficulty": "Intermedio"
+    }
+}
+
+# Course info field -> courses column
+INFO_COLUMNS = {
+    "name": "title",
+    "description": "description",
+    "duration": "duration",
+    "difficulty": "difficulty"
+}
+
+@dataclass(frozen=True)
+class CachedBody:
+    """
+    A pre-serialized JSON response and its strong ETag
+    """
+    body: bytes
+    etag: str
+
+    @classmethod
+    def of(cls, payload: Any) -> "CachedBody":
+        body = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+        return cls(body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """
+    Immutable view of the course catalog. A refresh builds a new snapshot
+    and swaps the reference, readers never see a partial update.
+    """
+    listing: CachedBody
+    info: Mapping[str, CachedBody]
+    source: str
+    loaded_at: float
+
+    def get_info(self, course_id: str) -> Optional[CachedBody]:
+        return self.info.get(course_id)
+
+    def same_content(self, other: "CatalogSnapshot") -> bool:
+        return (
+            self.listing.etag == other.listing.etag
+            and {course_id: body.etag for course_id, body in self.info.items()}
+            == {course_id: body.etag for course_id, body in other.info.items()}
+        )
+
+def _course_info(course_id: str, row: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    info = dict(DEFAULT_COURSE_INFO.get(course_id, {"name": course_id, "description": "Curso disponible"}))
+    if row is not None:
+        for field, column in INFO_COLUMNS.items():
+            if row.get(column) is not None:
+                info[field] = row[column]
+    return info
+
+def build_snapshot(course_rows: List[Dict[str, Any]], source: str) -> CatalogSnapshot:
+    """
+    Serialize the catalog responses once, they are served as-is until the next change
+    """
+    # The chat agents use their own course ids, see catalog_course_aliases
+    rows = {settings.catalog_course_aliases.get(row["id"], row["id"]): row for row in course_rows}
+    info = {
+        course_id: CachedBody.of(_course_info(course_id, rows.get(course_id)))
+        for course_id in settings.supported_courses
+    }
+    listing = CachedBody.of({
+        "courses": settings.supported_courses,
+        "total": len(settings.supported_courses)
+    })
+    return CatalogSnapshot(
+        listing=listing,
+        info=MappingProxyType(info),
+        source=source,
+        loaded_at=time.time()
+    )
+
+def default_snapshot() -> CatalogSnapshot:
+    return build_snapshot([], source="defaults")
+
+class CourseCatalog:
+    """
+    Course catalog loaded from the courses table into an
+    immutable snapshot, refreshed in the background. The snapshot is only
+    replaced when the data changed, so ETags stay stable between refreshes.
+    """
+
+    def __init__(self, database: DatabaseConnection, refresh_interval: float):
+        self._db = database
+        self.refresh_interval = refresh_interval
+        self._snapshot = default_snapshot()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.changes = 0
+        self.last_refresh: Optional[float] = None
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        return self._snapshot
+
+    async def _load(self) -> List[Dict[str, Any]]:
+        return await self._db.execute_query(COURSES_QUERY)
+
+    async def refresh(self) -> bool:
+        """
+        Reload the catalog from the database, returns True if it changed
+        """
+        if not self._db.configured:
+            return False
+
+        async with self._lock:
+            self.refreshes += 1
+            try:
+                courses = await self._load()
+            except Exception as e:
+                self.refresh_failures += 1
+                print(f"Warning: Could not load course catalog: {e}")
+                return False
+
+            self.last_refresh = time.time()
+            snapshot = build_snapshot(courses, source="database")
+            if snapshot.same_content(self._snapshot):
+                return False
+
+            self._snapshot = snapshot
+            self.changes += 1
+            return True
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh()
+
+    async def start(self) -> None:
+        """
+        Load the catalog at startup and keep it fresh in the background
+        """
+        await self.refresh()
+        if self._task is None and self._db.configured:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "source": snapshot.source,
+            "courses": len(snapshot.info),
+            "etag": snapshot.listing.etag,
+            "loaded_at": snapshot.loaded_at,
+            "last_refresh": self.last_refresh,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "changes": self.changes
+        }
+
+# Global course catalog
+course_catalog = CourseCatalog(database=db, refresh_interval=settings.catalog_refresh_interval_seconds)
@@ -0,0 +1,182 @@
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .embeddings import embed_terms
+from ..config import settings
+
+@dataclass(frozen=True)
+class CourseSnippet:
+    """
+    A piece of course material returned by a vector search
+    """
+    step_id: Optional[int]
+    title: str
+    text: str
+    score: float
+
+class CourseIndex:
+    """
+    Read-only vector index of one course's material.
+
+    The embedding matrix is built offline (see scripts/build_course_index.py)
+    and memory-mapped, so every worker process shares the same pages and a
+    search is a single matrix-vector product.
+    """
+
+    def __init__(self, course_id: str, matrix: np.ndarray, documents: List[Dict[str, Any]], dims: int):
+        if matrix.shape != (len(documents), dims):
+            raise ValueError(
+                f"Index for '{course_id}' has shape {matrix.shape}, "
+                f"expected ({len(documents)}, {dims})"
+            )
+        self.course_id = course_id
+        self.dims = dims
+        self._matrix = matrix
+        self._documents = documents
+        self._step_ids = np.array(
+            [-1 if doc.get("step_id") is None else doc["step_id"] for doc in documents],
+            dtype=np.int32
+        )
+        # Steps the course material covers
+        self.step_ids = frozenset(int(step_id) for step_id in self._step_ids if step_id >= 0)
+        self._searches = 0
+        self._total_seconds = 0.0
+        self._max_seconds = 0.0
+
+    @classmethod
+    def load(cls, index_dir: str, course_id: str) -> "CourseIndex":
+        """
+        Memory-map a prebuilt index from <index_dir>/<course_id>.npy and .json
+        """
+        with open(os.path.join(index_dir, f"{course_id}.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        matrix = np.load(os.path.join(index_dir, f"{course_id}.npy"), mmap_mode="r")
+        return cls(course_id, matrix, meta["documents"], meta["dims"])
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def search(
+        self,
+        query: str,
+        step_id: Optional[int] = None,
+        top_k: int = None,
+        min_score: float = None
+    ) -> List[CourseSnippet]:
+        """
+        Top-k cosine search, snippets of the current step get a small boost
+        """
+        top_k = settings.course_index_top_k if top_k is None else top_k
+        min_score = settings.course_index_min_score if min_score is None else min_score
+        if top_k <= 0 or not len(self):
+            return []
+
+        started = time.perf_counter()
+        query_vector = np.asarray(embed_terms(query, self.dims), dtype=np.float32)
+        # Rows are L2-normalized, so the dot product is the cosine similarity
+        scores = self._matrix @ query_vector
+        ranked = scores
+        if step_id is not None and settings.course_index_step_boost:
+            ranked = scores + settings.course_index_step_boost * (self._step_ids == step_id)
+
+        k = min(top_k, len(ranked))
+        candidates = np.argpartition(-ranked, k - 1)[:k]
+        candidates = candidates[np.argsort(-ranked[candidates])]
+
+        results = []
+        for i in candidates:
+            score = float(scores[i])
+            if score < min_score:
+                continue
+            doc = self._documents[i]
+            results.append(CourseSnippet(
+                step_id=doc.get("step_id"),
+                title=doc.get("title", ""),
+                text=doc["text"],
+                score=round(score, 4)
+            ))
+
+        elapsed = time.perf_counter() - started
+        self._searches += 1
+        self._total_seconds += elapsed
+        self._max_seconds = max(self._max_seconds, elapsed)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Index size and search latency
+        """
+        return {
+            "documents": len(self),
+            "dims": self.dims,
+            "searches": self._searches,
+            "avg_search_ms": round(self._total_seconds / self._searches * 1000, 3) if self._searches else None,
+            "max_search_ms": round(self._max_seconds * 1000, 3) if self._searches else None
+        }
+
+class CourseIndexRegistry:
+    """
+    Course indexes loaded at startup, keyed by course id
+    """
+
+    def __init__(self):
+        self._indexes: Dict[str, CourseIndex] = {}
+
+    def load_all(self, index_dir: str = None) -> List[str]:
+        """
+        Load every prebuilt index found in index_dir, returns the loaded course ids
+        """
+        index_dir = index_dir or settings.course_index_dir
+        if not settings.course_index_enabled or not os.path.isdir(index_dir):
+            return []
+
+        for filename in sorted(os.listdir(index_dir)):
+            if not filename.endswith(".npy"):
+                continue
+            course_id = filename[:-len(".npy")]
+            try:
+                self._indexes[course_id] = CourseIndex.load(index_dir, course_id)
+            except Exception as e:
+                print(f"Warning: Could not load course index '{course_id}': {e}")
+        return sorted(self._indexes.keys())
+
+    def get(self, course_id: str) -> Optional[CourseIndex]:
+        return self._indexes.get(course_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {course_id: index.stats() for course_id, index in self._indexes.items()}
+
+def build_course_index(source_path: str, index_dir: str, dims: int = None) -> str:
+    """
+    Embed a course corpus (data/courses/<course>.json) into
+    <index_dir>/<course>.npy plus a .json file with the snippet metadata.
+    Returns the course id.
+    """
+    dims = dims or settings.course_index_dimensions
+    with open(source_path, "r", encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    course_id = corpus["course_id"]
+    documents = [
+        {"step_id": doc.get("step_id"), "title": doc.get("title", ""), "text": doc["text"]}
+        for doc in corpus["documents"]
+    ]
+    # The title is embedded with the text so short questions can match it
+    matrix = np.array(
+        [embed_terms(f"{doc['title']}. {doc['text']}", dims) for doc in documents],
+        dtype=np.float32
+    ).reshape(len(documents), dims)
+
+    os.makedirs(index_dir, exist_ok=True)
+    np.save(os.path.join(index_dir, f"{course_id}.npy"), matrix)
+    with open(os.path.join(index_dir, f"{course_id}.json"), "w", encoding="utf-8") as f:
+        json.dump({"course_id": course_id, "dims": dims, "documents": documents}, f, ensure_ascii=False)
+    return course_id
+
+# Global registry, filled at startup
+course_indexes = CourseIndexRegistry()
@@ -0,0 +1,115 @@
+import math
+import re
+import unicodedata
+import zlib
+from typing import Dict, FrozenSet, List
+
+from ..config import settings
+
+_NON_WORD = re.compile(r"[^a-z0-9\s]")
+_SPACES = re.compile(r"\s+")
+
+def normalize_message(text: str) -> str:
+    """
+    Lowercase, strip accents and punctuation, collapse whitespace
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = _NON_WORD.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+# Spanish and English function words, they carry no topic signal
+STOPWORDS = frozenset("""
+a al algo como con cual cuales cuando de del donde e el ella en entre era es esa ese eso esta este
+esto estos fue ha hay la las le les lo los mas me mi mis muy no nos o para pero por que se sea ser si
+sin sobre son su sus te tengo ti tu tus un una uno unos y ya yo puedo hago hacer quiero
+an and are as at be by do does for from how i in is it of on or the this to what when where which
+who why with you your can
+""".split())
+
+def content_terms(text: str) -> List[str]:
+    """
+    Normalized words of a text without stopwords
+    """
+    return [word for word in normalize_message(text).split(" ") if word and word not in STOPWORDS]
+
+# Words that flip the meaning of a question
+NEGATIONS = frozenset("no ni nunca jamas tampoco sin not never without".split())
+
+# Question words are stopwords for the embeddings, but "que es" and "cuanto tarda" ask different things
+QUESTION_WORDS = frozenset("""
+como que cual cuales cuando cuanto cuanta cuantos cuantas donde quien quienes
+how what which when where who why
+""".split())
+
+# Content words are compared on their first letters, so plurals and late typos still match
+TERM_STEM_LENGTH = 5
+
+def term_stems(text: str) -> FrozenSet[str]:
+    """
+    Question words and stems of the content words of a text
+    """
+    return frozenset(
+        word if word in QUESTION_WORDS else word[:TERM_STEM_LENGTH]
+        for word in normalize_message(text).split(" ")
+        if word and (word in QUESTION_WORDS or word not in STOPWORDS)
+    )
+
+def is_negated(text: str) -> bool:
+    return any(word in NEGATIONS for word in normalize_message(text).split(" "))
+
+def asks_same(query_stems: FrozenSet[str], query_negated: bool, stems: FrozenSet[str], negated: bool) -> bool:
+    """
+    Whether a question can take the answer of a similar one: the embeddings
+    barely move when a verb is swapped ("crear" / "borrar"), the question
+    word changes or a "no" is added, so every content and question word
+    of the query must appear in the other question and both must be
+    negated or not
+    """
+    return query_negated == negated and query_stems <= stems
+
+def _bucket(feature: str, dims: int) -> int:
+    # crc32 is stable across processes, unlike hash()
+    return zlib.crc32(feature.encode("utf-8")) % dims
+
+def embed_text(text: str, dims: int = None) -> List[float]:
+    """
+    Cheap local embedding: hashed word unigrams and character trigrams,
+    L2-normalized so that a dot product is the cosine similarity.
+    """
+    dims = dims or settings.embedding_dimensions
+    vector = [0.0] * dims
+    normalized = normalize_message(text)
+    if not normalized:
+        return vector
+
+    for word in normalized.split(" "):
+        vector[_bucket(f"w:{word}", dims)] += 1.0
+
+    padded = f" {normalized} "
+    for i in range(len(padded) - 2):
+        vector[_bucket(f"c:{padded[i:i + 3]}", dims)] += 0.5
+
+    norm = math.sqrt(sum(v * v for v in vector))
+    return [v / norm for v in vector] if norm else vector
+
+def embed_terms(text: str, dims: int = None) -> List[float]:
+    """
+    embed_text over the content terms only, for short questions matched
+    against longer texts where stopwords would dominate the trigrams
+    """
+    return embed_text(" ".join(content_terms(text)), dims)
+
+def embed_sparse(text: str, dims: int = None) -> Dict[int, float]:
+    """
+    Same as embed_text, keeping only the non-zero components
+    """
+    return {i: v for i, v in enumerate(embed_text(text, dims)) if v}
+
+def sparse_cosine_similarity(a: Dict[int, float], b: Dict[int, float]) -> float:
+    """
+    Cosine similarity of two L2-normalized sparse vectors
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(i, 0.0) for i, v in a.items())
@@ -0,0 +1,236 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Tuple
+
+from ..agents import AgentError
+from ..agents.concurrency_limiter import bedrock_limiter
+from ..config import settings
+from ..metrics import SCHEDULER_QUEUE_DEPTH, SCHEDULER_QUEUE_WAIT
+
+@dataclass(order=True)
+class _Waiter:
+    finish_tag: float
+    seq: int
+    start_tag: float = field(compare=False)
+    user_id: str = field(compare=False)
+    course_id: str = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+class FairScheduler:
+    """
+    Weighted fair queuing of model work across users and courses.
+
+    Every (user, course, request class) is a flow. A queued request gets the
+    virtual finish tag max(virtual time, flow's last tag) + 1 / weight, where
+    the weight is the course weight times the request class weight. Free
+    capacity goes to the smallest tag whose user and course are under their
+    in-flight caps, so a heavy user or a batch queues behind its own backlog
+    instead of in front of everyone else.
+    """
+
+    def __init__(
+        self,
+        capacity: Callable[[], int],
+        max_in_flight_per_user: int,
+        max_in_flight_per_course: int,
+        max_queue_per_user: int,
+        queue_timeout: float,
+        course_weights: Dict[str, float],
+        class_weights: Dict[str, float],
+        class_queue_timeouts: Dict[str, float]
+    ):
+        self._capacity = capacity
+        self.max_in_flight_per_user = max_in_flight_per_user
+        self.max_in_flight_per_course = max_in_flight_per_course
+        self.max_queue_per_user = max_queue_per_user
+        self.queue_timeout = queue_timeout
+        self.course_weights = course_weights
+        self.class_weights = class_weights
+        self.class_queue_timeouts = class_queue_timeouts
+        self._virtual_time = 0.0
+        self._last_finish: Dict[Tuple[str, str, str], float] = {}
+        self._heap: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._user_in_flight: Dict[str, int] = {}
+        self._course_in_flight: Dict[str, int] = {}
+        self._user_queued: Dict[str, int] = {}
+        self._admitted: Dict[str, int] = {}
+        self._wait_seconds: Dict[str, float] = {}
+        self.rejected = 0
+        self.timeouts = 0
+
+    @property
+    def capacity(self) -> int:
+        return max(1, self._capacity())
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(self._user_queued.values())
+
+    def _weight(self, course_id: str, request_class: str) -> float:
+        weight = self.course_weights.get(course_id, 1.0) * self.class_weights.get(request_class, 1.0)
+        return max(weight, 1e-3)
+
+    def _queue_timeout(self, request_class: str) -> float:
+        return self.class_queue_timeouts.get(request_class, self.queue_timeout)
+
+    def _under_caps(self, user_id: str, course_id: str) -> bool:
+        return (
+            self._user_in_flight.get(user_id, 0) < self.max_in_flight_per_user
+            and self._course_in_flight.get(course_id, 0) < self.max_in_flight_per_course
+        )
+
+    def _take(self, user_id: str, course_id: str) -> None:
+        self._in_flight += 1
+        self._user_in_flight[user_id] = self._user_in_flight.get(user_id, 0) + 1
+        self._course_in_flight[course_id] = self._course_in_flight.get(course_id, 0) + 1
+
+    def _release(self, user_id: str, course_id: str) -> None:
+        self._in_flight -= 1
+        for counts, key in ((self._user_in_flight, user_id), (self._course_in_flight, course_id)):
+            counts[key] -= 1
+            if not counts[key]:
+                del counts[key]
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """
+        Hand free capacity to the queued requests with the smallest finish tags
+        """
+        skipped = []
+        while self._heap and self._in_flight < self.capacity:
+            waiter = heapq.heappop(self._heap)
+            if waiter.future.done():
+                continue
+            if not self._under_caps(waiter.user_id, waiter.course_id):
+                # Tenant at its cap, the slot goes to the next flow
+                skipped.append(waiter)
+                continue
+            self._virtual_time = max(self._virtual_time, waiter.start_tag)
+            self._take(waiter.user_id, waiter.course_id)
+            waiter.future.set_result(None)
+        for waiter in skipped:
+            heapq.heappush(self._heap, waiter)
+
+    def _record_wait(self, request_class: str, seconds: float) -> None:
+        self._admitted[request_class] = self._admitted.get(request_class, 0) + 1
+        self._wait_seconds[request_class] = self._wait_seconds.get(request_class, 0.0) + seconds
+        SCHEDULER_QUEUE_WAIT.labels(request_class=request_class).observe(seconds)
+
+    async def acquire(self, user_id: str, course_id: str, request_class: str) -> None:
+        """
+        Wait for this request's turn, raising AgentError if the user already
+        has too many queued requests or the deadline passes
+        """
+        if not self.queue_depth and self._in_flight < self.capacity and self._under_caps(user_id, course_id):
+            self._take(user_id, course_id)
+            self._record_wait(request_class, 0.0)
+            return
+
+        if self._user_queued.get(user_id, 0) >= self.max_queue_per_user:
+            self.rejected += 1
+            raise AgentError(
+                "Tienes demasiadas consultas en espera. Por favor, espera a que terminen las anteriores.",
+                "SchedulerQueueFull"
+            )
+
+        if len(self._last_finish) > 4 * self.max_queue_per_user * max(1, self.queue_depth):
+            # Flows whose last tag is behind virtual time restart from it anyway
+            self._last_finish = {
+                key: tag for key, tag in self._last_finish.items() if tag > self._virtual_time
+            }
+
+        flow = (user_id, course_id, request_class)
+        start_tag = max(self._virtual_time, self._last_finish.get(flow, 0.0))
+        finish_tag = start_tag + 1.0 / self._weight(course_id, request_class)
+        self._last_finish[flow] = finish_tag
+
+        waiter = _Waiter(
+            finish_tag=finish_tag,
+            seq=next(self._seq),
+            start_tag=start_tag,
+            user_id=user_id,
+            course_id=course_id,
+            future=asyncio.get_running_loop().create_future()
+        )
+        heapq.heappush(self._heap, waiter)
+        self._user_queued[user_id] = self._user_queued.get(user_id, 0) + 1
+        SCHEDULER_QUEUE_DEPTH.set(self.queue_depth)
+        # Capped tenants may be queued while others could run right away
+        self._dispatch()
+
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self._queue_timeout(request_class))
+        except asyncio.TimeoutError:
+            if not waiter.future.done():
+                self.timeouts += 1
+                SCHEDULER_QUEUE_WAIT.labels(request_class=request_class).observe(time.perf_counter() - started)
+                raise AgentError(
+                    "El asistente está recibiendo muchas consultas. Por favor, intenta nuevamente en unos segundos.",
+                    "SchedulerQueueTimeout"
+                )
+            # Granted right at the deadline, keep the slot
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Slot was granted just as we were cancelled, hand it on
+                self._release(user_id, course_id)
+            raise
+        finally:
+            if not waiter.future.done():
+                waiter.future.cancel()
+            self._user_queued[user_id] -= 1
+            if not self._user_queued[user_id]:
+                del self._user_queued[user_id]
+            if len(self._heap) > 2 * self.queue_depth + 32:
+                # Drop waiters that timed out or were cancelled
+                self._heap = [w for w in self._heap if not w.future.done()]
+                heapq.heapify(self._heap)
+            SCHEDULER_QUEUE_DEPTH.set(self.queue_depth)
+
+        self._record_wait(request_class, time.perf_counter() - started)
+
+    @asynccontextmanager
+    async def slot(self, user_id: str, course_id: str, request_class: str = "interactive") -> AsyncIterator[None]:
+        """
+        Hold a scheduler slot for the duration of the model work
+        """
+        await self.acquire(user_id, course_id, request_class)
+        try:
+            yield
+        finally:
+            self._release(user_id, course_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "in_flight_by_course": dict(self._course_in_flight),
+            "active_users": len(self._user_in_flight),
+            "admitted": dict(self._admitted),
+            "avg_wait_ms": {
+                request_class: round(self._wait_seconds[request_class] / count * 1000, 2)
+                for request_class, count in self._admitted.items()
+            },
+            "rejected": self.rejected,
+            "timeouts": self.timeouts
+        }
+
+# Global scheduler, its capacity follows the adaptive Bedrock limit so
+# requests queue here, in fair order, rather than FIFO in the limiter
+fair_scheduler = FairScheduler(
+    capacity=lambda: bedrock_limiter.limit,
+    max_in_flight_per_user=settings.fair_scheduler_max_in_flight_per_user,
+    max_in_flight_per_course=settings.fair_scheduler_max_in_flight_per_course,
+    max_queue_per_user=settings.fair_scheduler_max_queue_per_user,
+    queue_timeout=settings.fair_scheduler_queue_timeout_seconds,
+    course_weights=settings.fair_scheduler_course_weights,
+    class_weights=settings.fair_scheduler_class_weights,
+    class_queue_timeouts=settings.fair_scheduler_class_queue_timeouts
+)
@@ -0,0 +1,163 @@
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .embeddings import embed_terms, is_negated, term_stems
+from ..config import settings
+
+ANSWERS_SUFFIX = ".answers.json"
+
+@dataclass(frozen=True)
+class FAQMatch:
+    """
+    A canonical answer that matched a user question
+    """
+    faq_id: str
+    step_id: Optional[int]
+    question: str
+    answer: str
+    score: float
+
+class CourseFAQ:
+    """
+    Canonical answers to a course's most common questions, per step.
+
+    Answers are generated offline (see scripts/build_faq_answers.py). Each
+    question and its variants are embedded once at load time; matching is
+    a matrix-vector product over the rows of the request's step. The
+    embedding leaves out "como", "que" and "no", so the best question must
+    also contain every content and question word of the message (no
+    "borrar" answered with "crear") and the same negation.
+    """
+
+    def __init__(self, course_id: str, entries: List[Dict[str, Any]], dims: int = None):
+        self.course_id = course_id
+        self.dims = dims or settings.course_index_dimensions
+        self._entries = [entry for entry in entries if entry.get("answer")]
+
+        rows, owners = [], []
+        # Words and negations used by each question or any of its variants
+        self._stems, self._negations = [], []
+        for i, entry in enumerate(self._entries):
+            texts = [entry["question"], *entry.get("variants", [])]
+            for text in texts:
+                rows.append(embed_terms(text, self.dims))
+                owners.append(i)
+            self._stems.append(frozenset().union(*(term_stems(text) for text in texts)))
+            self._negations.append({is_negated(text) for text in texts})
+        self._matrix = np.array(rows, dtype=np.float32).reshape(len(rows), self.dims)
+        self._owners = np.array(owners, dtype=np.int32)
+        self._row_steps = np.array(
+            [-1 if self._entries[i].get("step_id") is None else self._entries[i]["step_id"] for i in owners],
+            dtype=np.int32
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "CourseFAQ":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["course_id"], data["entries"])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def match(
+        self,
+        message: str,
+        step_id: Optional[int] = None,
+        threshold: float = None,
+        min_margin: float = None
+    ) -> Optional[FAQMatch]:
+        """
+        Best canonical answer for the message, None unless the match is
+        both close enough and clearly ahead of the next-best question
+        """
+        threshold = settings.faq_match_threshold if threshold is None else threshold
+        min_margin = settings.faq_min_margin if min_margin is None else min_margin
+        if not len(self):
+            return None
+
+        scores = self._matrix @ np.asarray(embed_terms(message, self.dims), dtype=np.float32)
+        if step_id is not None:
+            # Only questions of the current step, or not tied to any step
+            scores = np.where((self._row_steps == step_id) | (self._row_steps == -1), scores, -1.0)
+
+        # Best score per question over its variants
+        best = np.full(len(self._entries), -1.0, dtype=np.float32)
+        np.maximum.at(best, self._owners, scores)
+
+        order = np.argsort(-best)
+        top = int(order[0])
+        top_score = float(best[top])
+        runner_up = float(best[order[1]]) if len(order) > 1 else -1.0
+        if top_score < threshold or top_score - runner_up < min_margin:
+            return None
+        if is_negated(message) not in self._negations[top] or not term_stems(message) <= self._stems[top]:
+            return None
+
+        entry = self._entries[top]
+        return FAQMatch(
+            faq_id=entry["id"],
+            step_id=entry.get("step_id"),
+            question=entry["question"],
+            answer=entry["answer"],
+            score=round(top_score, 4)
+        )
+
+class FAQIndex:
+    """
+    Per-course canonical answers, checked before any model call
+    """
+
+    def __init__(self):
+        self._courses: Dict[str, CourseFAQ] = {}
+        self.lookups = 0
+        self.hits = 0
+        self._hits_by_id: Dict[str, int] = {}
+
+    def load_all(self, faq_dir: str = None) -> List[str]:
+        """
+        Load every <course>.answers.json in faq_dir, returns the loaded course ids
+        """
+        faq_dir = faq_dir or settings.faq_dir
+        if not settings.faq_enabled or not os.path.isdir(faq_dir):
+            return []
+
+        for filename in sorted(os.listdir(faq_dir)):
+            if not filename.endswith(ANSWERS_SUFFIX):
+                continue
+            try:
+                faq = CourseFAQ.load(os.path.join(faq_dir, filename))
+            except Exception as e:
+                print(f"Warning: Could not load FAQ answers '{filename}': {e}")
+                continue
+            self._courses[faq.course_id] = faq
+        return sorted(self._courses.keys())
+
+    def match(self, course_id: str, step_id: Optional[int], message: str) -> Optional[FAQMatch]:
+        faq = self._courses.get(course_id)
+        if faq is None:
+            return None
+
+        self.lookups += 1
+        result = faq.match(message, step_id)
+        if result is not None:
+            self.hits += 1
+            self._hits_by_id[result.faq_id] = self._hits_by_id.get(result.faq_id, 0) + 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        top = sorted(self._hits_by_id.items(), key=lambda item: item[1], reverse=True)[:10]
+        return {
+            "courses": {course_id: len(faq) for course_id, faq in self._courses.items()},
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+            "top_questions": dict(top)
+        }
+
+# Global FAQ index, filled at startup
+faq_index = FAQIndex()
@@ -0,0 +1,95 @@
+import asyncio
+from typing import Any, Dict
+
+from .chat_service import ChatService, chat_service
+from .single_flight import chat_fingerprint
+from ..agents import AgentError, BaseAgent
+from ..config import settings
+from ..models import ChatRequest, UserInfo
+
+# Step introductions are shared by every student, so they are not generated for anyone in particular
+PREFETCH_USER = UserInfo(
+    user_id="step-intro-prefetch",
+    email="prefetch@cloudacademy.local",
+    name="Estudiante",
+    username="step-intro-prefetch"
+)
+
+class StepIntroPrefetcher:
+    """
+    Generates a step's introduction in the background when a student opens
+    the step, so their first "explain this step" question hits a warm cache.
+    Requests for the same step are deduplicated across users, and the work
+    is dropped rather than queued when the pod is busy.
+    """
+
+    def __init__(self, service: ChatService, max_pending: int):
+        self.service = service
+        self.max_pending = max_pending
+        self._pending: Dict[str, asyncio.Task] = {}
+        self.requests = 0
+        # Outcome of each prefetch request
+        self.outcomes = {"scheduled": 0, "pending": 0, "cached": 0, "skipped": 0}
+        self.generated = 0
+        self.failed = 0
+
+    def prefetch(
+        self,
+        agent: BaseAgent,
+        course_id: str,
+        step_id: int
+    ) -> str:
+        """
+        Start generating the step introduction unless it is cached or already
+        being generated. Returns "scheduled", "pending", "cached" or "skipped".
+        """
+        self.requests += 1
+        request = ChatRequest(
+            message=settings.step_intro_question,
+            courseId=course_id,
+            stepId=step_id
+        )
+        key = chat_fingerprint(request, agent.model_id)
+
+        if key in self._pending:
+            outcome = "pending"
+        elif len(self._pending) >= self.max_pending or not self.service.can_prefetch(request):
+            outcome = "cached" if self.service.cache.contains(course_id, step_id, request.message, None) else "skipped"
+        else:
+            task = asyncio.create_task(self._generate(key, agent, request))
+            self._pending[key] = task
+            outcome = "scheduled"
+
+        self.outcomes[outcome] += 1
+        return outcome
+
+    async def _generate(self, key: str, agent: BaseAgent, request: ChatRequest) -> None:
+        try:
+            await self.service.prefetch(agent, request, PREFETCH_USER)
+            self.generated += 1
+        except AgentError as e:
+            self.failed += 1
+            print(f"Step intro prefetch failed for {request.courseId}/{request.stepId}: {e.message}")
+        except Exception as e:
+            self.failed += 1
+            print(f"Unexpected error prefetching step intro {request.courseId}/{request.stepId}: {e}")
+        finally:
+            self._pending.pop(key, None)
+
+    async def stop(self) -> None:
+        tasks = list(self._pending.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            **self.outcomes,
+            "in_flight": len(self._pending),
+            "generated": self.generated,
+            "failed": self.failed
+        }
+
+# Global prefetcher
+intro_prefetcher = StepIntroPrefetcher(service=chat_service, max_pending=settings.step_intro_max_pending)
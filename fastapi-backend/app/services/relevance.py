@@ -0,0 +1,211 @@
+import json
+import math
+import os
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from .embeddings import content_terms
+from ..config import settings
+from ..metrics import RELEVANCE_DECISIONS
+
+# Words are cut to their first letters, a cheap stemmer for Spanish inflections
+STEM_LENGTH = 6
+
+def _stems(text: str) -> List[str]:
+    return [term[:STEM_LENGTH] for term in content_terms(text)]
+
+class CourseRelevanceModel:
+    """
+    Keyword model of what a course is about.
+
+    Every stem of the course material, its FAQ questions and its keyword
+    list is weighted by inverse document frequency, stems never seen get
+    the highest weight. A message is off-topic when the stems the course
+    knows carry less than `threshold` of its total weight. Messages with
+    fewer than `min_terms` content words (greetings, "no entiendo") are
+    never rejected.
+    """
+
+    def __init__(
+        self,
+        course_id: str,
+        documents: List[str],
+        keywords: List[str],
+        threshold: float,
+        min_terms: int
+    ):
+        self.course_id = course_id
+        self.threshold = threshold
+        self.min_terms = min_terms
+
+        # The keyword list counts as one more document
+        texts = [*documents, " ".join(keywords)]
+        frequencies = Counter(stem for text in texts for stem in set(_stems(text)))
+        self._unknown_weight = math.log(len(texts) + 1) + 1.0
+        self._weights = {
+            stem: math.log((len(texts) + 1) / (count + 1)) + 1.0
+            for stem, count in frequencies.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._weights)
+
+    def score(self, message: str) -> Optional[float]:
+        """
+        Share of the message's weight carried by course stems, None when
+        the message is too short to judge
+        """
+        stems = _stems(message)
+        if len(stems) < self.min_terms:
+            return None
+
+        known = total = 0.0
+        for stem in stems:
+            weight = self._weights.get(stem)
+            if weight is None:
+                total += self._unknown_weight
+            else:
+                known += weight
+                total += weight
+        return known / total
+
+    def is_relevant(self, message: str) -> bool:
+        score = self.score(message)
+        return score is None or score >= self.threshold
+
+    def evaluate(self, on_topic: List[str], off_topic: List[str]) -> Dict[str, Any]:
+        """
+        Precision and recall of the off-topic rejections on a labelled set
+        """
+        false_rejections = sum(1 for message in on_topic if not self.is_relevant(message))
+        rejections = sum(1 for message in off_topic if not self.is_relevant(message))
+        rejected = rejections + false_rejections
+        return {
+            "on_topic": len(on_topic),
+            "off_topic": len(off_topic),
+            "precision": round(rejections / rejected, 4) if rejected else None,
+            "recall": round(rejections / len(off_topic), 4) if off_topic else None,
+            "false_rejections": false_rejections
+        }
+
+class RelevanceFilter:
+    """
+    Per-course relevance models, checked before a question reaches the model.
+    In "shadow" mode off-topic questions are only counted, not rejected.
+    """
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self._models: Dict[str, CourseRelevanceModel] = {}
+        self._evaluations: Dict[str, Dict[str, Any]] = {}
+        self._checks: Dict[str, int] = {}
+        self._off_topic: Dict[str, int] = {}
+        self._total_seconds = 0.0
+
+    @property
+    def enforcing(self) -> bool:
+        return self.mode == "enforce"
+
+    @staticmethod
+    def _course_texts(course_id: str) -> List[str]:
+        texts = []
+        course_path = os.path.join(settings.course_data_dir, f"{course_id}.json")
+        if os.path.exists(course_path):
+            with open(course_path, "r", encoding="utf-8") as f:
+                texts += [f"{doc.get('title', '')}. {doc['text']}" for doc in json.load(f)["documents"]]
+
+        questions_path = os.path.join(settings.faq_dir, f"{course_id}.questions.json")
+        if os.path.exists(questions_path):
+            with open(questions_path, "r", encoding="utf-8") as f:
+                texts += [
+                    " ".join([question["question"], *question.get("variants", [])])
+                    for question in json.load(f)["questions"]
+                ]
+        return texts
+
+    def load_all(self, relevance_dir: str = None) -> List[str]:
+        """
+        Build a model for every <course>.json in relevance_dir from its
+        keywords plus the course material and FAQ questions, and score it
+        on the file's labelled examples: "eval" was used to tune the
+        keywords and threshold, "holdout" never is, so its figures are the
+        ones to trust. Returns the loaded course ids.
+        """
+        relevance_dir = relevance_dir or settings.relevance_dir
+        if not settings.relevance_filter_enabled or not os.path.isdir(relevance_dir):
+            return []
+
+        for filename in sorted(os.listdir(relevance_dir)):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(relevance_dir, filename), "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                course_id = data["course_id"]
+                model = CourseRelevanceModel(
+                    course_id,
+                    self._course_texts(course_id),
+                    data.get("keywords", []),
+                    threshold=settings.relevance_threshold,
+                    min_terms=settings.relevance_min_terms
+                )
+            except Exception as e:
+                print(f"Warning: Could not load relevance model '{filename}': {e}")
+                continue
+
+            self._models[course_id] = model
+            self._evaluations[course_id] = {
+                split: model.evaluate(data[split].get("on_topic", []), data[split].get("off_topic", []))
+                for split in ("eval", "holdout")
+                if split in data
+            }
+        return sorted(self._models.keys())
+
+    def get(self, course_id: str) -> Optional[CourseRelevanceModel]:
+        return self._models.get(course_id)
+
+    def check(self, course_id: str, message: str) -> bool:
+        """
+        False if the message should not be sent to the model
+        """
+        model = self._models.get(course_id)
+        if model is None:
+            return True
+
+        started = time.perf_counter()
+        relevant = model.is_relevant(message)
+        self._total_seconds += time.perf_counter() - started
+        self._checks[course_id] = self._checks.get(course_id, 0) + 1
+
+        if relevant:
+            RELEVANCE_DECISIONS.labels(course=course_id, decision="relevant").inc()
+            return True
+
+        self._off_topic[course_id] = self._off_topic.get(course_id, 0) + 1
+        RELEVANCE_DECISIONS.labels(course=course_id, decision="off_topic").inc()
+        return not self.enforcing
+
+    def stats(self) -> Dict[str, Any]:
+        checks = sum(self._checks.values())
+        off_topic = sum(self._off_topic.values())
+        return {
+            "mode": self.mode,
+            "checks": checks,
+            "off_topic": off_topic,
+            "bedrock_calls_avoided": off_topic if self.enforcing else 0,
+            "avg_check_us": round(self._total_seconds / checks * 1e6, 2) if checks else None,
+            "courses": {
+                course_id: {
+                    "stems": len(model),
+                    "threshold": model.threshold,
+                    "checks": self._checks.get(course_id, 0),
+                    "off_topic": self._off_topic.get(course_id, 0),
+                    "evaluation": self._evaluations.get(course_id)
+                }
+                for course_id, model in self._models.items()
+            }
+        }
+
+# Global relevance filter, filled at startup
+relevance_filter = RelevanceFilter(mode=settings.relevance_filter_mode)
@@ -0,0 +1,182 @@
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+from .embeddings import (
+    asks_same,
+    embed_sparse,
+    is_negated,
+    normalize_message,
+    sparse_cosine_similarity,
+    term_stems
+)
+from ..config import settings
+
+@dataclass
+class CacheEntry:
+    """Cached answer for a normalized question"""
+    embedding: Dict[int, float]
+    stems: FrozenSet[str]
+    negated: bool
+    answer: str
+    expires_at: float
+
+class SemanticAnswerCache:
+    """
+    LRU + TTL cache of assistant answers keyed by course, step and question.
+
+    Lookups first try the exact normalized question, then the most similar
+    cached question in the same course/step above the similarity threshold
+    that contains all of the query's content words and the same negation.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: int,
+        similarity_threshold: float
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        # scope -> normalized message -> entry
+        self._scopes: Dict[Tuple, Dict[str, CacheEntry]] = {}
+        # (scope, normalized message) in least recently used order
+        self._lru: "OrderedDict[Tuple, None]" = OrderedDict()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _scope(self, course_id: str, step_id: Optional[int], context: Optional[str]) -> Tuple:
+        context_hash = hashlib.sha256(normalize_message(context or "").encode("utf-8")).hexdigest()[:16]
+        return (course_id, step_id, context_hash)
+
+    def _remove(self, scope: Tuple, normalized: str) -> None:
+        entries = self._scopes.get(scope)
+        if entries is not None:
+            entries.pop(normalized, None)
+            if not entries:
+                del self._scopes[scope]
+        self._lru.pop((scope, normalized), None)
+
+    def _touch(self, scope: Tuple, normalized: str) -> None:
+        self._lru.move_to_end((scope, normalized))
+
+    def get(
+        self,
+        course_id: str,
+        step_id: Optional[int],
+        message: str,
+        context: Optional[str] = None,
+        similarity_threshold: Optional[float] = None
+    ) -> Optional[str]:
+        """
+        Get a cached answer for the question, or None on a miss
+        """
+        now = time.time()
+        scope = self._scope(course_id, step_id, context)
+        normalized = normalize_message(message)
+        threshold = similarity_threshold if similarity_threshold is not None else self.similarity_threshold
+        entries = self._scopes.get(scope, {})
+
+        # Drop expired entries of this scope
+        for key in [k for k, e in entries.items() if e.expires_at <= now]:
+            self._remove(scope, key)
+            self.expirations += 1
+        entries = self._scopes.get(scope, {})
+
+        entry = entries.get(normalized)
+        if entry is not None:
+            self._touch(scope, normalized)
+            self.hits += 1
+            return entry.answer
+
+        if entries:
+            embedding = embed_sparse(normalized)
+            stems, negated = term_stems(normalized), is_negated(normalized)
+            best_key, best_score = None, threshold
+            for key, candidate in entries.items():
+                score = sparse_cosine_similarity(embedding, candidate.embedding)
+                if score >= best_score and asks_same(stems, negated, candidate.stems, candidate.negated):
+                    best_key, best_score = key, score
+
+            if best_key is not None:
+                self._touch(scope, best_key)
+                self.hits += 1
+                self.semantic_hits += 1
+                return entries[best_key].answer
+
+        self.misses += 1
+        return None
+
+    def contains(
+        self,
+        course_id: str,
+        step_id: Optional[int],
+        message: str,
+        context: Optional[str] = None
+    ) -> bool:
+        """
+        Whether an unexpired answer is stored for exactly this question, without counting a lookup
+        """
+        entry = self._scopes.get(self._scope(course_id, step_id, context), {}).get(normalize_message(message))
+        return entry is not None and entry.expires_at > time.time()
+
+    def put(
+        self,
+        course_id: str,
+        step_id: Optional[int],
+        message: str,
+        answer: str,
+        context: Optional[str] = None,
+        ttl_seconds: Optional[int] = None
+    ) -> None:
+        """
+        Store an answer, evicting the least recently used entries if full
+        """
+        scope = self._scope(course_id, step_id, context)
+        normalized = normalize_message(message)
+        self._scopes.setdefault(scope, {})[normalized] = CacheEntry(
+            embedding=embed_sparse(normalized),
+            stems=term_stems(normalized),
+            negated=is_negated(normalized),
+            answer=answer,
+            expires_at=time.time() + (ttl_seconds or self.ttl_seconds)
+        )
+        self._lru[(scope, normalized)] = None
+        self._touch(scope, normalized)
+
+        while len(self._lru) > self.max_entries:
+            (old_scope, old_key), _ = self._lru.popitem(last=False)
+            self._remove(old_scope, old_key)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._scopes.clear()
+        self._lru.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._lru),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "similarity_threshold": self.similarity_threshold,
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+# Global answer cache
+answer_cache = SemanticAnswerCache(
+    max_entries=settings.semantic_cache_max_entries,
+    ttl_seconds=settings.semantic_cache_ttl_seconds,
+    similarity_threshold=settings.semantic_cache_similarity_threshold
+)
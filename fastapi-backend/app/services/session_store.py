@@ -0,0 +1,131 @@
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import settings
+from ..models import ChatMessage
+
+class SessionStore(ABC):
+    """
+    Storage for server-side chat sessions, so clients only send the new message
+    """
+
+    @abstractmethod
+    async def get_messages(self, key: str) -> Optional[List[ChatMessage]]:
+        """Stored messages of a session, or None if it does not exist"""
+
+    @abstractmethod
+    async def append_messages(self, key: str, messages: List[ChatMessage]) -> None:
+        """Append messages, keeping only the most recent ones"""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Forget a session"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__}
+
+class InMemorySessionStore(SessionStore):
+    """
+    Per-pod LRU session store with idle TTL, for a single replica.
+    Turns that land on another pod do not see the session.
+    """
+
+    def __init__(self, max_sessions: int, max_messages: int, ttl_seconds: int):
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, Tuple[List[ChatMessage], float]]" = OrderedDict()
+        self.evictions = 0
+
+    async def get_messages(self, key: str) -> Optional[List[ChatMessage]]:
+        entry = self._sessions.get(key)
+        if entry is None:
+            return None
+
+        messages, expires_at = entry
+        if expires_at <= time.time():
+            del self._sessions[key]
+            return None
+
+        self._sessions.move_to_end(key)
+        return list(messages)
+
+    async def append_messages(self, key: str, messages: List[ChatMessage]) -> None:
+        stored = (await self.get_messages(key) or []) + list(messages)
+        self._sessions[key] = (stored[-self.max_messages:], time.time() + self.ttl_seconds)
+        self._sessions.move_to_end(key)
+
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        self._sessions.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "evictions": self.evictions
+        }
+
+class RedisSessionStore(SessionStore):
+    """
+    Session store shared by all pods, for any Redis-compatible server
+    """
+
+    KEY_PREFIX = "chat-session:"
+
+    def __init__(self, url: str, max_messages: int, ttl_seconds: int):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url, decode_responses=True)
+        self.max_messages = max_messages
+        self.ttl_seconds = ttl_seconds
+
+    async def get_messages(self, key: str) -> Optional[List[ChatMessage]]:
+        items = await self._redis.lrange(self.KEY_PREFIX + key, 0, -1)
+        if not items:
+            return None
+        return [ChatMessage(**json.loads(item)) for item in items]
+
+    async def append_messages(self, key: str, messages: List[ChatMessage]) -> None:
+        redis_key = self.KEY_PREFIX + key
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(redis_key, *[message.model_dump_json() for message in messages])
+            pipe.ltrim(redis_key, -self.max_messages, -1)
+            pipe.expire(redis_key, self.ttl_seconds)
+            await pipe.execute()
+
+    async def delete(self, key: str) -> None:
+        await self._redis.delete(self.KEY_PREFIX + key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis"}
+
+def create_session_store() -> SessionStore:
+    """
+    Build the configured session store, falling back to memory if Redis is unavailable
+    """
+    if settings.session_store_backend == "redis":
+        try:
+            return RedisSessionStore(
+                url=settings.session_redis_url,
+                max_messages=settings.session_max_messages,
+                ttl_seconds=settings.session_ttl_seconds
+            )
+        except ImportError:
+            print("Warning: redis package not installed, using in-memory chat sessions")
+
+    return InMemorySessionStore(
+        max_sessions=settings.session_max_sessions,
+        max_messages=settings.session_max_messages,
+        ttl_seconds=settings.session_ttl_seconds
+    )
+
+# Global session store
+session_store = create_session_store()
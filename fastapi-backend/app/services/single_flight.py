@@ -0,0 +1,80 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from ..models import ChatRequest
+
+T = TypeVar("T")
+
+class _Call:
+    """In-flight call shared by every caller with the same key"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution.
+
+    The first caller starts the call as a task, later callers wait on the
+    same task and get the same result or exception. The task is cancelled
+    only when every caller waiting on it has been cancelled.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _forget(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.executed + self.coalesced
+        return {
+            "in_flight": len(self._calls),
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "coalesced_rate": round(self.coalesced / total, 4) if total else 0.0
+        }
+
+def chat_fingerprint(request: ChatRequest, model_id: Optional[str] = None, user_id: Optional[str] = None) -> str:
+    """
+    Stable fingerprint of the parts of a chat request that shape the answer.
+    user_id keeps each student's calls (and their scheduler share) apart,
+    None for answers shared by every student.
+    """
+    payload = {
+        "user_id": user_id,
+        "course_id": request.courseId,
+        "step_id": request.stepId,
+        "message": request.message.strip(),
+        "context": request.context or "",
+        "history": [[msg.role, msg.content] for msg in request.history],
+        "model_id": model_id
+    }
+    encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
@@ -0,0 +1,54 @@
+import re
+from typing import List, Optional
+
+import numpy as np
+
+from .embeddings import embed_terms
+from ..config import settings
+
+# "paso 3", "step #3", "paso número 3", "#3"
+STEP_NUMBER = re.compile(
+    r"(?:\b(?:paso|step|etapa)\s*(?:n(?:u|ú)mero|n[º°o]\.?|#)?\s*|#\s*)(\d+)\b",
+    re.IGNORECASE
+)
+# "el paso siguiente", "el próximo paso", "previous step"
+OTHER_STEP = re.compile(
+    r"\b(?:(?:paso|step|etapa)\s+(?:siguiente|anterior|pr[oó]xim[oa]|previ[oa]|next|previous|last)"
+    r"|(?:siguiente|anterior|pr[oó]xim[oa]|previ[oa]|[uú]ltim[oa]|next|previous|last)\s+(?:paso|step|etapa))\b",
+    re.IGNORECASE
+)
+
+class StepIntroMatcher:
+    """
+    Recognizes "explain this step" questions, however they are phrased, so
+    they share one cached answer per step under the canonical question.
+    """
+
+    def __init__(self, question: str, phrasings: List[str], threshold: float, dims: int = None):
+        self.question = question
+        self.threshold = threshold
+        self.dims = dims or settings.course_index_dimensions
+        texts = [question, *phrasings]
+        self._matrix = np.array([embed_terms(text, self.dims) for text in texts], dtype=np.float32)
+
+    def matches(self, message: str, step_id: Optional[int] = None) -> bool:
+        """
+        Whether the message asks for the introduction of step_id. Phrasings
+        like "Explícame el paso 3" score as high as "Explícame este paso", so
+        a question naming another step (by number or as the next or previous
+        one) never matches.
+        """
+        if OTHER_STEP.search(message):
+            return False
+        if any(int(number) != step_id for number in STEP_NUMBER.findall(message)):
+            return False
+
+        scores = self._matrix @ np.asarray(embed_terms(message, self.dims), dtype=np.float32)
+        return float(scores.max()) >= self.threshold
+
+# Global matcher for the configured intro question
+step_intro_matcher = StepIntroMatcher(
+    question=settings.step_intro_question,
+    phrasings=settings.step_intro_phrasings,
+    threshold=settings.step_intro_match_threshold
+)
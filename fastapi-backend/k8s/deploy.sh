@@ -76,6 +76,7 @@ deploy_app() {
     
     # Apply all manifests
     kubectl apply -f configmap.yaml
+    kubectl apply -f redis.yaml
     kubectl apply -f deployment.yaml
     kubectl apply -f service.yaml
     kubectl apply -f ingress.yaml
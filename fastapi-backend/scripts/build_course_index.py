@@ -0,0 +1,28 @@
+"""
+Build the course vector indexes used for retrieval.
+
+Embeds every corpus in data/courses/*.json into data/index/<course>.npy,
+which the API memory-maps at startup. Run from the fastapi-backend directory:
+
+    python -m scripts.build_course_index
+"""
+import glob
+import os
+import sys
+
+from app.config import settings
+from app.services.course_index import build_course_index
+
+def main() -> int:
+    sources = sorted(glob.glob(os.path.join(settings.course_data_dir, "*.json")))
+    if not sources:
+        print(f"No course corpora found in {settings.course_data_dir}")
+        return 1
+
+    for source in sources:
+        course_id = build_course_index(source, settings.course_index_dir)
+        print(f"Indexed {course_id} -> {settings.course_index_dir}/{course_id}.npy")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Generate the canonical FAQ answers served without a model call.
+
+Reads the per-step questions in data/faq/<course>.questions.json, asks the
+course agent (Bedrock) for each one and writes data/faq/<course>.answers.json.
+Existing answers are kept unless --refresh is given, so only new or edited
+questions are sent to the model. Needs AWS credentials with Bedrock access.
+Review the generated answers before committing them. Run from the
+fastapi-backend directory:
+
+    python -m scripts.build_faq_answers [--refresh]
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+from datetime import datetime
+
+from app.agents import AgentError, agent_registry
+from app.config import settings
+from app.models import UserInfo
+from app.services import course_indexes
+from app.services.faq_index import ANSWERS_SUFFIX
+
+QUESTIONS_SUFFIX = ".questions.json"
+
+FAQ_USER = UserInfo(
+    user_id="faq-generator",
+    email="faq@cloudacademy.local",
+    name="Estudiante",
+    username="faq-generator"
+)
+
+def _load_existing(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return {entry["id"]: entry for entry in json.load(f)["entries"]}
+
+async def build_course(questions_path: str, refresh: bool) -> int:
+    with open(questions_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    course_id = data["course_id"]
+    agent = agent_registry.get_agent(course_id)
+    answers_path = questions_path[:-len(QUESTIONS_SUFFIX)] + ANSWERS_SUFFIX
+    existing = {} if refresh else _load_existing(answers_path)
+
+    entries, failures = [], 0
+    for question in data["questions"]:
+        previous = existing.get(question["id"])
+        if previous and previous.get("question") == question["question"] and previous.get("answer"):
+            entries.append({**previous, "variants": question.get("variants", [])})
+            continue
+
+        try:
+            answer = await agent.process_message(
+                message=question["question"],
+                user_info=FAQ_USER,
+                step_id=question.get("step_id")
+            )
+        except AgentError as e:
+            print(f"  ✗ {question['id']}: {e.message}")
+            failures += 1
+            continue
+
+        print(f"  ✓ {question['id']}")
+        entries.append({
+            "id": question["id"],
+            "step_id": question.get("step_id"),
+            "question": question["question"],
+            "variants": question.get("variants", []),
+            "answer": answer.strip(),
+            "model_id": agent.model_id,
+            "generated_at": datetime.utcnow().isoformat()
+        })
+
+    with open(answers_path, "w", encoding="utf-8") as f:
+        json.dump({"course_id": course_id, "entries": entries}, f, ensure_ascii=False, indent=2)
+    print(f"{course_id}: {len(entries)} answers -> {answers_path}")
+    return failures
+
+async def main(refresh: bool) -> int:
+    sources = sorted(glob.glob(os.path.join(settings.faq_dir, f"*{QUESTIONS_SUFFIX}")))
+    if not sources:
+        print(f"No FAQ questions found in {settings.faq_dir}")
+        return 1
+
+    # Answers are generated with the same retrieved course material as live chat
+    course_indexes.load_all()
+    failures = 0
+    for source in sources:
+        failures += await build_course(source, refresh)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--refresh", action="store_true", help="regenerate every answer")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.refresh)))
@@ -0,0 +1,73 @@
+import os
+import sys
+
+import pytest
+
+# Settings use paths relative to fastapi-backend/ (data/courses, data/faq, ...)
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(BACKEND_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+from app.agents import BedrockRAGAgent
+from app.config import settings
+from app.services.chat_service import ChatService
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.fair_scheduler import FairScheduler
+from app.services.faq_index import FAQIndex
+from app.services.relevance import RelevanceFilter
+from app.services.semantic_cache import SemanticAnswerCache
+from app.services.session_store import InMemorySessionStore
+from app.services.step_intros import StepIntroMatcher
+from tests.fakes import FakeBedrockClient
+
+@pytest.fixture
+def fake_bedrock() -> FakeBedrockClient:
+    return FakeBedrockClient()
+
+@pytest.fixture
+def agent(fake_bedrock: FakeBedrockClient) -> BedrockRAGAgent:
+    return BedrockRAGAgent(bedrock_client=fake_bedrock)
+
+@pytest.fixture
+def breaker() -> CircuitBreaker:
+    return CircuitBreaker(
+        window_size=4,
+        min_calls=2,
+        failure_rate_threshold=0.5,
+        slow_call_seconds=30.0,
+        slow_call_rate_threshold=0.5,
+        open_seconds=0.05,
+        half_open_max_calls=2
+    )
+
+@pytest.fixture
+def chat_service(breaker: CircuitBreaker) -> ChatService:
+    """
+    Chat service with fresh state, so tests do not share caches or counters
+    """
+    return ChatService(
+        cache=SemanticAnswerCache(
+            max_entries=100,
+            ttl_seconds=60,
+            similarity_threshold=settings.semantic_cache_similarity_threshold
+        ),
+        sessions=InMemorySessionStore(max_sessions=100, max_messages=20, ttl_seconds=60),
+        breaker=breaker,
+        faq=FAQIndex(),
+        scheduler=FairScheduler(
+            capacity=lambda: 8,
+            max_in_flight_per_user=settings.fair_scheduler_max_in_flight_per_user,
+            max_in_flight_per_course=settings.fair_scheduler_max_in_flight_per_course,
+            max_queue_per_user=settings.fair_scheduler_max_queue_per_user,
+            queue_timeout=settings.fair_scheduler_queue_timeout_seconds,
+            course_weights={},
+            class_weights=settings.fair_scheduler_class_weights,
+            class_queue_timeouts=settings.fair_scheduler_class_queue_timeouts
+        ),
+        intros=StepIntroMatcher(
+            question=settings.step_intro_question,
+            phrasings=settings.step_intro_phrasings,
+            threshold=settings.step_intro_match_threshold
+        ),
+        relevance=RelevanceFilter(mode=settings.relevance_filter_mode)
+    )
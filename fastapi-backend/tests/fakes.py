@@ -0,0 +1,90 @@
+import asyncio
+import io
+import json
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from app.models import ChatRequest, UserInfo
+
+def make_user(user_id: str = "user-1", name: str = "Ana Pérez") -> UserInfo:
+    return UserInfo(
+        user_id=user_id,
+        email=f"{user_id}@example.com",
+        name=name,
+        username=user_id
+    )
+
+def make_request(message: str, step_id: int = 1, course_id: str = "bedrock-rag", **kwargs) -> ChatRequest:
+    return ChatRequest(message=message, courseId=course_id, stepId=step_id, **kwargs)
+
+class FakeBedrockClient:
+    """
+    Stand-in for the bedrock-runtime client.
+
+    Every call is answered with answer(request_body) after `delay` seconds
+    and recorded in `calls` as (model_id, request_body). Setting `release`
+    to a threading.Event holds every call until it is set.
+    """
+
+    def __init__(self, answer: Optional[Callable[[dict], str]] = None, delay: float = 0.0):
+        self.answer = answer or (lambda body: "Respuesta del modelo")
+        self.delay = delay
+        self.release: Optional[threading.Event] = None
+        self.calls: List[Tuple[str, dict]] = []
+        self.closed_streams = 0
+
+    def _start(self, model_id: str, body: str) -> dict:
+        request_body = json.loads(body)
+        self.calls.append((model_id, request_body))
+        if self.release is not None:
+            self.release.wait(5)
+        if self.delay:
+            time.sleep(self.delay)
+        return request_body
+
+    def invoke_model(self, modelId: str, body: str, contentType: str) -> dict:
+        request_body = self._start(modelId, body)
+        payload = {
+            "content": [{"type": "text", "text": self.answer(request_body)}],
+            "usage": {"input_tokens": 100, "output_tokens": 20}
+        }
+        return {"body": io.BytesIO(json.dumps(payload).encode("utf-8"))}
+
+    def invoke_model_with_response_stream(self, modelId: str, body: str, contentType: str) -> dict:
+        request_body = self._start(modelId, body)
+        events = [
+            {"type": "message_start", "message": {"usage": {"input_tokens": 100}}},
+            {"type": "content_block_delta", "delta": {"type": "text_delta", "text": self.answer(request_body)}},
+            {"type": "message_delta", "usage": {"output_tokens": 20}}
+        ]
+        return {"body": _FakeEventStream(self, events)}
+
+class _FakeEventStream:
+    def __init__(self, client: FakeBedrockClient, events: List[dict]):
+        self._client = client
+        self._events = events
+
+    def __iter__(self):
+        for event in self._events:
+            yield {"chunk": {"bytes": json.dumps(event).encode("utf-8")}}
+
+    def close(self) -> None:
+        self._client.closed_streams += 1
+
+def prompt_of(request_body: dict) -> str:
+    """
+    The current user turn of a recorded request body
+    """
+    return request_body["messages"][-1]["content"]
+
+async def wait_for_idle_limiter(timeout: float = 2.0) -> None:
+    """
+    Let worker threads abandoned by cancelled calls finish, they hold
+    their global limiter slot until then
+    """
+    from app.agents import bedrock_limiter
+
+    deadline = time.monotonic() + timeout
+    while bedrock_limiter.in_flight and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
@@ -0,0 +1,14 @@
+from app.agents import BedrockRAGAgent
+from app.config import settings
+
+def test_short_system_prompt_is_not_marked_for_caching(agent: BedrockRAGAgent):
+    blocks = agent._build_system_blocks(cache=True)
+
+    assert "cache_control" not in blocks[0]
+
+def test_long_system_prompt_is_marked_for_caching(agent: BedrockRAGAgent):
+    agent.system_prompt = "Material del curso. " * (settings.bedrock_prompt_cache_min_tokens // 2)
+
+    blocks = agent._build_system_blocks(cache=True)
+
+    assert blocks[0]["cache_control"] == {"type": "ephemeral"}
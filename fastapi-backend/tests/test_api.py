@@ -0,0 +1,20 @@
+from fastapi.testclient import TestClient
+
+from app.auth import get_current_user
+from app.main import app
+from tests.fakes import make_user
+
+client = TestClient(app)
+
+def test_stats_requires_authentication():
+    assert client.get("/api/bedrock/stats").status_code == 403
+
+def test_stats_for_signed_in_user():
+    app.dependency_overrides[get_current_user] = lambda: make_user()
+    try:
+        response = client.get("/api/bedrock/stats")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert "limiter" in response.json()
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import chat as chat_api
+from app.auth import get_current_user
+from app.config import settings
+from app.main import app
+from tests.fakes import make_user
+
+@pytest.fixture
+def batch_client():
+    app.dependency_overrides[get_current_user] = lambda: make_user()
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+def _items(count: int, **kwargs):
+    return [{"message": f"Pregunta {i}", "courseId": "bedrock-rag", "stepId": 1, **kwargs} for i in range(count)]
+
+def test_batch_concurrency_stays_within_the_per_user_cap(batch_client, monkeypatch: pytest.MonkeyPatch):
+    running = peak = 0
+
+    async def run(agent, request, user_info, request_class="interactive"):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return "ok"
+
+    monkeypatch.setattr(chat_api.chat_service, "run", run)
+
+    response = batch_client.post("/api/bedrock/chat/batch", json={"items": _items(8), "concurrency": 8})
+
+    assert response.status_code == 200
+    assert response.json()["succeeded"] == 8
+    assert peak == settings.fair_scheduler_max_in_flight_per_user
+
+def test_batch_items_with_a_session_are_rejected(batch_client):
+    response = batch_client.post("/api/bedrock/chat/batch", json={"items": _items(2, sessionId="abc")})
+
+    assert response.status_code == 400
+    assert "sessionId" in response.json()["detail"]
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.agents import bedrock_agent
+from app.agents.concurrency_limiter import AdaptiveConcurrencyLimiter
+from app.agents.context_packer import estimate_tokens
+from app.config import settings
+from tests.fakes import make_user, wait_for_idle_limiter
+
+QUESTION = "¿Qué es una Knowledge Base?"
+
+def _process(agent):
+    return agent.process_message(QUESTION, make_user(), step_id=1)
+
+async def _stream(agent):
+    return [text async for text in agent.stream_message(QUESTION, make_user(), step_id=1)]
+
+async def _cancel_after(coro, seconds: float = 0.05) -> None:
+    task = asyncio.ensure_future(coro)
+    await asyncio.sleep(seconds)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+@pytest.fixture
+def held_calls(fake_bedrock):
+    # Model calls block in their worker thread until the test ends
+    fake_bedrock.release = threading.Event()
+    yield fake_bedrock
+    fake_bedrock.release.set()
+
+@pytest.fixture
+def full_limiter(monkeypatch: pytest.MonkeyPatch):
+    # A single Bedrock slot, taken by someone else
+    limiter = AdaptiveConcurrencyLimiter(
+        initial_limit=1, min_limit=1, max_limit=1, decrease_factor=0.5,
+        latency_threshold=30.0, queue_timeout=5.0, max_queue=10
+    )
+    monkeypatch.setattr(bedrock_agent, "bedrock_limiter", limiter)
+    return limiter
+
+@pytest.mark.parametrize("call", [_process, _stream])
+def test_cancelled_while_queued_saves_the_whole_call(agent, fake_bedrock, full_limiter, call):
+    async def main():
+        await full_limiter.acquire()
+        await _cancel_after(call(agent))
+
+    asyncio.run(main())
+
+    stats = agent.cancellations.stats()
+    assert stats["cancelled"] == {"queued": 1}
+    assert stats["saved_input_tokens"] >= estimate_tokens(agent.system_prompt) + estimate_tokens(QUESTION)
+    assert stats["saved_output_tokens"] == settings.bedrock_max_output_tokens
+    assert fake_bedrock.calls == []
+    assert full_limiter.queue_depth == 0
+
+@pytest.mark.parametrize("call", [_process, _stream])
+def test_cancelled_while_generating_saves_the_rest_of_the_answer(agent, held_calls, call):
+    async def main():
+        await _cancel_after(call(agent))
+        held_calls.release.set()
+        await wait_for_idle_limiter()
+
+    asyncio.run(main())
+
+    stats = agent.cancellations.stats()
+    assert stats["cancelled"] == {"generating": 1}
+    assert stats["saved_input_tokens"] == 0
+    assert stats["saved_output_tokens"] == settings.bedrock_max_output_tokens
+    assert len(held_calls.calls) == 1
+
+def test_cancelled_invoke_model_is_in_flight_and_saves_nothing(agent, held_calls, monkeypatch):
+    monkeypatch.setattr(settings, "bedrock_cancellable_calls", False)
+
+    async def main():
+        await _cancel_after(_process(agent))
+        held_calls.release.set()
+        await wait_for_idle_limiter()
+
+    asyncio.run(main())
+
+    stats = agent.cancellations.stats()
+    assert stats["cancelled"] == {"in_flight": 1}
+    assert stats["saved_input_tokens"] == stats["saved_output_tokens"] == 0
+
+def test_expected_answer_size_comes_from_past_usage(agent, held_calls):
+    async def main():
+        held_calls.release.set()
+        await _process(agent)
+        held_calls.release.clear()
+        await _cancel_after(_process(agent))
+        held_calls.release.set()
+        await wait_for_idle_limiter()
+
+    asyncio.run(main())
+
+    # The fake answers report 20 output tokens
+    assert agent.cancellations.stats()["saved_output_tokens"] == 20
+
+def test_completed_calls_are_not_counted(agent):
+    async def main():
+        await _process(agent)
+        await _stream(agent)
+
+    asyncio.run(main())
+
+    assert agent.cancellations.stats()["total"] == 0
@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+from app.services.chat_jobs import ChatJobRunner, InMemoryJobStore
+from tests.fakes import make_request, make_user
+
+def _runner(chat_service, store: InMemoryJobStore) -> ChatJobRunner:
+    return ChatJobRunner(service=chat_service, store=store, workers=1, max_queue=10, poll_interval=0.02)
+
+def test_wait_on_another_pod_returns_when_the_job_finishes(chat_service, agent):
+    # Two pods sharing one store, as with Redis
+    store = InMemoryJobStore(max_jobs=100, ttl_seconds=60)
+    user = make_user()
+
+    async def main():
+        accepting = _runner(chat_service, store)
+        polled = _runner(chat_service, store)
+        await accepting.start()
+        try:
+            job = await accepting.submit(agent, make_request("¿Qué es RAG?"), user)
+            started = time.monotonic()
+            finished = await polled.wait(job.job_id, user, timeout=5)
+            return finished, time.monotonic() - started
+        finally:
+            await accepting.stop()
+
+    job, waited = asyncio.run(main())
+
+    assert job.status == "succeeded"
+    assert job.message == "Respuesta del modelo"
+    assert waited < 1
+
+def test_wait_on_an_unknown_job_does_not_sleep(chat_service):
+    runner = _runner(chat_service, InMemoryJobStore(max_jobs=100, ttl_seconds=60))
+
+    async def main():
+        started = time.monotonic()
+        job = await runner.wait("missing", make_user(), timeout=5)
+        return job, time.monotonic() - started
+
+    job, waited = asyncio.run(main())
+
+    assert job is None
+    assert waited < 1
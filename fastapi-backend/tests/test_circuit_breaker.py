@@ -0,0 +1,148 @@
+import asyncio
+import threading
+import time
+
+from app.agents import AgentError
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from tests.fakes import FakeBedrockClient, make_request, make_user, wait_for_idle_limiter
+
+def _trip(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.min_calls):
+        permit = breaker.allow_request()
+        assert permit is not None
+        breaker.record(permit, failed=True, seconds=0.1)
+
+def _half_open(breaker: CircuitBreaker) -> None:
+    _trip(breaker)
+    time.sleep(breaker.open_seconds)
+    assert breaker.state == HALF_OPEN
+
+def test_failures_open_the_circuit(breaker: CircuitBreaker):
+    _trip(breaker)
+
+    assert breaker.state == OPEN
+    assert breaker.allow_request() is None
+
+def test_successful_probes_close_it(breaker: CircuitBreaker):
+    _half_open(breaker)
+
+    for _ in range(breaker.half_open_max_calls):
+        permit = breaker.allow_request()
+        assert permit is not None
+        breaker.record(permit, failed=False, seconds=0.1)
+
+    assert breaker.state == CLOSED
+
+def test_failed_probe_reopens_it(breaker: CircuitBreaker):
+    _half_open(breaker)
+
+    permit = breaker.allow_request()
+    assert permit is not None
+    breaker.record(permit, failed=True, seconds=0.1)
+
+    assert breaker.state == OPEN
+
+def test_cancelled_probe_frees_its_slot(breaker: CircuitBreaker):
+    _half_open(breaker)
+    permits = [breaker.allow_request() for _ in range(breaker.half_open_max_calls)]
+    assert None not in permits
+    assert breaker.allow_request() is None
+
+    breaker.record_cancelled(permits[0])
+
+    assert breaker.allow_request() is not None
+
+def test_calls_admitted_while_closed_do_not_close_it(breaker: CircuitBreaker):
+    early = [breaker.allow_request() for _ in range(breaker.half_open_max_calls)]
+    _half_open(breaker)
+
+    for permit in early:
+        breaker.record(permit, failed=False, seconds=0.1)
+
+    assert breaker.state == HALF_OPEN
+
+def test_cancelled_calls_admitted_while_closed_free_no_probe_slot(breaker: CircuitBreaker):
+    early = breaker.allow_request()
+    _half_open(breaker)
+    for _ in range(breaker.half_open_max_calls):
+        assert breaker.allow_request() is not None
+
+    breaker.record_cancelled(early)
+
+    assert breaker.allow_request() is None
+
+def test_probes_without_a_result_reopen_it(breaker: CircuitBreaker):
+    _half_open(breaker)
+    for _ in range(breaker.half_open_max_calls):
+        assert breaker.allow_request() is not None
+
+    time.sleep(breaker.open_seconds)
+
+    # Re-opened, then half-open again with fresh probe slots
+    assert breaker.state == OPEN
+    time.sleep(breaker.open_seconds)
+    assert breaker.allow_request() is not None
+
+def test_client_disconnects_do_not_wedge_the_circuit(chat_service, agent, fake_bedrock: FakeBedrockClient, breaker):
+    _half_open(breaker)
+    fake_bedrock.release = threading.Event()
+
+    async def cancelled_probe(index: int) -> None:
+        request = make_request(f"Explícame el chunking semántico, variante {index}")
+        task = asyncio.ensure_future(chat_service.run(agent, request, make_user(f"user-{index}")))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def main() -> str:
+        for index in range(breaker.half_open_max_calls + 1):
+            await cancelled_probe(index)
+        fake_bedrock.release.set()
+        answer = await chat_service.run(agent, make_request("¿Qué es una Knowledge Base?"), make_user())
+        await wait_for_idle_limiter()
+        return answer
+
+    try:
+        assert asyncio.run(main()) == "Respuesta del modelo"
+    except AgentError as e:
+        raise AssertionError(f"Circuit stuck after cancelled probes: {e.error_code}")
+    finally:
+        fake_bedrock.release.set()
+
+def _saturate(chat_service) -> None:
+    # Every scheduler slot held by a hung call, as during an outage
+    chat_service.scheduler._capacity = lambda: 1
+    chat_service.scheduler._take("someone-else", "bedrock-rag")
+
+def _store_fallback(chat_service) -> None:
+    # Only close enough for the looser fallback threshold, so the model path is taken
+    chat_service.cache.put(
+        "bedrock-rag", 1, "¿Qué es el chunking semántico en Knowledge Bases de Amazon Bedrock?", "Respuesta guardada"
+    )
+
+def test_open_circuit_falls_back_without_queueing(chat_service, agent, fake_bedrock, breaker):
+    question = "¿Qué es el chunking semántico?"
+    _store_fallback(chat_service)
+    _trip(breaker)
+    _saturate(chat_service)
+
+    async def main():
+        return await asyncio.wait_for(chat_service.run(agent, make_request(question), make_user()), 1)
+
+    assert asyncio.run(main()) == "Respuesta guardada"
+    assert fake_bedrock.calls == []
+    assert chat_service.scheduler.queue_depth == 0
+
+def test_open_circuit_streams_the_fallback_without_queueing(chat_service, agent, fake_bedrock, breaker):
+    question = "¿Qué es el chunking semántico?"
+    _store_fallback(chat_service)
+    _trip(breaker)
+    _saturate(chat_service)
+
+    async def main():
+        async def collect():
+            return [chunk async for chunk in chat_service.stream(agent, make_request(question), make_user())]
+        return await asyncio.wait_for(collect(), 1)
+
+    assert asyncio.run(main()) == ["Respuesta guardada"]
+    assert fake_bedrock.calls == []
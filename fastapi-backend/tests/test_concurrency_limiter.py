@@ -0,0 +1,138 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.agents import AgentError
+from app.agents.concurrency_limiter import AdaptiveConcurrencyLimiter
+from app.agents.executor import BedrockExecutor
+
+def _limiter(**kwargs) -> AdaptiveConcurrencyLimiter:
+    options = dict(
+        initial_limit=4,
+        min_limit=1,
+        max_limit=8,
+        decrease_factor=0.5,
+        latency_threshold=1.0,
+        queue_timeout=0.05,
+        max_queue=2
+    )
+    options.update(kwargs)
+    return AdaptiveConcurrencyLimiter(**options)
+
+def _calls(limiter: AdaptiveConcurrencyLimiter, count: int, **release) -> None:
+    async def main():
+        for _ in range(count):
+            await limiter.acquire()
+            limiter.release(**release)
+
+    asyncio.run(main())
+
+def test_successful_calls_grow_the_limit_additively():
+    limiter = _limiter()
+
+    # About one more slot per limit's worth of successes
+    _calls(limiter, 4)
+    assert limiter.limit == 4
+    _calls(limiter, 1)
+    assert limiter.limit == 5
+
+def test_limit_stops_at_the_maximum():
+    limiter = _limiter()
+
+    _calls(limiter, 100)
+
+    assert limiter.limit == limiter.max_limit
+
+def test_throttling_cuts_the_limit_multiplicatively():
+    limiter = _limiter()
+
+    _calls(limiter, 1, throttled=True)
+    assert limiter.limit == 2
+    _calls(limiter, 5, throttled=True)
+    assert limiter.limit == limiter.min_limit
+    assert limiter.throttles == 6
+
+def test_slow_calls_cut_the_limit():
+    limiter = _limiter()
+
+    _calls(limiter, 1, latency=2.0)
+
+    assert limiter.limit == 2
+    assert limiter.latency_spikes == 1
+
+def test_queued_call_times_out():
+    limiter = _limiter(initial_limit=1)
+
+    async def main():
+        await limiter.acquire()
+        with pytest.raises(AgentError) as error:
+            await limiter.acquire()
+        return error.value.error_code
+
+    assert asyncio.run(main()) == "ConcurrencyQueueTimeout"
+    assert limiter.timeouts == 1
+    assert limiter.queue_depth == 0
+
+def test_full_queue_is_rejected():
+    limiter = _limiter(initial_limit=1, max_queue=1, queue_timeout=1.0)
+
+    async def main():
+        await limiter.acquire()
+        waiting = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        try:
+            with pytest.raises(AgentError) as error:
+                await limiter.acquire()
+            return error.value.error_code
+        finally:
+            limiter.release()
+            await waiting
+
+    assert asyncio.run(main()) == "ConcurrencyLimitExceeded"
+    assert limiter.rejected == 1
+
+def test_released_slot_goes_to_the_next_waiter():
+    limiter = _limiter(initial_limit=1, queue_timeout=1.0)
+
+    async def main():
+        await limiter.acquire()
+        waiting = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        limiter.release()
+        await waiting
+        return limiter.in_flight
+
+    assert asyncio.run(main()) == 1
+
+def test_cancelled_call_keeps_its_slot_until_the_worker_thread_ends():
+    limiter = _limiter()
+    executor = BedrockExecutor(max_workers=2)
+    unblock = threading.Event()
+
+    async def call():
+        async with limiter.slot() as slot:
+            return await executor.run(unblock.wait, 5, worker_started=slot.hold_until)
+
+    async def main():
+        task = asyncio.ensure_future(call())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        while_running = (limiter.in_flight, executor.in_flight)
+
+        unblock.set()
+        for _ in range(100):
+            if not limiter.in_flight:
+                break
+            await asyncio.sleep(0.01)
+        return while_running, (limiter.in_flight, executor.in_flight)
+
+    try:
+        while_running, after = asyncio.run(main())
+    finally:
+        unblock.set()
+        executor.shutdown()
+
+    assert while_running == (1, 1)
+    assert after == (0, 0)
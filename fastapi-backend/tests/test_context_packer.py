@@ -0,0 +1,85 @@
+import asyncio
+
+from app.agents.context_packer import MESSAGE_OVERHEAD_TOKENS, ContextPacker, estimate_tokens
+from app.models import ChatMessage
+from tests.fakes import make_request, make_user, prompt_of
+
+def _turns(count: int, chars: int = 40):
+    # Alternating user/assistant turns of `chars` characters each
+    return [
+        ChatMessage(role="user" if i % 2 == 0 else "assistant", content=f"{i:02d}" + "x" * (chars - 2))
+        for i in range(count)
+    ]
+
+def _cost(chars: int = 40) -> int:
+    return estimate_tokens("x" * chars) + MESSAGE_OVERHEAD_TOKENS
+
+def test_everything_fits_within_the_budget():
+    history = _turns(4)
+
+    packed = ContextPacker(token_budget=1000).pack(history, reserved_tokens=100)
+
+    assert packed.messages == history
+    assert packed.packed_tokens == 4 * _cost()
+    assert packed.dropped_messages == 0
+
+def test_oldest_turns_are_dropped_first():
+    history = _turns(6)
+
+    # Room for exactly three messages, the oldest of which is an assistant turn
+    packed = ContextPacker(token_budget=3 * _cost() + 10).pack(history, reserved_tokens=10)
+
+    # The leading assistant turn is dropped too, the history starts with a user turn
+    assert packed.messages == history[4:]
+    assert packed.messages[0].role == "user"
+    assert packed.packed_tokens == 2 * _cost()
+    assert packed.dropped_messages == 4
+    assert packed.dropped_tokens == 4 * _cost()
+
+def test_a_message_that_does_not_fit_stops_packing():
+    history = _turns(2) + [ChatMessage(role="user", content="y" * 4000)] + _turns(2)
+
+    packed = ContextPacker(token_budget=200).pack(history, reserved_tokens=0)
+
+    # Older messages that would fit are not packed around the large one
+    assert packed.messages == history[3:]
+    assert packed.dropped_messages == 3
+
+def test_history_larger_than_the_budget_keeps_the_newest_turns():
+    history = _turns(100)
+
+    packed = ContextPacker(token_budget=10 * _cost()).pack(history, reserved_tokens=0)
+
+    assert packed.messages == history[-10:]
+    assert packed.packed_tokens <= 10 * _cost()
+    assert packed.dropped_messages == 90
+
+def test_reserved_tokens_over_the_budget_pack_nothing():
+    history = _turns(4)
+    packer = ContextPacker(token_budget=100)
+
+    packed = packer.pack(history, reserved_tokens=500)
+
+    assert packed.messages == []
+    assert packed.packed_tokens == 0
+    assert packed.dropped_messages == 4
+    assert packed.dropped_tokens == 4 * _cost()
+    assert packer.stats()["dropped_messages"] == 4
+
+def test_no_history():
+    packed = ContextPacker(token_budget=100).pack([], reserved_tokens=10)
+
+    assert packed.messages == []
+    assert packed.dropped_messages == 0
+
+def test_system_prompt_over_the_budget_sends_only_the_current_turn(chat_service, agent, fake_bedrock):
+    agent.context_packer = ContextPacker(token_budget=estimate_tokens(agent.system_prompt) // 2)
+    request = make_request("¿Y eso cuánto cuesta?", history=_turns(4))
+
+    asyncio.run(chat_service.run(agent, request, make_user()))
+
+    (_, body), = fake_bedrock.calls
+    assert len(body["messages"]) == 1
+    assert "¿Y eso cuánto cuesta?" in prompt_of(body)
+    assert body["system"][0]["text"] == agent.system_prompt.strip()
+    assert agent.context_packer.stats()["dropped_messages"] == 4
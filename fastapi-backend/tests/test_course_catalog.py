@@ -0,0 +1,55 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.services import course_catalog
+from app.services.course_catalog import build_snapshot
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+def test_courses_keep_their_schema(client):
+    response = client.get("/api/bedrock/courses")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "courses": settings.supported_courses,
+        "total": len(settings.supported_courses)
+    }
+    assert "max-age=" in response.headers["cache-control"]
+
+def test_course_info_keeps_its_schema(client):
+    response = client.get("/api/bedrock/courses/bedrock-rag/info")
+
+    assert response.status_code == 200
+    assert set(response.json()) == {"name", "description", "steps", "duration", "difficulty"}
+
+def test_unknown_course_is_not_found(client):
+    assert client.get("/api/bedrock/courses/no-existe/info").status_code == 404
+
+@pytest.mark.parametrize("path", ["/api/bedrock/courses", "/api/bedrock/courses/bedrock-rag/info"])
+def test_matching_etag_gets_not_modified(client, path):
+    etag = client.get(path).headers["etag"]
+
+    response = client.get(path, headers={"If-None-Match": f"W/{etag}"})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+def test_database_rows_fill_the_course_info():
+    rows = [{"id": "rag-amazon-bedrock", "title": "RAG en Bedrock", "description": None, "duration": "5 horas"}]
+
+    snapshot = build_snapshot(rows, source="database")
+
+    info = snapshot.get_info("bedrock-rag")
+    default = course_catalog.snapshot.get_info("bedrock-rag")
+    assert info.etag != default.etag
+    assert b'"name": "RAG en Bedrock"' in info.body
+    assert b'"duration": "5 horas"' in info.body
+    assert b'"steps": 7' in info.body
+    assert snapshot.get_info("rag-amazon-bedrock") is None
+    assert not snapshot.same_content(course_catalog.snapshot)
+    assert snapshot.same_content(build_snapshot(rows, source="database"))
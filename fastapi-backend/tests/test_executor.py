@@ -0,0 +1,105 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.agents.executor import BedrockExecutor
+
+@pytest.fixture
+def executor():
+    executor = BedrockExecutor(max_workers=1)
+    yield executor
+    executor.shutdown()
+
+def _fail():
+    raise ValueError("boom")
+
+def test_run_returns_the_result_off_the_event_loop(executor):
+    loop_thread = threading.get_ident()
+
+    result = asyncio.run(executor.run(lambda: threading.get_ident()))
+
+    assert result != loop_thread
+    assert executor.stats() == {"max_workers": 1, "in_flight": 0, "completed": 1, "failed": 0}
+
+def test_run_raises_the_worker_exception(executor):
+    with pytest.raises(ValueError):
+        asyncio.run(executor.run(_fail))
+
+    assert executor.stats()["failed"] == 1
+    assert executor.in_flight == 0
+
+def test_stream_yields_items_in_order(executor):
+    async def main():
+        return [item async for item in executor.stream(lambda: iter(range(5)))]
+
+    assert asyncio.run(main()) == [0, 1, 2, 3, 4]
+    assert executor.stats()["completed"] == 1
+
+def test_stream_raises_the_iterator_exception(executor):
+    def items():
+        yield 1
+        raise ValueError("boom")
+
+    async def main():
+        received = []
+        with pytest.raises(ValueError):
+            async for item in executor.stream(items):
+                received.append(item)
+        return received
+
+    assert asyncio.run(main()) == [1]
+
+def test_closing_a_stream_stops_its_worker(executor):
+    produced = []
+    closed = threading.Event()
+
+    def items():
+        for item in range(1000):
+            produced.append(item)
+            yield item
+            # Hold the worker until the consumer has closed the stream
+            closed.wait(5)
+
+    async def main():
+        stream = executor.stream(items)
+        async for item in stream:
+            break
+        await stream.aclose()
+        closed.set()
+        for _ in range(100):
+            if not executor.in_flight:
+                break
+            await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+
+    assert executor.in_flight == 0
+    assert produced == [0, 1]
+
+def test_shutdown_rejects_new_work(executor):
+    executor.shutdown()
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(executor.run(lambda: 1))
+    assert executor.in_flight == 0
+
+def test_shutdown_cancels_queued_work_and_lets_running_calls_finish(executor):
+    unblock = threading.Event()
+
+    async def main():
+        running = asyncio.ensure_future(executor.run(unblock.wait, 5))
+        queued = asyncio.ensure_future(executor.run(lambda: "never"))
+        await asyncio.sleep(0.05)
+
+        executor.shutdown()
+        unblock.set()
+        return await asyncio.gather(running, queued, return_exceptions=True)
+
+    running, queued = asyncio.run(main())
+
+    assert running is True
+    assert isinstance(queued, asyncio.CancelledError)
+    assert executor.stats()["completed"] == 1
+    assert executor.stats()["failed"] == 1
+    assert executor.in_flight == 0
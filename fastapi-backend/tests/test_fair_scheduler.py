@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from app.agents import AgentError
+from app.config import settings
+from app.services.fair_scheduler import FairScheduler
+
+def _scheduler(capacity: int = 1, queue_timeout: float = 1.0, **kwargs) -> FairScheduler:
+    options = dict(
+        capacity=lambda: capacity,
+        max_in_flight_per_user=settings.fair_scheduler_max_in_flight_per_user,
+        max_in_flight_per_course=100,
+        max_queue_per_user=settings.fair_scheduler_max_queue_per_user,
+        queue_timeout=queue_timeout,
+        course_weights={},
+        class_weights=settings.fair_scheduler_class_weights,
+        class_queue_timeouts={}
+    )
+    options.update(kwargs)
+    return FairScheduler(**options)
+
+def test_interactive_request_overtakes_a_batch_backlog():
+    async def scenario():
+        scheduler = _scheduler(capacity=1)
+        order = []
+        release = asyncio.Event()
+
+        async def work(user_id: str, request_class: str, name: str):
+            async with scheduler.slot(user_id, "bedrock-rag", request_class):
+                order.append(name)
+                await release.wait()
+
+        blocker = asyncio.create_task(work("other", "interactive", "blocker"))
+        await asyncio.sleep(0)
+        batch = [asyncio.create_task(work("batcher", "batch", f"batch-{i}")) for i in range(4)]
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(work("student", "interactive", "interactive"))
+        await asyncio.sleep(0)
+
+        release.set()
+        await asyncio.gather(blocker, *batch, interactive)
+        return order
+
+    order = asyncio.run(scenario())
+
+    assert order[0] == "blocker"
+    assert order.index("interactive") < order.index("batch-1")
+
+def test_class_queue_deadline_overrides_the_default():
+    # More concurrent items than the per-user cap, the extra ones wait for the user's own calls
+    per_user = settings.fair_scheduler_max_in_flight_per_user
+    items = per_user + 2
+
+    async def scenario(class_queue_timeouts):
+        scheduler = _scheduler(
+            capacity=items,
+            queue_timeout=0.05,
+            class_queue_timeouts=class_queue_timeouts
+        )
+
+        async def item():
+            async with scheduler.slot("batcher", "bedrock-rag", "batch"):
+                await asyncio.sleep(0.1)
+
+        return await asyncio.gather(*(item() for _ in range(items)), return_exceptions=True)
+
+    results = asyncio.run(scenario({}))
+    assert sum(isinstance(r, AgentError) for r in results) == items - per_user
+
+    results = asyncio.run(scenario({"batch": 1.0}))
+    assert not any(isinstance(r, Exception) for r in results)
+
+def test_queue_full_is_rejected():
+    async def scenario():
+        scheduler = _scheduler(capacity=1, max_in_flight_per_user=1, max_queue_per_user=1)
+        await scheduler.acquire("student", "bedrock-rag", "interactive")
+        waiting = asyncio.create_task(scheduler.acquire("student", "bedrock-rag", "interactive"))
+        await asyncio.sleep(0)
+        with pytest.raises(AgentError):
+            await scheduler.acquire("student", "bedrock-rag", "interactive")
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+
+    asyncio.run(scenario())
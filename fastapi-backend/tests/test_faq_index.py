@@ -0,0 +1,28 @@
+import json
+
+import pytest
+
+from app.services.faq_index import CourseFAQ
+
+@pytest.fixture(scope="module")
+def faq() -> CourseFAQ:
+    """
+    The committed FAQ questions, each answered with its own id
+    """
+    with open("data/faq/bedrock-rag.questions.json", "r", encoding="utf-8") as f:
+        questions = json.load(f)["questions"]
+    return CourseFAQ("bedrock-rag", [{**question, "answer": question["id"]} for question in questions])
+
+def test_paraphrase_matches(faq: CourseFAQ):
+    match = faq.match("¿Qué es una knowledge base?", step_id=1)
+
+    assert match is not None and match.faq_id == "s1-que-es-kb"
+
+def test_other_verb_does_not_match(faq: CourseFAQ):
+    assert faq.match("¿Cómo borro una Knowledge Base?", step_id=1) is None
+
+def test_negated_question_does_not_match(faq: CourseFAQ):
+    assert faq.match("¿Qué modelo NO debo usar?", step_id=4) is None
+
+def test_other_steps_are_ignored(faq: CourseFAQ):
+    assert faq.match("¿Qué es una Knowledge Base?", step_id=3) is None
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.agents import BedrockRAGAgent, bedrock_limiter
+from app.agents.hedging import HedgingPolicy
+from tests.fakes import FakeBedrockClient, make_user
+
+def _hedged_agent(primary: FakeBedrockClient, hedge: FakeBedrockClient) -> BedrockRAGAgent:
+    agent = BedrockRAGAgent(bedrock_client=primary, hedge_client=hedge)
+    agent.hedging = HedgingPolicy(enabled=True, percentile=95.0, min_delay=0.05, min_samples=20, max_hedge_rate=1.0)
+    return agent
+
+def _hedge_calls(model_id: str) -> float:
+    return REGISTRY.get_sample_value(
+        "bedrock_call_duration_seconds_count",
+        {"model": model_id, "mode": "hedge", "outcome": "success"}
+    ) or 0.0
+
+def test_slow_call_is_hedged_with_the_routed_model():
+    primary = FakeBedrockClient(answer=lambda body: "primaria", delay=0.5)
+    hedge = FakeBedrockClient(answer=lambda body: "hedge")
+    agent = _hedged_agent(primary, hedge)
+    model_id = agent.model_router.route("¿Qué es RAG?", [])
+    before = _hedge_calls(model_id)
+
+    async def main():
+        answer = await agent.process_message("¿Qué es RAG?", make_user())
+        # The losing primary still runs in its worker thread and keeps its slot
+        loser_in_flight = bedrock_limiter.in_flight
+        await asyncio.sleep(0.6)
+        return answer, loser_in_flight
+
+    answer, loser_in_flight = asyncio.run(main())
+
+    assert answer == "hedge"
+    assert [model for model, _ in hedge.calls] == [model_id]
+    assert _hedge_calls(model_id) == before + 1
+    assert loser_in_flight == 1
+    assert bedrock_limiter.in_flight == 0
+
+def test_no_hedge_without_a_free_limiter_slot(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(bedrock_limiter, "_limit", 1.0)
+    primary = FakeBedrockClient(answer=lambda body: "primaria", delay=0.2)
+    hedge = FakeBedrockClient(answer=lambda body: "hedge")
+    agent = _hedged_agent(primary, hedge)
+
+    answer = asyncio.run(agent.process_message("¿Qué es RAG?", make_user()))
+
+    assert answer == "primaria"
+    assert hedge.calls == []
+    assert agent.hedging.no_capacity == 1
+
+def test_streams_do_not_feed_the_hedge_delay(agent: BedrockRAGAgent):
+    async def main():
+        return [text async for text in agent.stream_message("¿Qué es RAG?", make_user())]
+
+    asyncio.run(main())
+    model_id = agent.model_router.route("¿Qué es RAG?", [])
+
+    assert agent.model_router.latency(model_id).count == 0
+    assert agent.model_router.stats()["models"][model_id]["stream_latency"]["count"] == 1
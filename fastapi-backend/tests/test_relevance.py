@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.models import ChatMessage
+from app.services.relevance import RelevanceFilter
+from tests.fakes import make_request, make_user
+
+OFF_TOPIC = "¿Cuál es la receta de la pizza napolitana?"
+
+HISTORY = [
+    ChatMessage(role="user", content="¿Cómo creo una Knowledge Base en Bedrock?"),
+    ChatMessage(role="assistant", content="Desde la consola de Bedrock, en Knowledge bases...")
+]
+
+def _filter(mode: str) -> RelevanceFilter:
+    relevance = RelevanceFilter(mode=mode)
+    relevance.load_all()
+    return relevance
+
+def _answer(chat_service, agent, request) -> str:
+    return asyncio.run(chat_service.run(agent, request, make_user()))
+
+def test_default_mode_is_shadow():
+    assert settings.relevance_filter_mode == "shadow"
+
+def test_enforce_mode_rejects_an_off_topic_first_question(chat_service, agent, fake_bedrock):
+    chat_service.relevance = _filter("enforce")
+
+    assert _answer(chat_service, agent, make_request(OFF_TOPIC)) == settings.relevance_reject_message
+    assert fake_bedrock.calls == []
+
+@pytest.mark.parametrize("message", [
+    "¿Y eso cuánto cuesta?",
+    "¿Y después qué hago?",
+    "Dame otro ejemplo, por favor",
+    "¿Lo puedo hacer con mi cuenta de la facultad?"
+])
+def test_follow_ups_are_not_filtered(chat_service, agent, fake_bedrock, message):
+    chat_service.relevance = _filter("enforce")
+
+    answer = _answer(chat_service, agent, make_request(message, history=HISTORY))
+
+    assert answer == "Respuesta del modelo"
+    assert len(fake_bedrock.calls) == 1
+    assert chat_service.relevance.stats()["checks"] == 0
+
+def test_shadow_mode_counts_but_never_rejects(chat_service, agent, fake_bedrock):
+    chat_service.relevance = _filter("shadow")
+
+    answer = _answer(chat_service, agent, make_request(OFF_TOPIC))
+
+    assert answer == "Respuesta del modelo"
+    assert len(fake_bedrock.calls) == 1
+    stats = chat_service.relevance.stats()
+    assert stats["off_topic"] == 1
+    assert stats["bedrock_calls_avoided"] == 0
+
+def test_held_out_examples_are_evaluated_separately():
+    evaluation = _filter("shadow").stats()["courses"]["bedrock-rag"]["evaluation"]
+
+    assert set(evaluation) == {"eval", "holdout"}
+    assert evaluation["holdout"]["on_topic"] and evaluation["holdout"]["off_topic"]
@@ -0,0 +1,44 @@
+import asyncio
+
+from app.services.semantic_cache import SemanticAnswerCache
+from tests.fakes import make_request, make_user, prompt_of
+
+def _cache() -> SemanticAnswerCache:
+    return SemanticAnswerCache(max_entries=10, ttl_seconds=60, similarity_threshold=0.85)
+
+def test_rephrased_question_hits():
+    cache = _cache()
+    cache.put("bedrock-rag", 2, "¿Cómo creo un bucket de S3?", "crear")
+
+    assert cache.get("bedrock-rag", 2, "como creo un bucket s3") == "crear"
+    assert cache.semantic_hits == 1
+
+def test_different_verb_misses():
+    cache = _cache()
+    cache.put("bedrock-rag", 2, "How do I create an S3 bucket?", "create")
+
+    assert cache.get("bedrock-rag", 2, "How do I delete an S3 bucket?") is None
+
+def test_negated_question_misses():
+    cache = _cache()
+    cache.put("bedrock-rag", 5, "¿Por qué falla la sincronización?", "falla")
+
+    assert cache.get("bedrock-rag", 5, "¿Por qué no falla la sincronización?") is None
+
+def test_scoped_by_step():
+    cache = _cache()
+    cache.put("bedrock-rag", 1, "¿Qué es RAG?", "rag")
+
+    assert cache.get("bedrock-rag", 2, "¿Qué es RAG?") is None
+
+def test_shared_answer_is_not_personalized(chat_service, agent, fake_bedrock):
+    request = make_request("¿Qué permisos necesita el rol IAM de la Knowledge Base?")
+
+    first = asyncio.run(chat_service.run(agent, request, make_user("ana", name="Ana Pérez")))
+    second = asyncio.run(chat_service.run(agent, request, make_user("beto", name="Beto Gómez")))
+
+    # The second student gets the cached answer, generated without anyone's identity
+    assert first == second
+    assert len(fake_bedrock.calls) == 1
+    prompt = prompt_of(fake_bedrock.calls[0][1])
+    assert "Ana" not in prompt and "ana@example.com" not in prompt
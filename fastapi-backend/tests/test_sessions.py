@@ -0,0 +1,69 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import ChatMessage
+from tests.fakes import make_request, make_user
+
+def test_session_keeps_the_conversation(chat_service, agent):
+    user = make_user()
+
+    async def main():
+        first = await chat_service.resolve_session(make_request("¿Qué es RAG?"), user)
+        await chat_service.run(agent, first, user)
+        return await chat_service.resolve_session(
+            make_request("¿Y cómo lo uso en Bedrock?", sessionId=first.sessionId),
+            user
+        )
+
+    second = asyncio.run(main())
+
+    assert [message.content for message in second.history] == ["¿Qué es RAG?", "Respuesta del modelo"]
+
+def test_sessions_are_scoped_to_their_owner(chat_service, agent):
+    async def main():
+        first = await chat_service.resolve_session(make_request("¿Qué es RAG?"), make_user("ana"))
+        await chat_service.run(agent, first, make_user("ana"))
+        return await chat_service.resolve_session(
+            make_request("¿Qué te pregunté?", sessionId=first.sessionId),
+            make_user("beto")
+        )
+
+    assert asyncio.run(main()).history == []
+
+def test_cors_allows_deleting_sessions():
+    response = TestClient(app).options(
+        "/api/bedrock/chat/sessions/abc",
+        headers={
+            "Origin": "http://localhost:3000",
+            "Access-Control-Request-Method": "DELETE"
+        }
+    )
+
+    assert response.status_code == 200
+    assert "DELETE" in response.headers["access-control-allow-methods"]
+
+def test_new_session_is_seeded_with_the_client_history(chat_service, agent):
+    user = make_user()
+    history = [
+        ChatMessage(role="user", content="¿Qué es RAG?"),
+        ChatMessage(role="assistant", content="Recuperación aumentada")
+    ]
+
+    async def main():
+        first = await chat_service.resolve_session(
+            make_request("¿Y cómo lo uso en Bedrock?", sessionId="nueva", history=history),
+            user
+        )
+        await chat_service.run(agent, first, user)
+        return await chat_service.resolve_session(
+            make_request("Dame un ejemplo", sessionId="nueva"),
+            user
+        )
+
+    third = asyncio.run(main())
+
+    assert [message.content for message in third.history] == [
+        "¿Qué es RAG?", "Recuperación aumentada", "¿Y cómo lo uso en Bedrock?", "Respuesta del modelo"
+    ]
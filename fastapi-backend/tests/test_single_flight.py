@@ -0,0 +1,52 @@
+import asyncio
+
+from app.services.single_flight import SingleFlight, chat_fingerprint
+from tests.fakes import FakeBedrockClient, make_request, make_user
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def work() -> str:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", work) for _ in range(3)))
+
+    assert asyncio.run(main()) == ["answer"] * 3
+    assert len(calls) == 1
+    assert flight.coalesced == 2
+
+def test_fingerprint_is_scoped_by_user():
+    request = make_request("¿Qué es RAG?")
+
+    assert chat_fingerprint(request, "model", "ana") == chat_fingerprint(request, "model", "ana")
+    assert chat_fingerprint(request, "model", "ana") != chat_fingerprint(request, "model", "beto")
+
+def _concurrent_runs(chat_service, agent, users):
+    request = make_request("¿Cómo configuro el chunking de la Knowledge Base?")
+
+    async def main():
+        return await asyncio.gather(*(chat_service.run(agent, request, user) for user in users))
+
+    return asyncio.run(main())
+
+def test_same_user_requests_are_coalesced(chat_service, agent, fake_bedrock: FakeBedrockClient):
+    fake_bedrock.delay = 0.05
+    user = make_user("ana")
+
+    _concurrent_runs(chat_service, agent, [user, user])
+
+    assert len(fake_bedrock.calls) == 1
+    assert chat_service.single_flight.coalesced == 1
+
+def test_other_users_are_not_coalesced(chat_service, agent, fake_bedrock: FakeBedrockClient):
+    fake_bedrock.delay = 0.05
+
+    _concurrent_runs(chat_service, agent, [make_user("ana"), make_user("beto")])
+
+    # Each student's call is charged to their own scheduler flow
+    assert len(fake_bedrock.calls) == 2
+    assert chat_service.single_flight.coalesced == 0
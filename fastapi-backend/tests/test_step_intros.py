@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.auth import get_current_user
+from app.main import app
+from app.services import course_indexes, intro_prefetcher
+from app.services.step_intros import step_intro_matcher
+from tests.fakes import make_request, make_user
+
+@pytest.mark.parametrize("message", [
+    "Explícame este paso",
+    "¿De qué trata este paso?",
+    "Explícame el paso 1"
+])
+def test_phrasings_of_the_current_step_match(message):
+    assert step_intro_matcher.matches(message, 1)
+
+@pytest.mark.parametrize("message", [
+    "Explícame el paso 3",
+    "Explícame el paso #3",
+    "¿De qué trata el step 2?",
+    "Explícame el paso siguiente",
+    "Explícame el próximo paso"
+])
+def test_questions_about_another_step_do_not_match(message):
+    assert not step_intro_matcher.matches(message, 1)
+
+def test_another_step_is_not_answered_with_the_current_intro(chat_service, agent, fake_bedrock):
+    user = make_user()
+
+    async def main():
+        await chat_service.prefetch(agent, make_request(chat_service.intros.question, step_id=1), user)
+        fake_bedrock.answer = lambda body: "Respuesta sobre el paso 3"
+        return await chat_service.run(agent, make_request("Explícame el paso 3", step_id=1), user)
+
+    answer = asyncio.run(main())
+
+    assert answer == "Respuesta sobre el paso 3"
+    assert len(fake_bedrock.calls) == 2
+
+@pytest.fixture
+def prefetch_client(monkeypatch: pytest.MonkeyPatch):
+    # Prefetches are recorded instead of generated
+    scheduled = []
+    monkeypatch.setattr(
+        intro_prefetcher,
+        "prefetch",
+        lambda agent, course_id, step_id: scheduled.append((course_id, step_id)) or "scheduled"
+    )
+    course_indexes.load_all()
+    app.dependency_overrides[get_current_user] = lambda: make_user()
+    try:
+        yield TestClient(app), scheduled
+    finally:
+        app.dependency_overrides.clear()
+
+def test_prefetch_of_a_course_step_is_scheduled(prefetch_client):
+    client, scheduled = prefetch_client
+
+    response = client.post("/api/bedrock/chat/prefetch", json={"courseId": "bedrock-rag", "stepId": 3})
+
+    assert response.status_code == 202
+    assert scheduled == [("bedrock-rag", 3)]
+
+@pytest.mark.parametrize("body, status_code", [
+    ({"courseId": "bedrock-rag", "stepId": 999}, 404),
+    ({"courseId": "bedrock-rag", "stepId": -1}, 422),
+    ({"courseId": "seguridad", "stepId": 1}, 400)
+])
+def test_prefetch_of_an_unknown_step_is_rejected(prefetch_client, body, status_code):
+    client, scheduled = prefetch_client
+
+    assert client.post("/api/bedrock/chat/prefetch", json=body).status_code == status_code
+    assert scheduled == []
+
+def test_intro_ignores_the_free_form_context(chat_service, agent, fake_bedrock):
+    user = make_user()
+
+    async def main():
+        await chat_service.prefetch(agent, make_request(chat_service.intros.question, step_id=1), user)
+        return await chat_service.run(
+            agent,
+            make_request("Explícame este paso", step_id=1, context="texto cualquiera"),
+            user
+        )
+
+    assert asyncio.run(main()) == "Respuesta del modelo"
+    assert len(fake_bedrock.calls) == 1
@@ -1,9 +1,11 @@
 import asyncio
 import asyncpg
 import logging
+import time
 from typing import Optional, Dict, Any, List
 
 from app.config.settings import settings
+from app.metrics import DB_QUERY_DURATION
 
 logger = logging.getLogger(__name__)
 
@@ -43,26 +45,32 @@ class DatabaseConnection:
         if not self.pool:
             await self.connect()
         
+        started = time.perf_counter()
         try:
             async with self.pool.acquire() as connection:
                 rows = await connection.fetch(query, *args)
-                return [dict(row) for row in rows]
         except Exception as e:
+            DB_QUERY_DURATION.labels(kind="query", outcome="error").observe(time.perf_counter() - started)
             logger.error(f"❌ Query execution failed: {str(e)}")
             raise
+        DB_QUERY_DURATION.labels(kind="query", outcome="success").observe(time.perf_counter() - started)
+        return [dict(row) for row in rows]
     
     async def execute_command(self, command: str, *args) -> str:
         """Execute an INSERT/UPDATE/DELETE command"""
         if not self.pool:
             await self.connect()
         
+        started = time.perf_counter()
         try:
             async with self.pool.acquire() as connection:
                 result = await connection.execute(command, *args)
-                return result
         except Exception as e:
+            DB_QUERY_DURATION.labels(kind="command", outcome="error").observe(time.perf_counter() - started)
             logger.error(f"❌ Command execution failed: {str(e)}")
             raise
+        DB_QUERY_DURATION.labels(kind="command", outcome="success").observe(time.perf_counter() - started)
+        return result
 
 # Global database instance
 db = DatabaseConnection()
@@ -8,6 +8,7 @@ from contextlib import asynccontextmanager
 from app.config.settings import settings
 from app.api import users
 from app.database.connection import test_db_connection
+from app.metrics import PrometheusMiddleware, metrics_response
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -47,6 +48,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency histograms for /metrics
+app.add_middleware(PrometheusMiddleware)
+
 # Include routers
 app.include_router(users.router, prefix="/api/users", tags=["users"])
 
@@ -59,6 +63,7 @@ async def root():
         "status": "healthy",
         "endpoints": {
             "health": "/health",
+            "metrics": "/metrics",
             "users": "/api/users/*"
         }
     }
@@ -79,6 +84,11 @@ async def health_check():
         logger.error(f"Health check failed: {str(e)}")
         raise HTTPException(status_code=503, detail="Service unhealthy")
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return metrics_response()
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler"""
@@ -0,0 +1,13 @@
+from app.metrics.prometheus import (
+    HTTP_REQUEST_DURATION,
+    DB_QUERY_DURATION,
+    PrometheusMiddleware,
+    metrics_response
+)
+
+__all__ = [
+    "HTTP_REQUEST_DURATION",
+    "DB_QUERY_DURATION",
+    "PrometheusMiddleware",
+    "metrics_response"
+]